@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, date
+from config import Config
 from ..models import Route_section
 from ..models.aircraft import Aircraft
 from ..models.aircraft_airlines import Aircraft_airline
@@ -12,9 +13,16 @@ from ..models.class_price_policy import Class_price_policy
 from ..models.airline_price_policy import Airline_price_policy
 from ..query.airline_query import *
 from ..query.airport_query import get_airport_by_iata_code
-from ..query.route_query import get_route_by_airport, find_reverse_route, get_route
-from ..query.flight_query import get_routes_assigned_to_aircraft, check_aircraft_schedule_conflicts,get_route_totals, get_route_class_distribution, get_flight_totals, get_flight_class_distribution
+from ..query.route_query import get_route_by_airport, find_reverse_route, get_route, get_routes_analytics, get_total_revenue_by_airline_and_date
+from ..query.flight_query import get_routes_assigned_to_aircraft, get_routes_assigned_to_aircraft_ids, check_aircraft_schedule_conflicts,get_route_totals, get_route_class_distribution, get_flight_totals, get_flight_class_distribution, get_revenue_by_departure_day, get_capacity_by_departure_day, iter_airline_tickets_export
 from ..utils.geo import *
+from ..utils.periods import period_start
+from ..utils.route_index import invalidate_route_index_on_commit
+from ..utils.price_policy_cache import invalidate_class_price_policy_on_commit
+from ..utils.search_cache import invalidate_search_cache_on_commit
+from ..utils.seat_inventory import invalidate_seat_layout_on_commit
+from ..utils.seat_map_cache import invalidate_seat_map_on_commit
+from ..utils.report_jobs import report_job_store, job_to_dict
 
 
 class Airline_controller:
@@ -57,6 +65,9 @@ class Airline_controller:
             aircraft = self.session.get(Aircraft_airline, id_aircraft_airline)
             if aircraft:
                 self.session.delete(aircraft)
+                invalidate_search_cache_on_commit(self.session)
+                invalidate_seat_layout_on_commit(self.session)
+                invalidate_seat_map_on_commit(self.session, id_aircraft_airline)
                 self.session.commit()
             return {"message": "aircraft deleted from the fleet successfully"}, 200
 
@@ -65,9 +76,7 @@ class Airline_controller:
         if (self.session.get(Class_seat, id_class) is None):
             return {"message": "id_class not found"}, 404
         else:
-            num_col_seat = 0
-            for value in matrix[0]:
-                num_col_seat += 1
+            num_col_seat = len(matrix[0])
 
             aircraft_max_cols = get_max_cols_aircraft(self.session, id_aircraft_airline)
 
@@ -78,86 +87,64 @@ class Airline_controller:
                 if aircraft_max_cols < len(matrix[0]):
                     return {"message": "exceeded the maximum number of columns available"}, 400
                 else:
-                    num_seat_matrix = 0
-                    for row in matrix:
-                        for cell in row:
-                            if cell == True:
-                                num_seat_matrix += 1
+                    num_seat_matrix = sum(map(sum, matrix))
 
                     num_seat_aircraft = number_seat_aircraft(self.session, id_aircraft_airline)
 
                     if num_seat_matrix + num_seat_aircraft > get_max_economy_seats(self.session, id_aircraft_airline):
                         return {"message": "exceeded the maximum number of seats available"}, 400
                     else:
+                        invalidate_seat_layout_on_commit(self.session)
+                        invalidate_seat_map_on_commit(self.session, id_aircraft_airline)
+                        # the aircraft's flights may now match searches for this class
+                        routes = get_routes_assigned_to_aircraft_ids(self.session, [id_aircraft_airline])
+                        if routes:
+                            invalidate_search_cache_on_commit(self.session, routes=routes)
                         return insert_block_seat_map(self.session, matrix, id_aircraft_airline, id_class)
 
 
 
-    def clone_aircraft_seat_map(self, source_id, target_id):
-        
-        source_aircraft = self.session.get(Aircraft_airline, source_id)
-        target_aircraft = self.session.get(Aircraft_airline, target_id)
-        if source_aircraft is None or target_aircraft is None:
+    def clone_aircraft_seat_map(self, source_id, target_ids):
+        models = get_aircraft_models_by_ids(self.session, [source_id, *target_ids])
+        if source_id not in models or any(target_id not in models for target_id in target_ids):
             return {"message": "source_id or target_id not found"}, 404
-        
-        source_model = self.session.get(Aircraft, source_aircraft.id_aircraft_model)
-        target_model = self.session.get(Aircraft, target_aircraft.id_aircraft_model)
-        if source_model is None or target_model is None:
-            return {"message": "Aircraft model not found"}, 404
-
-        if source_model.cabin_max_cols != target_model.cabin_max_cols:
-            return {
-                "message": (
-                    f"Incompatible aircraft cabin layout: "
-                    f"source cols={source_model.cabin_max_cols}, "
-                    f"target cols={target_model.cabin_max_cols}"
-                )
-            }, 400
-
 
+        source_model = models[source_id]
         num_seat_aircraft = number_seat_aircraft(self.session, source_id)
-        if num_seat_aircraft > target_model.max_seats:
-            return {
-                "message": (
-                    f"Source aircraft has {num_seat_aircraft} seats, "
-                    f"which exceeds target aircraft max_seats={target_model.max_seats}"
-                )
-            }, 400
-
-        source_cabins = get_aircraft_seat_map(self.session, source_id)
-        if not source_cabins:
-            return {"message": "No cabins found for source_id"}, 404
-
-        try:
-            if aircraft_exists_composition(self.session, target_id):
-                delete_aircraft_composition(self.session, target_id)
-
-            new_cabins = []
+        for target_id in target_ids:
+            target_model = models[target_id]
+            if source_model.cabin_max_cols != target_model.cabin_max_cols:
+                return {
+                    "message": (
+                        f"Incompatible aircraft cabin layout for target {target_id}: "
+                        f"source cols={source_model.cabin_max_cols}, "
+                        f"target cols={target_model.cabin_max_cols}"
+                    )
+                }, 400
 
-            for source_cabin in source_cabins:
-                new_cabin = Cabin(
-                    rows=source_cabin.rows,
-                    cols=source_cabin.cols,
-                    id_aircraft=target_id,
-                    id_class=source_cabin.id_class  
-                )
-                self.session.add(new_cabin)
-                self.session.flush()  
-
-                for cell in source_cabin.cells:
-                    new_cell = Cell(
-                        id_cabin=new_cabin.id_cabin,
-                        x=cell.x,
-                        y=cell.y,
-                        is_seat=cell.is_seat
+            if num_seat_aircraft > target_model.max_seats:
+                return {
+                    "message": (
+                        f"Source aircraft has {num_seat_aircraft} seats, "
+                        f"which exceeds target {target_id} max_seats={target_model.max_seats}"
                     )
-                    self.session.add(new_cell)
+                }, 400
 
-                new_cabins.append(new_cabin)
+        if not aircraft_exists_composition(self.session, source_id):
+            return {"message": "No cabins found for source_id"}, 404
 
+        try:
+            invalidate_seat_layout_on_commit(self.session)
+            for target_id in target_ids:
+                invalidate_seat_map_on_commit(self.session, target_id)
+            routes = get_routes_assigned_to_aircraft_ids(self.session, target_ids)
+            if routes:
+                invalidate_search_cache_on_commit(self.session, routes=routes)
+
+            copied_blocks = clone_seat_map(self.session, source_id, target_ids)
             self.session.commit()
 
-            return {"message": f"Operation successful, {len(new_cabins)} copied blocks"}, 201
+            return {"message": f"Operation successful, {copied_blocks} copied blocks"}, 201
 
         except Exception as e:
             self.session.rollback()
@@ -204,6 +191,8 @@ class Airline_controller:
 
         self.session.add_all([route_main, route_return])
         self.session.flush()
+        invalidate_route_index_on_commit(self.session)
+        invalidate_search_cache_on_commit(self.session)
 
         prev_detail = None
         outbound_sections = []
@@ -345,6 +334,7 @@ class Airline_controller:
             if inverse_route:
                 inverse_route.end_date = end_date
 
+        invalidate_search_cache_on_commit(self.session, routes={code, inverse_code} - {None})
         self.session.commit()
 
         return {"message": "End date updated successfully"}, 200
@@ -457,6 +447,7 @@ class Airline_controller:
                 scheduled_arrival_day=ad["return_arrival"]
             ))
         self.session.add_all(flights_to_insert)
+        invalidate_search_cache_on_commit(self.session, routes={route_code, return_route_code})
         self.session.commit()
 
         return {
@@ -483,6 +474,8 @@ class Airline_controller:
         )
 
         self.session.add(new_class_price_policy)
+        invalidate_class_price_policy_on_commit(self.session)
+        invalidate_search_cache_on_commit(self.session, airlines={airline_code})
         self.session.commit()
         self.session.refresh(new_class_price_policy)
 
@@ -502,6 +495,8 @@ class Airline_controller:
             if fixed_markup is not None:
                 class_price_policy.fixed_markup = fixed_markup
 
+            invalidate_class_price_policy_on_commit(self.session)
+            invalidate_search_cache_on_commit(self.session, airlines={class_price_policy.airline_code})
             self.session.commit()
 
         return {"message": "class price policy has been successfully modified."}, 201
@@ -556,6 +551,7 @@ class Airline_controller:
             return {"message": "route not found"}, 404
 
         route.base_price = base_price
+        invalidate_search_cache_on_commit(self.session, routes={route_code})
         self.session.commit()
         return {"message": "route base price has been successfully modified."}, 201
 
@@ -574,9 +570,93 @@ class Airline_controller:
             "route_code": route_code,
             "passengers": totals["passengers"],
             "revenue": totals["revenue"],
-            "class_distribution": class_distribution
+            "class_distribution": class_distribution["distribution"],
+            "class_passengers": class_distribution["passengers"]
         }, 200
 
+    def get_analytics_series(self, airline_code: str, data: dict):
+        route_code = data.get("route_code")
+        if route_code is not None:
+            route = self.session.get(Route, route_code)
+            if route is None or route.airline_iata_code != airline_code:
+                return {"message": "route not found"}, 404
+
+        granularity = data.get("granularity", "day")
+        filters = (airline_code, route_code, data.get("start_date"), data.get("end_date"))
+        revenue = get_revenue_by_departure_day(self.session, *filters)
+        capacity = get_capacity_by_departure_day(self.session, *filters)
+
+        periods = {}
+        for day in revenue.keys() | capacity.keys():
+            period = periods.setdefault(period_start(day, granularity), [0, 0, 0, 0])
+            tickets, amount = revenue.get(day, (0, 0))
+            flights, seats = capacity.get(day, (0, 0))
+            period[0] += tickets
+            period[1] += amount or 0
+            period[2] += flights
+            period[3] += seats
+
+        series = [
+            {
+                "period": start.isoformat(),
+                "tickets": tickets,
+                "revenue": float(amount),
+                "flights": flights,
+                "seats": seats,
+                "load_factor": round((tickets / seats) * 100, 2) if seats else None,
+            }
+            for start, (tickets, amount, flights, seats) in sorted(periods.items())
+        ]
+
+        return {
+            "airline_code": airline_code,
+            "route_code": route_code,
+            "granularity": granularity,
+            "series": series
+        }, 200
+
+    def submit_report(self, airline_code: str, data: dict, session_factory):
+        route_code = data.get("route_code")
+        if route_code is not None:
+            route = self.session.get(Route, route_code)
+            if route is None or route.airline_iata_code != airline_code:
+                return {"message": "route not found"}, 404
+
+        def task():
+            # runs on a report worker, with its own session
+            session = session_factory()
+            try:
+                return Airline_controller(session).run_report(airline_code, data)
+            finally:
+                session.close()
+
+        job = report_job_store.submit(airline_code, data, task)
+        if job is None:
+            return {"message": "Too many reports are being generated, retry later"}, 503
+        return job_to_dict(job), 202
+
+    def get_report(self, airline_code: str, id_job: str):
+        job = report_job_store.get(id_job)
+        if job is None or job["airline_code"] != airline_code:
+            return {"message": "report not found"}, 404
+        return job_to_dict(job), 200
+
+    def run_report(self, airline_code: str, data: dict):
+        report = data["report"]
+        if report == "series":
+            return self.get_analytics_series(airline_code, data)
+        if report == "route":
+            return self.get_route_analytics(airline_code, data, data["route_code"])
+        if report == "routes":
+            return {"analytics": get_routes_analytics(self.session, airline_code, data.get("start_date"))}, 200
+        return {"total_revenue": get_total_revenue_by_airline_and_date(self.session, airline_code, data.get("start_date"))}, 200
+
+    def stream_tickets_export(self, airline_code: str, start_date=None, end_date=None):
+        # Yields batches of ticket rows; tickets are read with a server-side cursor
+        yield from iter_airline_tickets_export(
+            self.session, airline_code, start_date, end_date, Config.TICKET_EXPORT_BATCH
+        )
+
     def get_flight_analytics(self,id_flight: int):
         flight = self.session.get(Flight, id_flight)
         if flight is None :
@@ -597,7 +677,8 @@ class Airline_controller:
             "scheduled_arrival_day": str(flight.scheduled_arrival_day),
             "passengers": totals["passengers"],
             "revenue": totals["revenue"],
-            "class_distribution": class_distribution
+            "class_distribution": class_distribution["distribution"],
+            "class_passengers": class_distribution["passengers"]
         }, 200
 
 
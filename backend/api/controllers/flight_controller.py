@@ -1,16 +1,31 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from config import Config
 from ..models.user import User
 from ..models.airport import Airport
 from ..models.ticket import Ticket
 from ..models.flight import Flight
-from ..models.baggage import Baggage
 from ..models.passenger import Passenger
 from ..models.additional_baggage import Additional_baggage
 from ..models.passenger_ticket import Passenger_ticket
-from ..query.flight_query import get_flight_for_search, get_aircraft_by_seat_id, get_class_from_seat, get_flight_seat_blocks
-from ..query.airline_query import get_airline_class_multiplier
-from ..query.baggage_query import get_baggage_role_by_type_airline
-from ..query.passenger_query import get_passenger_id_by_email
+from ..models.booking_request import Booking_request
+from ..query.flight_query import get_flight_for_search, get_connections_for_search, set_statement_timeout, get_cheapest_fares_by_day, iter_flight_for_search, lock_flights, get_flights_by_ids, get_flight_aircraft_ids
+from ..query.baggage_query import get_baggage_ids, get_baggage_roles_by_type_airline
+from ..query.passenger_query import get_passenger_ids_by_emails
+from ..query.revenue_query import add_revenue, SALE, DEPARTURE
+from ..query.booking_request_query import delete_expired_booking_request, get_booking_request
+from ..utils.connection_scan import connection_scan
+from ..utils.price_policy_cache import class_price_policy_cache, load_class_price_policies
+from ..utils.route_index import route_index, chain_share
+from ..utils.pagination import encode_cursor, decode_cursor
+from ..utils.seat_holds import seat_hold_store, hold_to_dict
+from ..utils.seat_inventory import Seat_inventory, Seat_conflict_error
+
+search_executor = ThreadPoolExecutor(max_workers=Config.SEARCH_WORKERS, thread_name_prefix="flight-search")
 
 class Flight_controller:
 
@@ -18,9 +33,12 @@ class Flight_controller:
         self.session = session
 
     def flights_price_policy(self,flights, id_class):
+        policies = class_price_policy_cache.get_many(
+            self.session, {(flight["airline"]["iata_code"], id_class) for flight in flights}
+        )
         for flight in flights:
             airline_code = flight["airline"]["iata_code"]
-            policy = get_airline_class_multiplier(self.session, airline_code, id_class)
+            policy = policies[(airline_code, id_class)]
             if policy:
                 multiplier = policy[0]
                 markup = policy[1]
@@ -28,129 +46,455 @@ class Flight_controller:
                 flight["flight_price"] += markup
 
 
-    def get_flights(self, departure_airport_code, arrival_airport_code, round_trip_flight, direct_flights, departure_date_outbound, departure_date_return, id_class):
-        departure_airport = self.session.get(Airport, departure_airport_code)
-        arrival_airport = self.session.get(Airport, arrival_airport_code)
-
-        if departure_airport is None:
+    def get_itineraries(self, departure_airport_code, arrival_airport_code, departure_date, id_class, max_legs, exclude_sold_out=False):
+        route_codes = route_index.routes_between(self.session, departure_airport_code, arrival_airport_code, max_legs)
+        connections = get_connections_for_search(self.session, route_codes, departure_date, Config.CONNECTION_SEARCH_DAYS, id_class, exclude_sold_out)
+        found = connection_scan(
+            connections,
+            departure_airport_code,
+            arrival_airport_code,
+            departure_date,
+            timedelta(minutes=Config.MIN_CONNECTION_MINUTES),
+            max_legs
+        )
+
+        flights = get_flights_by_ids(self.session, list({leg[0].id_flight for itinerary in found for leg in itinerary})) if found else {}
+        itineraries = []
+        for itinerary in found:
+            legs = []
+            for leg in itinerary:
+                flight = flights[leg[0].id_flight]
+                sections = [c.id_airline_routes for c in leg]
+                legs.append({
+                    "id_flight": flight.id_flight,
+                    "id_aircraft": flight.id_aircraft,
+                    "route_code": flight.route_code,
+                    "base_price": flight.route.base_price,
+                    "flight_price": flight.route.base_price * chain_share(route_index.sub_chain(self.session, flight.route_code, sections)),
+                    "airline": {
+                        "iata_code": flight.route.airline.iata_code,
+                        "name": flight.route.airline.name
+                    },
+                    "departure_airport": leg[0].from_airport,
+                    "arrival_airport": leg[-1].to_airport,
+                    "departure": leg[0].departure.isoformat(),
+                    "arrival": leg[-1].arrival.isoformat(),
+                    "sections": sections,
+                })
+
+            self.flights_price_policy(legs, id_class)
+            itineraries.append({
+                "departure": legs[0]["departure"],
+                "arrival": legs[-1]["arrival"],
+                "num_legs": len(legs),
+                "flight_price": sum(leg["flight_price"] for leg in legs),
+                "legs": legs,
+            })
+
+        self.flights_seats_available([leg for itinerary in itineraries for leg in itinerary["legs"]])
+        return itineraries
+
+    def check_airports(self, departure_airport_code, arrival_airport_code):
+        if self.session.get(Airport, departure_airport_code) is None:
             return {"message": "Departure airport not found"}, 404
 
-        if arrival_airport is None:
+        if self.session.get(Airport, arrival_airport_code) is None:
             return {"message": "Arrival airport not found"}, 404
 
-        data_outbound = [
-            flight.to_dict_search() for flight in get_flight_for_search(
-                self.session, departure_airport_code, arrival_airport_code, departure_date_outbound, direct_flights, id_class
-            )
-        ]
+        return None
 
-        self.flights_price_policy(data_outbound, id_class)
+    def get_flights(self, departure_airport_code, arrival_airport_code, round_trip_flight, direct_flights, departure_date_outbound, departure_date_return, id_class, connections=False, max_legs=3, exclude_sold_out=False, limit=None, outbound_cursor=None, return_cursor=None):
+        error = self.check_airports(departure_airport_code, arrival_airport_code)
+        if error:
+            return error
 
-        data_return = []
-        response = {"outbound_flights": data_outbound}
+        after_outbound = decode_cursor(outbound_cursor) if outbound_cursor else None
+        after_return = decode_cursor(return_cursor) if return_cursor else None
 
+        if not round_trip_flight:
+            data_outbound, next_outbound = self.search_leg(
+                departure_airport_code, arrival_airport_code, departure_date_outbound, direct_flights, id_class, connections, max_legs, exclude_sold_out, after_outbound, limit
+            )
+            response = {"outbound_flights": data_outbound}
+            if limit is not None:
+                response["outbound_next_cursor"] = next_outbound
+            return response, 200
+
+        # Outbound and return legs run concurrently, each on its own pooled connection,
+        # and both have to finish within the same deadline
+        deadline = time.monotonic() + Config.SEARCH_DEADLINE_SECONDS
+        outbound = search_executor.submit(
+            self.search_leg_own_session, deadline,
+            departure_airport_code, arrival_airport_code, departure_date_outbound, direct_flights, id_class, connections, max_legs, exclude_sold_out, after_outbound, limit
+        )
+        return_ = search_executor.submit(
+            self.search_leg_own_session, deadline,
+            arrival_airport_code, departure_airport_code, departure_date_return, direct_flights, id_class, connections, max_legs, exclude_sold_out, after_return, limit
+        )
+
+        _, not_done = wait([outbound, return_], timeout=max(deadline - time.monotonic(), 0))
+        if not_done:
+            for future in not_done:
+                future.cancel()
+            return {"message": "Flight search timed out"}, 504
+
+        data_outbound, next_outbound = outbound.result()
+        data_return, next_return = return_.result()
+        response = {"outbound_flights": data_outbound, "return_flights": data_return}
+        if limit is not None:
+            response["outbound_next_cursor"] = next_outbound
+            response["return_next_cursor"] = next_return
+        return response, 200
+
+    def search_leg(self, departure_airport_code, arrival_airport_code, departure_date, direct_flights, id_class, connections, max_legs, exclude_sold_out=False, after=None, limit=None):
+        # Returns the results and the cursor of the next page (None on the last page)
+        if connections:
+            return self.get_itineraries(departure_airport_code, arrival_airport_code, departure_date, id_class, max_legs, exclude_sold_out), None
+
+        results = get_flight_for_search(
+            self.session, departure_airport_code, arrival_airport_code, departure_date, direct_flights, id_class, exclude_sold_out,
+            after, limit + 1 if limit is not None else None
+        )
+
+        next_cursor = None
+        if limit is not None and len(results) > limit:
+            results = results[:limit]
+            next_cursor = encode_cursor(results[-1][2])
+
+        return self.search_results_to_dict(results, id_class), next_cursor
+
+    def search_results_to_dict(self, results, id_class):
+        data = []
+        for flight, chain, _ in results:
+            result = flight.to_dict_search([seg["id"] for seg in chain])
+            # the sections travelled: their share of the route price, departing on their own day
+            result["flight_price"] = flight.route.base_price * chain_share(chain)
+            result["departure_date"] = (flight.scheduled_departure_day + timedelta(days=chain[0]["day_offset"])).date().isoformat()
+            data.append(result)
+        self.flights_price_policy(data, id_class)
+        self.flights_seats_available(data)
+        return data
+
+    def stream_flights(self, departure_airport_code, arrival_airport_code, round_trip_flight, direct_flights, departure_date_outbound, departure_date_return, id_class, connections=False, max_legs=3, exclude_sold_out=False):
+        # Yields one result at a time; flights are read in batches with a server-side cursor
+        legs = [("outbound", departure_airport_code, arrival_airport_code, departure_date_outbound)]
+        if round_trip_flight:
+            legs.append(("return", arrival_airport_code, departure_airport_code, departure_date_return))
+
+        for leg, departure, arrival, departure_date in legs:
+            if connections:
+                for itinerary in self.get_itineraries(departure, arrival, departure_date, id_class, max_legs, exclude_sold_out):
+                    yield {"leg": leg, "itinerary": itinerary}
+                continue
+
+            for results in iter_flight_for_search(
+                self.session, departure, arrival, departure_date, direct_flights, id_class, exclude_sold_out, Config.SEARCH_STREAM_BATCH
+            ):
+                for flight in self.search_results_to_dict(results, id_class):
+                    yield {"leg": leg, "flight": flight}
+
+    def flights_seats_available(self, flights):
+        if not flights:
+            return
+        aircraft_by_flight = get_flight_aircraft_ids(self.session, list({flight["id_flight"] for flight in flights}))
+        inventory = Seat_inventory.load(self.session, aircraft_by_flight)
+        for flight in flights:
+            flight["seats_available"] = {
+                str(id_class): available for id_class, available in inventory.seats_available(flight["id_flight"]).items()
+            }
+
+    def search_leg_own_session(self, deadline, *args):
+        with Session(bind=self.session.get_bind()) as session:
+            set_statement_timeout(session, int(max(deadline - time.monotonic(), 0) * 1000))
+            return Flight_controller(session).search_leg(*args)
+
+    def get_flexible_fares(self, departure_airport_code, arrival_airport_code, direct_flights, date_from, date_to, id_class):
+        error = self.check_airports(departure_airport_code, arrival_airport_code)
+        if error:
+            return error
+
+        sub_chains = {}
+        for code, chain in route_index.find_sub_chains(self.session, departure_airport_code, arrival_airport_code, direct_flights):
+            sub_chains.setdefault(code, chain)
+
+        days = {}
+        if sub_chains:
+            fares = sorted(
+                (
+                    (row.day + timedelta(days=sub_chains[row.route_code][0]["day_offset"]), row)
+                    for row in get_cheapest_fares_by_day(self.session, sub_chains, date_from, date_to, id_class)
+                ),
+                key=lambda fare: (fare[0], fare[1].flight_price)
+            )
+            for departure_date, row in fares:
+                day = days.setdefault(departure_date.isoformat(), {
+                    "date": departure_date.isoformat(),
+                    "cheapest_price": row.flight_price,
+                    "itineraries": []
+                })
+                day["itineraries"].append({
+                    "route_code": row.route_code,
+                    "airline_iata_code": row.airline_iata_code,
+                    "flight_price": row.flight_price,
+                    "flights": row.flights,
+                    "sections": [seg["id"] for seg in sub_chains[row.route_code]],
+                })
+
+        return {"days": list(days.values())}, 200
+
+    def search_cache_tags(self, response, departure_airport_code, arrival_airport_code, round_trip_flight, direct_flights, connections):
+        # Routes that can appear in this search and airlines priced in its response
+        airlines = set()
+        for key in ("outbound_flights", "return_flights"):
+            for result in response.get(key, []):
+                for flight in result.get("legs", [result]):
+                    airlines.add(flight["airline"]["iata_code"])
+
+        if connections:
+            return None, airlines
+
+        routes = {
+            code for code, _ in route_index.find_sub_chains(self.session, departure_airport_code, arrival_airport_code, direct_flights)
+        }
         if round_trip_flight:
-            data_return = [
-                flight.to_dict_search() for flight in get_flight_for_search(
-                    self.session, arrival_airport_code, departure_airport_code, departure_date_return, direct_flights, id_class
-                )
-            ]
-            self.flights_price_policy(data_return, id_class)
-            response["return_flights"] = data_return
+            routes |= {
+                code for code, _ in route_index.find_sub_chains(self.session, arrival_airport_code, departure_airport_code, direct_flights)
+            }
+        return routes, airlines
 
-        return response, 200
+    def hold_seats(self, id_user: int, id_flight: int, seat_ids: list[int]):
+        if self.session.get(User, id_user) is None:
+            raise ValueError("User not found")
 
+        flight = self.session.get(Flight, id_flight)
+        if flight is None:
+            raise ValueError("Flight not found")
 
-    def book(self, id_buyer: int, tickets):
+        inventory = Seat_inventory.load(self.session, {id_flight: flight.id_aircraft}, cached=False)
+        for id_seat in seat_ids:
+            if inventory.seat(id_flight, id_seat) is None:
+                raise ValueError("The selected seat does not belong to the selected flight")
+            if inventory.is_occupied(id_flight, id_seat):
+                raise Seat_conflict_error(f"Seat {id_seat} is already occupied")
+
+        hold = seat_hold_store.hold(self.session, id_flight, seat_ids, id_user, Config.SEAT_HOLD_TTL)
+        return hold_to_dict(hold), 201
+
+    def release_hold(self, id_hold: str, id_user: int):
+        hold = seat_hold_store.get(self.session, id_hold)
+        if hold is None or hold["id_user"] != id_user:
+            raise ValueError("Seat hold not found")
+
+        seat_hold_store.release(self.session, id_hold)
+        return {"message": "Seat hold released"}, 200
+
+    def book_idempotent(self, idempotency_key: str, request_hash: str, id_buyer: int, tickets, id_hold: str | None = None):
+        # The key is stored in the same transaction as the tickets, so a retry either finds
+        # the committed response or, if the first attempt failed, books again. A retry racing
+        # the first attempt waits on the key's row until that transaction ends.
+        cutoff = datetime.utcnow() - timedelta(seconds=Config.IDEMPOTENCY_KEY_TTL)
+        delete_expired_booking_request(self.session, id_buyer, idempotency_key, cutoff)
+
+        try:
+            with self.session.begin_nested():
+                self.session.execute(insert(Booking_request).values(
+                    id_buyer = id_buyer,
+                    idempotency_key = idempotency_key,
+                    request_hash = request_hash,
+                ))
+        except IntegrityError:
+            stored = get_booking_request(self.session, id_buyer, idempotency_key)
+            if stored is None:
+                raise
+            if stored.request_hash != request_hash:
+                return {"message": "Idempotency key already used for a different request"}, 422
+            return stored.response, stored.status_code
+
+        response, status = self.book(id_buyer, tickets, id_hold)
+        self.session.execute(
+            update(Booking_request)
+            .where(Booking_request.id_buyer == id_buyer, Booking_request.idempotency_key == idempotency_key)
+            .values(response = response, status_code = status)
+        )
+        return response, status
+
+    @staticmethod
+    def is_seat_conflict(error: IntegrityError) -> bool:
+        # Only a violation of uq_tickets_flight_seat means the seat was sold concurrently
+        constraint = getattr(getattr(error.orig, "diag", None), "constraint_name", None)
+        if constraint is not None:
+            return constraint == "uq_tickets_flight_seat"
+        return "tickets.id_flight, tickets.id_seat" in str(error.orig)     # SQLite has no constraint names
+
+    def book(self, id_buyer: int, tickets, id_hold: str | None = None):
         buyer = self.session.get(User, id_buyer)
         if buyer is None:
             raise ValueError("User not found")
 
-        for ticket in tickets:
-            flight = self.session.get(Flight, ticket.ticket_info.id_flight)
-            if flight is None:
-                raise ValueError("Flight not found")
+        if not tickets:
+            raise ValueError("No tickets to book")
 
-            id_aircraft = get_aircraft_by_seat_id(self.session, ticket.ticket_info.id_seat)
-            if id_aircraft is None:
-                raise ValueError("Seat not found")
+        if id_hold is not None:
+            hold = seat_hold_store.get(self.session, id_hold)
+            if hold is None or hold["id_user"] != id_buyer:
+                raise ValueError("Seat hold not found or expired")
 
-            if id_aircraft != flight.id_aircraft:
-                raise ValueError("The selected seat does not belong to the selected flight")
+        # Bookings on the same flight are serialized from here until commit
+        flight_ids = sorted({ticket.ticket_info.id_flight for ticket in tickets})
+        lock_flights(self.session, flight_ids)
+
+        # The whole order is checked and priced before anything is written
+        flights = get_flights_by_ids(self.session, flight_ids)
+        if len(flights) != len(flight_ids):
+            raise ValueError("Flight not found")
 
-            occupied_seats = get_flight_seat_blocks(self.session, ticket.ticket_info.id_flight)
-            for block in occupied_seats:
-                for seat in block["seats"]:
-                    if seat["id_cell"] == ticket.ticket_info.id_seat:
-                        raise ValueError(f"Seat {ticket.ticket_info.id_seat} is already occupied")
+        inventory = Seat_inventory.load(self.session, {flight.id_flight: flight.id_aircraft for flight in flights.values()}, cached=False)
+        # seats held by other customers are unavailable, the buyer's own holds are not
+        held_seats = seat_hold_store.held_seats(self.session, flight_ids, exclude_user=id_buyer)
 
-            id_class = get_class_from_seat(self.session, ticket.ticket_info.id_seat)
-            policy = get_airline_class_multiplier(self.session, flight.route.airline_iata_code, id_class)
+        seat_classes = []
+        for ticket in tickets:
+            id_flight = ticket.ticket_info.id_flight
+            id_seat = ticket.ticket_info.id_seat
+
+            seat = inventory.seat(id_flight, id_seat)
+            if seat is None:
+                raise ValueError("The selected seat does not belong to the selected flight")
+
+            if inventory.is_occupied(id_flight, id_seat):
+                raise Seat_conflict_error(f"Seat {id_seat} is already occupied")
+            if id_seat in held_seats[id_flight]:
+                raise Seat_conflict_error(f"Seat {id_seat} is held by another customer")
+            inventory.occupy(id_flight, id_seat)
+            seat_classes.append(seat[1])
+
+        # charged prices come from the policy rows, not from the process-local cache
+        policies = load_class_price_policies(self.session, {
+            (flights[ticket.ticket_info.id_flight].route.airline_iata_code, id_class)
+            for ticket, id_class in zip(tickets, seat_classes)
+        })
+
+        baggage_pairs = {
+            (baggage_.id_baggage, flights[ticket.ticket_info.id_flight].route.airline_iata_code)
+            for ticket in tickets
+            for baggage_ in ticket.ticket_info.additional_baggage
+        }
+        baggage_ids = get_baggage_ids(self.session, list({id_baggage for id_baggage, _ in baggage_pairs})) if baggage_pairs else set()
+        roles = get_baggage_roles_by_type_airline(self.session, list(baggage_pairs)) if baggage_pairs else {}
+
+        created_at = datetime.utcnow()
+        ticket_rows = []
+        baggage_rows = []
+        for index, ticket in enumerate(tickets):
+            flight = flights[ticket.ticket_info.id_flight]
+            airline_code = flight.route.airline_iata_code
+            policy = policies[(airline_code, seat_classes[index])]
             price = flight.route.base_price
+            if ticket.ticket_info.sections is not None:
+                # only part of the route is travelled, priced as search prices it
+                chain = route_index.sub_chain(self.session, flight.route_code, ticket.ticket_info.sections)
+                if chain is None:
+                    raise ValueError("The selected sections do not belong to the selected flight")
+                price *= chain_share(chain)
             if policy:
                 multiplier = policy[0]
                 markup = policy[1]
                 price *= multiplier
                 price += markup
 
-            new_ticket = Ticket(
-                id_flight = flight.id_flight,
-                id_seat = ticket.ticket_info.id_seat,
-                price = price,
-            )
-
-            self.session.add(new_ticket)
-            self.session.flush()
-
             for baggage_ in ticket.ticket_info.additional_baggage:
-                baggage = self.session.get(Baggage, baggage_.id_baggage)
-                if baggage is None:
+                if baggage_.id_baggage not in baggage_ids:
                     raise ValueError("Baggage not found")
 
-                roles = get_baggage_role_by_type_airline(self.session, baggage_.id_baggage, flight.route.airline_iata_code)
-
-                if roles is None:
+                role = roles.get((baggage_.id_baggage, airline_code))
+                if role is None:
                     raise ValueError("Baggage role not found")
 
-                if roles.allow_extra != True:
+                if role.allow_extra != True:
                     raise ValueError("You cannot purchase this type of baggage.")
 
-                price += baggage_.count * roles.base_price
-
-                new_additional_baggage = Additional_baggage(
-                    id_ticket = new_ticket.id_ticket,
-                    id_baggage = baggage_.id_baggage,
-                    count = baggage_.count,
-                )
-
-                self.session.add(new_additional_baggage)
-                self.session.flush()
-
-            new_ticket.price = price
-            id_passenger = get_passenger_id_by_email(self.session, ticket.passenger_info.email)
-            if id_passenger is None:
-                new_passenger = Passenger(
-                    name = ticket.passenger_info.name,
-                    lastname = ticket.passenger_info.lastname,
-                    date_birth = ticket.passenger_info.date_birth,
-                    phone_number = ticket.passenger_info.phone_number,
-                    email = ticket.passenger_info.email,
-                    passport_number = ticket.passenger_info.passport_number,
-                    sex = ticket.passenger_info.sex
-                )
-
-                self.session.add(new_passenger)
-                self.session.flush()
-                id_passenger = new_passenger.id_passengers
-
-            new_passenger_ticket = Passenger_ticket(
-                id_buyer = id_buyer,
-                id_ticket = new_ticket.id_ticket,
-                id_passenger = id_passenger
-            )
+                price += baggage_.count * role.base_price
+                baggage_rows.append((index, baggage_))
+
+            ticket_rows.append({
+                "id_flight": flight.id_flight,
+                "id_seat": ticket.ticket_info.id_seat,
+                "price": price,
+                "created_at": created_at,
+            })
 
-            self.session.add(new_passenger_ticket)
-            self.session.flush()
+        # A passenger already known by email is reused, a new one is created once per order
+        passenger_ids = get_passenger_ids_by_emails(self.session, list({ticket.passenger_info.email for ticket in tickets}))
+        new_passengers = {}
+        for ticket in tickets:
+            info = ticket.passenger_info
+            if info.email not in passenger_ids and info.email not in new_passengers:
+                new_passengers[info.email] = {
+                    "name": info.name,
+                    "lastname": info.lastname,
+                    "date_birth": info.date_birth,
+                    "phone_number": info.phone_number,
+                    "email": info.email,
+                    "passport_number": info.passport_number,
+                    "sex": info.sex,
+                }
+
+        if new_passengers:
+            result = self.session.execute(
+                insert(Passenger).returning(Passenger.email, Passenger.id_passengers),
+                list(new_passengers.values())
+            )
+            passenger_ids.update({email: id_passenger for email, id_passenger in result.all()})
+
+        try:
+            # (id_flight, id_seat) is unique, so ids are matched back to the tickets without
+            # asking for RETURNING in parameter order, which SQLite can only do row by row
+            result = self.session.execute(
+                insert(Ticket).returning(Ticket.id_flight, Ticket.id_seat, Ticket.id_ticket),
+                ticket_rows
+            )
+            inserted = {(id_flight, id_seat): id_ticket for id_flight, id_seat, id_ticket in result.all()}
+            ticket_ids = [inserted[(row["id_flight"], row["id_seat"])] for row in ticket_rows]
+        except IntegrityError as e:
+            if not self.is_seat_conflict(e):
+                raise
+            raise Seat_conflict_error("One of the selected seats is already occupied")
+        inventory.save(self.session)
+
+        # Daily revenue rollups, by sale day and by departure day
+        revenue = {}
+        for ticket_row, id_class in zip(ticket_rows, seat_classes):
+            flight = flights[ticket_row["id_flight"]]
+            for basis, day in ((SALE, created_at.date()), (DEPARTURE, flight.scheduled_departure_day.date())):
+                key = (basis, flight.route_code, day, id_class or 0)
+                tickets_count, amount = revenue.get(key, (0, 0))
+                revenue[key] = (tickets_count + 1, amount + ticket_row["price"])
+        add_revenue(self.session, [
+            {"basis": basis, "route_code": route_code, "day": day, "id_class": id_class, "tickets": tickets_count, "revenue": amount}
+            for (basis, route_code, day, id_class), (tickets_count, amount) in revenue.items()
+        ])
+
+        if baggage_rows:
+            self.session.execute(insert(Additional_baggage), [
+                {
+                    "id_ticket": ticket_ids[index],
+                    "id_baggage": baggage_.id_baggage,
+                    "count": baggage_.count,
+                }
+                for index, baggage_ in baggage_rows
+            ])
+
+        self.session.execute(insert(Passenger_ticket), [
+            {
+                "id_buyer": id_buyer,
+                "id_ticket": ticket_ids[index],
+                "id_passenger": passenger_ids[ticket.passenger_info.email],
+            }
+            for index, ticket in enumerate(tickets)
+        ])
+
+        if id_hold is not None:
+            seat_hold_store.release(self.session, id_hold)
 
         return {"message": "The tickets have been successfully purchased."}, 200
 
@@ -22,4 +22,8 @@ from .class_price_policy import Class_price_policy
 from .baggage import Baggage
 from .baggage_role import Baggage_role
 from .class_baggage_policy import Class_baggage_policy
-from .additional_baggage import Additional_baggage
\ No newline at end of file
+from .additional_baggage import Additional_baggage
+from .booking_request import Booking_request
+from .flight_seat_inventory import Flight_seat_inventory
+from .route_revenue_daily import Route_revenue_daily
+from .seat_hold import Seat_hold
\ No newline at end of file
@@ -0,0 +1,17 @@
+from .base import Base
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, DateTime, JSON
+
+class Booking_request(Base):
+    __tablename__ = "booking_requests"
+
+    id_buyer: Mapped[int] = mapped_column(Integer, primary_key=True)
+    idempotency_key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int] = mapped_column(Integer, nullable=True)
+    response: Mapped[dict] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"Booking_request(id_buyer={self.id_buyer}, idempotency_key={self.idempotency_key}, status_code={self.status_code})"
@@ -37,7 +37,13 @@ class Flight(Base):
             "scheduled_arrival_day": self.scheduled_arrival_day,
         }
 
-    def to_dict_search(self):
+    def to_dict_search(self, segments=None):
+        details = self.route.routes_details
+        if segments is not None:
+            # only the sections actually travelled, in chain order
+            by_id = {rd.id_airline_routes: rd for rd in details}
+            details = [by_id[id_segment] for id_segment in segments]
+
         return {
             "id_flight": self.id_flight,
             "id_aircraft": self.id_aircraft,
@@ -50,5 +56,5 @@ class Flight(Base):
             },
             "scheduled_departure_day": self.scheduled_departure_day.isoformat(),
             "scheduled_arrival_day": self.scheduled_arrival_day.isoformat(),
-            "sections": [rd.to_dict_search() for rd in self.route.routes_details],
+            "sections": [rd.to_dict_search() for rd in details],
         }
\ No newline at end of file
@@ -0,0 +1,17 @@
+from .base import Base
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, DateTime, ForeignKey, LargeBinary
+
+class Flight_seat_inventory(Base):
+    __tablename__ = "flight_seat_inventory"
+
+    # One bit per cell of the cabin, at y * cols + x, set when the seat is sold
+    id_flight: Mapped[int] = mapped_column(ForeignKey("flights.id_flight", ondelete="CASCADE"), primary_key=True)
+    id_cabin: Mapped[int] = mapped_column(ForeignKey("cabins.id_cabin", ondelete="CASCADE"), primary_key=True)
+    occupied: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    occupied_seats: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"Flight_seat_inventory(id_flight={self.id_flight}, id_cabin={self.id_cabin}, occupied_seats={self.occupied_seats})"
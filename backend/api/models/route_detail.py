@@ -16,7 +16,7 @@ class Route_detail(Base):
     id_route_section: Mapped[int] = mapped_column(ForeignKey("routes_section.id_routes_section",ondelete="SET NULL"), nullable=False)
     section: Mapped["Route_section"] = relationship("Route_section", back_populates="routes")
 
-    id_next: Mapped[int|None] = mapped_column(ForeignKey("route_detail.id_airline_routes"), nullable=False)
+    id_next: Mapped[int|None] = mapped_column(ForeignKey("route_detail.id_airline_routes"), nullable=True)
 
     next: Mapped[Optional["Route_detail"]] = relationship(
         back_populates="prev",
@@ -49,5 +49,5 @@ class Route_detail(Base):
              "departure_time": self.departure_time.strftime("%H:%M:%S"),
              "arrival_time": self.arrival_time.strftime("%H:%M:%S"),
              "section": self.section.to_dict(),
-             "next_id": self.next.id_airline_routes if self.next else None,
+             "next_id": self.id_next,
         }
\ No newline at end of file
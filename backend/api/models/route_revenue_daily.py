@@ -0,0 +1,20 @@
+from .base import Base
+from datetime import date
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, Date, Float, ForeignKey
+
+class Route_revenue_daily(Base):
+    __tablename__ = "route_revenue_daily"
+
+    # Tickets sold and revenue per route, day and class. `basis` tells which day is counted:
+    # "sale" is the day the ticket was bought, "departure" the scheduled day of its flight.
+    # id_class 0 collects seats whose cabin has no class.
+    basis: Mapped[str] = mapped_column(String(10), primary_key=True)
+    route_code: Mapped[str] = mapped_column(ForeignKey("routes.code", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    id_class: Mapped[int] = mapped_column(Integer, primary_key=True)
+    tickets: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"Route_revenue_daily(basis={self.basis}, route_code={self.route_code}, day={self.day}, id_class={self.id_class}, tickets={self.tickets}, revenue={self.revenue})"
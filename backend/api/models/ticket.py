@@ -1,11 +1,15 @@
 from .base import Base
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, DateTime, ForeignKey, Integer, Float
+from sqlalchemy import String, DateTime, ForeignKey, Integer, Float, UniqueConstraint
 from typing import List
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        # a seat can be sold only once per flight
+        UniqueConstraint("id_flight", "id_seat", name="uq_tickets_flight_seat"),
+    )
 
     id_ticket: Mapped[int] = mapped_column(Integer, primary_key=True)
 
@@ -1,5 +1,7 @@
+import io
+from datetime import datetime
 from flask_sqlalchemy.session import Session
-from sqlalchemy import select, func
+from sqlalchemy import select, func, tuple_, insert, delete, true, literal, DateTime
 from sqlalchemy.orm import joinedload, selectinload
 
 from ..models.class_price_policy import Class_price_policy
@@ -9,6 +11,7 @@ from ..models.aircraft_airlines import Aircraft_airline
 from ..models.cabin import Cabin
 from ..models.cell import Cell
 from ..models.aircraft import Aircraft
+from ..models.class_seat import Class_seat
 from ..models.class_price_policy import Class_price_policy
 
 
@@ -85,6 +88,29 @@ def aircraft_exists_composition(session: Session, id_aircraft_airline: int)-> bo
 
 
 
+def bulk_insert_cells(session: Session, id_cabin: int, matrix: list[list[bool]]):
+    # PostgreSQL: one COPY from an in-memory buffer. Elsewhere: a single executemany.
+    created_at = datetime.utcnow()
+    connection = session.connection()
+
+    if connection.dialect.name == "postgresql":
+        stamp = created_at.isoformat()
+        buffer = io.StringIO()
+        buffer.writelines(
+            f"{id_cabin}\t{x}\t{y}\t{'t' if is_seat else 'f'}\t{stamp}\n"
+            for y, row in enumerate(matrix)
+            for x, is_seat in enumerate(row)
+        )
+        buffer.seek(0)
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert("COPY cells (id_cabin, x, y, is_seat, created_at) FROM STDIN", buffer)
+    else:
+        session.execute(insert(Cell), [
+            {"id_cabin": id_cabin, "x": x, "y": y, "is_seat": is_seat, "created_at": created_at}
+            for y, row in enumerate(matrix)
+            for x, is_seat in enumerate(row)
+        ])
+
 def insert_block_seat_map(session: Session, matrix: list[list[bool]], id_aircraft_airline: int, id_class: int):
     rows = len(matrix)
     cols = len(matrix[0])
@@ -99,16 +125,7 @@ def insert_block_seat_map(session: Session, matrix: list[list[bool]], id_aircraf
         session.add(new_cabin)
         session.flush()
 
-        cells = []
-        for y, row in enumerate(matrix):
-            for x, is_seat in enumerate(row):
-                cells.append(Cell(
-                    id_cabin=new_cabin.id_cabin,
-                    x=x,
-                    y=y,
-                    is_seat=is_seat
-                ))
-        session.add_all(cells)
+        bulk_insert_cells(session, new_cabin.id_cabin, matrix)
 
         session.commit()
         return {"message": "Block inserted successfully"}, 201
@@ -117,21 +134,6 @@ def insert_block_seat_map(session: Session, matrix: list[list[bool]], id_aircraf
         session.rollback()
         return {"message": str(e)}, 500
 
-def get_aircraft_seat_map(session: Session, id_aircraft_airline: int):
-    stmt = (
-        select(Cabin)
-        .where(Cabin.id_aircraft == id_aircraft_airline)
-        .options(
-            joinedload(Cabin.cells),        
-            joinedload(Cabin.class_seat)    
-        )
-    )
-
-    result = session.execute(stmt).unique().scalars().all()
-    return result
-
-
-
 def get_aircraft_seat_map_JSON(session: Session, id_aircraft_airline: int):
     stmt = (
         select(Cabin)
@@ -165,18 +167,118 @@ def get_aircraft_seat_map_JSON(session: Session, id_aircraft_airline: int):
 
     return seat_map
 
-def delete_aircraft_composition(session: Session, id_aircraft_airline: int):
+def get_aircraft_seat_map_compact(session: Session, id_aircraft_airline: int):
+    # Same seat map as get_aircraft_seat_map_JSON, one string of 0/1 (aisle/seat) per row.
+    # Cells created row by row have consecutive ids: id_cell = base_cell + y * stride + x.
+    # Otherwise `cell_ids` lists them row by row instead.
     stmt = (
-        select(Cabin)
+        select(
+            Cabin.id_cabin,
+            Cabin.rows,
+            Cabin.cols,
+            Cabin.id_class,
+            Class_seat.name.label("class_name"),
+            Cell.id_cell,
+            Cell.x,
+            Cell.y,
+            Cell.is_seat
+        )
+        .outerjoin(Class_seat, Class_seat.id_class == Cabin.id_class)
+        .outerjoin(Cell, Cell.id_cabin == Cabin.id_cabin)
         .where(Cabin.id_aircraft == id_aircraft_airline)
-        .options(joinedload(Cabin.cells))
+        .order_by(Cabin.id_cabin, Cell.y, Cell.x)
     )
 
-    cabins = session.execute(stmt).unique().scalars().all()
+    cabins = {}
+    for row in session.execute(stmt).all():
+        cabin = cabins.get(row.id_cabin)
+        if cabin is None:
+            cabin = cabins[row.id_cabin] = {
+                "id_cabin": row.id_cabin,
+                "rows": row.rows,
+                "cols": row.cols,
+                "id_class": row.id_class,
+                "class_name": row.class_name,
+                "seats": [["0"] * row.cols for _ in range(row.rows)],
+                "cell_ids": [None] * (row.rows * row.cols),
+            }
+        if row.id_cell is None:
+            continue
+        if row.is_seat:
+            cabin["seats"][row.y][row.x] = "1"
+        cabin["cell_ids"][row.y * row.cols + row.x] = row.id_cell
 
-    for cabin in cabins:
-        session.delete(cabin)  #I don't need to delete the cells. i use DELETE CASCADE
+    seat_map = []
+    for cabin in cabins.values():
+        cabin["seats"] = ["".join(seat_row) for seat_row in cabin["seats"]]
+        cell_ids = cabin.pop("cell_ids")
+        base_cell = cell_ids[0] if cell_ids else None
+        if base_cell is not None and cell_ids == list(range(base_cell, base_cell + len(cell_ids))):
+            cabin["base_cell"] = base_cell
+            cabin["stride"] = cabin["cols"]
+        else:
+            cabin["cell_ids"] = cell_ids
+        seat_map.append(cabin)
+
+    return seat_map
+
+def get_aircraft_models_by_ids(session: Session, aircraft_ids: list[int]) -> dict[int, Aircraft]:
+    # id_aircraft_airline -> Aircraft model
+    stmt = (
+        select(Aircraft_airline.id_aircraft_airline, Aircraft)
+        .join(Aircraft, Aircraft.id_aircraft == Aircraft_airline.id_aircraft_model)
+        .where(Aircraft_airline.id_aircraft_airline.in_(aircraft_ids))
+    )
+    return dict(session.execute(stmt).all())
+
+def clone_seat_map(session: Session, source_id: int, target_ids: list[int]) -> int:
+    # Replaces the cabins of every target with copies of the source's cabins, without loading
+    # them: one DELETE and two INSERT ... SELECT whatever the number of cells and targets.
+    session.execute(delete(Cabin).where(Cabin.id_aircraft.in_(target_ids)))  # cells go with DELETE CASCADE
+    created_at = literal(datetime.utcnow(), DateTime)
+
+    targets = (
+        select(Aircraft_airline.id_aircraft_airline.label("id_aircraft"))
+        .where(Aircraft_airline.id_aircraft_airline.in_(target_ids))
+        .subquery()
+    )
+    new_cabins = (
+        select(Cabin.rows, Cabin.cols, targets.c.id_aircraft, Cabin.id_class, created_at)
+        .join(targets, true())
+        .where(Cabin.id_aircraft == source_id)
+        .order_by(targets.c.id_aircraft, Cabin.id_cabin)
+    )
+    result = session.execute(
+        insert(Cabin).from_select(["rows", "cols", "id_aircraft", "id_class", "created_at"], new_cabins)
+    )
 
+    # Ids are generated in insert order, so the n-th new cabin of a target is the copy of
+    # the n-th cabin of the source
+    source_rank = (
+        select(Cabin.id_cabin, func.row_number().over(order_by=Cabin.id_cabin).label("rank"))
+        .where(Cabin.id_aircraft == source_id)
+        .subquery()
+    )
+    target_rank = (
+        select(
+            Cabin.id_cabin,
+            func.row_number().over(partition_by=Cabin.id_aircraft, order_by=Cabin.id_cabin).label("rank")
+        )
+        .where(Cabin.id_aircraft.in_(target_ids))
+        .subquery()
+    )
+    new_cells = (
+        select(target_rank.c.id_cabin, Cell.x, Cell.y, Cell.is_seat, created_at)
+        .join(source_rank, source_rank.c.id_cabin == Cell.id_cabin)
+        .join(target_rank, target_rank.c.rank == source_rank.c.rank)
+        # row by row, so each cloned cabin keeps consecutive ids (see get_aircraft_seat_map_compact)
+        .order_by(target_rank.c.id_cabin, Cell.y, Cell.x)
+    )
+    session.execute(
+        insert(Cell).from_select(["id_cabin", "x", "y", "is_seat", "created_at"], new_cells)
+    )
+
+    return result.rowcount
 
 def get_airline_class_price_policy(session: Session, airline_code: str):
     stmt = (
@@ -194,18 +296,18 @@ def get_airline_price_policy(session: Session, airline_code: str):
     result = session.scalars(stmt)
     return [price_policy.to_dict() for price_policy in result]
 
-def get_airline_class_multiplier(session: Session, airline_code: str, id_class: int):
+def get_class_multipliers(session: Session, pairs: list[tuple[str, int]]):
     stmt = (
         select(
+            Class_price_policy.airline_code,
+            Class_price_policy.id_class,
             Class_price_policy.price_multiplier,
             Class_price_policy.fixed_markup
         )
-        .where(
-            Class_price_policy.airline_code == airline_code,
-            Class_price_policy.id_class == id_class
-        )
+        .where(tuple_(Class_price_policy.airline_code, Class_price_policy.id_class).in_(pairs))
+        .order_by(Class_price_policy.id_class_price_policy)
     )
-    return session.execute(stmt).first()
+    return session.execute(stmt).all()
 
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import select, func
+from sqlalchemy import select, func, tuple_
 from flask_sqlalchemy.session import Session
 from ..models.baggage import Baggage
 from ..models.baggage_role import Baggage_role
@@ -14,6 +14,22 @@ def get_baggage_role_by_type_airline(session: Session, baggage_type, airline_cod
     result = session.scalars(stmt).first()
     return result
 
+def get_baggage_ids(session: Session, baggage_ids) -> set[int]:
+    stmt = select(Baggage.id_baggage).where(Baggage.id_baggage.in_(baggage_ids))
+    return set(session.scalars(stmt).all())
+
+def get_baggage_roles_by_type_airline(session: Session, pairs) -> dict[tuple[int, str], Baggage_role]:
+    # (id_baggage_type, airline_code) -> first role, like get_baggage_role_by_type_airline
+    stmt = (
+        select(Baggage_role)
+        .where(tuple_(Baggage_role.id_baggage_type, Baggage_role.airline_code).in_(pairs))
+        .order_by(Baggage_role.id_baggage_rules)
+    )
+    roles = {}
+    for role in session.scalars(stmt).all():
+        roles.setdefault((role.id_baggage_type, role.airline_code), role)
+    return roles
+
 def get_baggage_role_by_airline(session: Session, airline_code):
     stmt = select(Baggage_role).where(Baggage_role.airline_code == airline_code)
     result = session.scalars(stmt).all()
@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from ..models.booking_request import Booking_request
+
+def delete_expired_booking_request(session: Session, id_buyer: int, idempotency_key: str, cutoff: datetime):
+    stmt = delete(Booking_request).where(
+        Booking_request.id_buyer == id_buyer,
+        Booking_request.idempotency_key == idempotency_key,
+        Booking_request.created_at < cutoff
+    )
+    session.execute(stmt)
+
+def delete_expired_booking_requests(session: Session, cutoff: datetime) -> int:
+    stmt = delete(Booking_request).where(Booking_request.created_at < cutoff)
+    return session.execute(stmt).rowcount
+
+def get_booking_request(session: Session, id_buyer: int, idempotency_key: str) -> Booking_request | None:
+    stmt = (
+        select(Booking_request)
+        .where(Booking_request.id_buyer == id_buyer, Booking_request.idempotency_key == idempotency_key)
+        .execution_options(populate_existing=True)
+    )
+    return session.scalars(stmt).first()
@@ -1,11 +1,11 @@
 from datetime import timedelta
 
 import sqlalchemy
-from sqlalchemy import select, or_, and_, true, func
+from sqlalchemy import select, or_, and_, true, func, case, Date, tuple_
 from flask_sqlalchemy.session import Session
-from collections import defaultdict, Counter
+from collections import defaultdict
 
-from sqlalchemy.orm import aliased
+from sqlalchemy.orm import aliased, joinedload, selectinload
 
 from ..models.flight import Flight
 from ..models.route import Route
@@ -13,11 +13,18 @@ from ..models.route_detail import Route_detail
 from ..models.route_section import Route_section
 from ..models.aircraft_airlines import Aircraft_airline
 from ..models.ticket import Ticket
+from ..models.additional_baggage import Additional_baggage
 from ..models.cell import Cell
 from ..models.class_seat import Class_seat
 from ..models.passenger import Passenger
 from ..models.passenger_ticket import Passenger_ticket
 from ..models.cabin import Cabin
+from ..models.class_price_policy import Class_price_policy
+from ..models.flight_seat_inventory import Flight_seat_inventory
+from ..models.route_revenue_daily import Route_revenue_daily
+from .revenue_query import DEPARTURE
+from ..utils.route_index import route_index, chain_share
+from ..utils.connection_scan import Connection, build_flight_connections
 
 
 def check_aircraft_schedule_conflicts(session, aircraft_id, dates_to_check):
@@ -32,6 +39,31 @@ def check_aircraft_schedule_conflicts(session, aircraft_id, dates_to_check):
     return existing_flight is not None
 
 
+def set_statement_timeout(session: Session, milliseconds: int):
+    # Only lasts for the current transaction
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(select(func.set_config("statement_timeout", str(max(milliseconds, 1)), True)))
+
+
+def class_seat_available(id_class: int):
+    # True when the flight still has at least one free seat in the class.
+    # Aliases keep the subquery from correlating with cabins joined by the outer query.
+    cabin = aliased(Cabin)
+    cell = aliased(Cell)
+    return (
+        select(cell.id_cell)
+        .join(cabin, cabin.id_cabin == cell.id_cabin)
+        .where(
+            cabin.id_aircraft == Flight.id_aircraft,
+            cabin.id_class == id_class,
+            cell.is_seat == true(),
+            ~select(Ticket.id_ticket)
+            .where(Ticket.id_flight == Flight.id_flight, Ticket.id_seat == cell.id_cell)
+            .exists()
+        )
+        .exists()
+    )
+
 def get_routes_assigned_to_aircraft(session: Session, id_aircraft: int) -> list[str] | None:
     stmt = (
         select(Flight.route_code)
@@ -41,150 +73,306 @@ def get_routes_assigned_to_aircraft(session: Session, id_aircraft: int) -> list[
     result = session.scalars(stmt).all()
     return result if result else None
 
-def get_flight_for_search(session: Session, departure_airport: str, arrival_airport: str, departure_date, direct_flights, id_class: int):
-    # STEP 1: Ottieni tutti i dettagli delle rotte
+def get_routes_assigned_to_aircraft_ids(session: Session, aircraft_ids: list[int]) -> set[str]:
+    stmt = (
+        select(Flight.route_code)
+        .where(Flight.id_aircraft.in_(aircraft_ids))
+        .distinct()
+    )
+    return set(session.scalars(stmt).all())
+
+def class_price(share, id_class: int):
+    # Price of `share` of the route in `id_class`, with the airline's first policy for the class
+    policy = (
+        select(Class_price_policy)
+        .where(Class_price_policy.airline_code == Route.airline_iata_code, Class_price_policy.id_class == id_class)
+        .order_by(Class_price_policy.id_class_price_policy)
+        .limit(1)
+    )
+    return (
+        Route.base_price * share * func.coalesce(policy.with_only_columns(Class_price_policy.price_multiplier).scalar_subquery(), 1)
+        + func.coalesce(policy.with_only_columns(Class_price_policy.fixed_markup).scalar_subquery(), 0)
+    )
+
+def flight_search_stmt(session: Session, departure_airport: str, arrival_airport: str, departure_date, direct_flights, id_class: int, exclude_sold_out: bool = False, after: tuple | None = None):
+    # STEP 1: Tratte (anche parziali) che partono da departure_airport e arrivano a arrival_airport
+    sub_chains = {}
+    for code, chain in route_index.find_sub_chains(session, departure_airport, arrival_airport, direct_flights):
+        sub_chains[chain[0]["id"]] = chain
+
+    if not sub_chains:
+        return None, sub_chains
+
+    # STEP 2: Trova i voli, ordinati per orario di partenza e prezzo
+    start = aliased(Route_detail)
+
+    # a segment departing after midnight belongs to a flight scheduled on an earlier day
+    starts_by_offset = defaultdict(list)
+    for id_start, chain in sub_chains.items():
+        starts_by_offset[chain[0]["day_offset"]].append(id_start)
+    departs_on_date = or_(*(
+        and_(start.id_airline_routes.in_(starts), Flight.scheduled_departure_day == departure_date - timedelta(days=offset))
+        for offset, starts in starts_by_offset.items()
+    ))
+
+    class_available = (
+        select(Cabin.id_cabin)
+        .where(Cabin.id_aircraft == Flight.id_aircraft, Cabin.id_class == id_class)
+        .exists()
+    )
+    share = case({id_start: chain_share(chain) for id_start, chain in sub_chains.items()}, value=start.id_airline_routes)
+    price = class_price(share, id_class)
+    sort_key = (start.departure_time, price, Flight.id_flight, start.id_airline_routes)
+
     stmt = (
         select(
-            Route_detail.code_route,
-            Route_detail.id_airline_routes,
-            Route_detail.id_next,
-            Route_section.code_departure_airport,
-            Route_section.code_arrival_airport
+            Flight,
+            start.id_airline_routes.label("id_start"),
+            start.departure_time.label("departure_time"),
+            price.label("sort_price")
         )
-        .join(Route_section, Route_detail.id_route_section == Route_section.id_routes_section)
+        .join(Route, Route.code == Flight.route_code)
+        .join(start, and_(start.code_route == Flight.route_code, start.id_airline_routes.in_(list(sub_chains))))
+        .where(
+            departs_on_date,
+            class_available
+        )
+        # everything to_dict_search() reads, loaded up front instead of lazily per flight
+        .options(
+            joinedload(Flight.route).joinedload(Route.airline),
+            joinedload(Flight.route).selectinload(Route.routes_details).joinedload(Route_detail.section)
+        )
+        .order_by(*sort_key)
     )
-    results = session.execute(stmt).all()
-
-    # STEP 2: Raggruppa per code_route
-    route_segments = defaultdict(list)
-    id_to_segment = {}
-
-    for code_route, id_segment, id_next, dep, arr in results:
-        seg = {
-            "id": id_segment,
-            "next": id_next,
-            "from": dep,
-            "to": arr
-        }
-        route_segments[code_route].append(seg)
-        id_to_segment[id_segment] = seg
-
-    valid_route_codes = []
-
-    for code, segments in route_segments.items():
-        if direct_flights:
-            # Caso 1: Solo rotte con 1 segmento e nessun next
-            if (
-                    len(segments) == 1 and
-                    segments[0]["next"] is None and
-                    segments[0]["from"] == departure_airport and
-                    segments[0]["to"] == arrival_airport
-            ):
-                valid_route_codes.append(code)
-        else:
-            # Caso 2: Ricostruisci la catena
-            all_ids = {s["id"] for s in segments}
-            next_ids = {s["next"] for s in segments if s["next"] is not None}
-            start_ids = list(all_ids - next_ids)
-            if not start_ids:
-                continue  # skip
-
-            current_id = start_ids[0]
-            chain = []
-            visited = set()
-
-            while current_id and current_id not in visited:
-                visited.add(current_id)
-                seg = id_to_segment.get(current_id)
-                if not seg:
-                    break
-                chain.append(seg)
-                current_id = seg["next"]
-
-            if chain and chain[0]["from"] == departure_airport and chain[-1]["to"] == arrival_airport:
-                valid_route_codes.append(code)
-
-    # STEP 3: Trova i voli
-    if not valid_route_codes:
+
+    if exclude_sold_out:
+        stmt = stmt.where(class_seat_available(id_class))
+
+    if after is not None:
+        stmt = stmt.where(tuple_(*sort_key) > tuple_(*after))
+
+    return stmt, sub_chains
+
+def _search_results(rows, sub_chains):
+    return [
+        (row.Flight, sub_chains[row.id_start], (row.departure_time, row.sort_price, row.Flight.id_flight, row.id_start))
+        for row in rows
+    ]
+
+def get_flight_for_search(session: Session, departure_airport: str, arrival_airport: str, departure_date, direct_flights, id_class: int, exclude_sold_out: bool = False, after: tuple | None = None, limit: int | None = None):
+    stmt, sub_chains = flight_search_stmt(session, departure_airport, arrival_airport, departure_date, direct_flights, id_class, exclude_sold_out, after)
+    if stmt is None:
         return []
 
-    flights_stmt = (
-        select(Flight)
-        .where(
-            Flight.route_code.in_(valid_route_codes),
-            Flight.scheduled_departure_day == departure_date
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    return _search_results(session.execute(stmt).all(), sub_chains)
+
+def iter_flight_for_search(session: Session, departure_airport: str, arrival_airport: str, departure_date, direct_flights, id_class: int, exclude_sold_out: bool = False, batch_size: int = 500):
+    # Same results as get_flight_for_search, fetched batch by batch with a server-side cursor
+    stmt, sub_chains = flight_search_stmt(session, departure_airport, arrival_airport, departure_date, direct_flights, id_class, exclude_sold_out)
+    if stmt is None:
+        return
+
+    for rows in session.execute(stmt.execution_options(yield_per=batch_size)).partitions():
+        yield _search_results(rows, sub_chains)
+
+TICKET_EXPORT_COLUMNS = [
+    "id_ticket", "sold_at", "price", "id_flight", "route_code", "scheduled_departure_day",
+    "scheduled_arrival_day", "id_aircraft", "id_seat", "class", "baggage_items",
+]
+
+def iter_airline_tickets_export(session: Session, airline_code: str, start_date=None, end_date=None, batch_size: int = 5000):
+    # Tickets of an airline sold between start_date and end_date, one row per ticket in
+    # TICKET_EXPORT_COLUMNS order, fetched batch by batch with a server-side cursor
+    baggage_items = (
+        select(func.coalesce(func.sum(Additional_baggage.count), 0))
+        .where(Additional_baggage.id_ticket == Ticket.id_ticket)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(
+            Ticket.id_ticket,
+            Ticket.created_at,
+            Ticket.price,
+            Flight.id_flight,
+            Flight.route_code,
+            Flight.scheduled_departure_day,
+            Flight.scheduled_arrival_day,
+            Flight.id_aircraft,
+            Ticket.id_seat,
+            Class_seat.name,
+            baggage_items,
         )
+        .join(Flight, Flight.id_flight == Ticket.id_flight)
+        .join(Route, Route.code == Flight.route_code)
+        .outerjoin(Cell, Cell.id_cell == Ticket.id_seat)
+        .outerjoin(Cabin, Cabin.id_cabin == Cell.id_cabin)
+        .outerjoin(Class_seat, Class_seat.id_class == Cabin.id_class)
+        .where(Route.airline_iata_code == airline_code)
+        .order_by(Ticket.id_ticket)
     )
+    if start_date is not None:
+        stmt = stmt.where(Ticket.created_at >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(Ticket.created_at < end_date + timedelta(days=1))
+
+    yield from session.execute(stmt.execution_options(yield_per=batch_size)).partitions()
+
+def get_cheapest_fares_by_day(session: Session, sub_chains: dict[str, list[dict]], date_from, date_to, id_class: int):
+    # `day` is the flight's scheduled day: the travelled sections depart day_offset days later
+    class_available = (
+        select(Cabin.id_cabin)
+        .where(Cabin.id_aircraft == Flight.id_aircraft, Cabin.id_class == id_class)
+        .exists()
+    )
+    day = func.date(Flight.scheduled_departure_day, type_=Date).label("day")
+    share = case({code: chain_share(chain) for code, chain in sub_chains.items()}, value=Route.code)
+    price = class_price(share, id_class)
+    codes_by_offset = defaultdict(list)
+    for code, chain in sub_chains.items():
+        codes_by_offset[chain[0]["day_offset"]].append(code)
+    in_window = or_(*(
+        and_(
+            Flight.route_code.in_(codes),
+            Flight.scheduled_departure_day >= date_from - timedelta(days=offset),
+            Flight.scheduled_departure_day < date_to + timedelta(days=1 - offset)
+        )
+        for offset, codes in codes_by_offset.items()
+    ))
 
-    flights_stmt = (
-        flights_stmt
-        .join(Aircraft_airline, Flight.id_aircraft == Aircraft_airline.id_aircraft_airline)
-        .join(Cabin, Aircraft_airline.id_aircraft_airline == Cabin.id_aircraft)
-        .where(Cabin.id_class == id_class)
-        .distinct()
+    stmt = (
+        select(
+            day,
+            Route.code.label("route_code"),
+            Route.airline_iata_code.label("airline_iata_code"),
+            func.min(price).label("flight_price"),
+            func.count(Flight.id_flight).label("flights")
+        )
+        .join(Route, Route.code == Flight.route_code)
+        .where(
+            in_window,
+            class_available
+        )
+        .group_by(day, Route.code, Route.airline_iata_code)
+        .order_by(day, func.min(price))
     )
+    return session.execute(stmt).all()
 
-    flights = session.execute(flights_stmt).scalars().all()
+def get_connections_for_search(session: Session, route_codes: set[str], departure_date, search_days: int, id_class: int, exclude_sold_out: bool = False) -> list[Connection]:
+    # Only flights of `route_codes` are loaded: route_index.routes_between() leaves out the
+    # routes no journey between the searched airports can use
+    if not route_codes:
+        return []
 
-    return flights
+    class_available = (
+        select(Cabin.id_cabin)
+        .where(Cabin.id_aircraft == Flight.id_aircraft, Cabin.id_class == id_class)
+        .exists()
+    )
 
-def get_flight_seat_blocks(session: Session, id_flight: int):
     stmt = (
         select(
-            Cabin.id_cabin.label("id_cabin"),
-            Cabin.id_class.label("id_class"),
-            func.count(Ticket.id_ticket).label("occupied_seats"),
-            func.json_agg(
-                func.json_build_object(
-                    "x", Cell.x,
-                    "y", Cell.y,
-                    "id_cell", Cell.id_cell
-                )
-            ).label("seats")
+            Flight.id_flight,
+            Flight.route_code,
+            Flight.scheduled_departure_day,
+            Route_detail.id_airline_routes,
+            Route_detail.departure_time,
+            Route_detail.arrival_time
         )
-        .select_from(Flight)
-        .join(Aircraft_airline, Aircraft_airline.id_aircraft_airline == Flight.id_aircraft)
-        .join(Cabin, Cabin.id_aircraft == Aircraft_airline.id_aircraft_airline)
-        .join(Cell, and_(Cell.id_cabin == Cabin.id_cabin, Cell.is_seat == true()))
-        .join(
-            Ticket,
-            and_(
-                Ticket.id_seat == Cell.id_cell,
-                Ticket.id_flight == Flight.id_flight
-            )
+        .join(Route_detail, Route_detail.code_route == Flight.route_code)
+        .where(
+            Flight.route_code.in_(route_codes),
+            # flights scheduled a few days earlier may still have sections departing on departure_date
+            Flight.scheduled_departure_day >= departure_date - timedelta(days=route_index.max_day_offset(session)),
+            Flight.scheduled_departure_day < departure_date + timedelta(days=search_days),
+            class_available
         )
-        .where(Flight.id_flight == id_flight)
-        .group_by(Cabin.id_cabin, Cabin.id_class)
-        .order_by(Cabin.id_cabin)
     )
 
-    results = session.execute(stmt).all()
+    if exclude_sold_out:
+        stmt = stmt.where(class_seat_available(id_class))
 
-    return [
-        {
-            "id_cabin": row.id_cabin,
-            "id_class": row.id_class,
-            "occupied_seats": row.occupied_seats,
-            "seats": row.seats or []
-        }
-        for row in results
-    ]
+    flights = {}
+    times = {}
+    for id_flight, route_code, departure_day, id_segment, dep_time, arr_time in session.execute(stmt).all():
+        flights[id_flight] = (route_code, departure_day)
+        times[id_segment] = (dep_time, arr_time)
+
+    connections = []
+    for id_flight, (route_code, departure_day) in flights.items():
+        chain = route_index.get_chain(session, route_code)
+        if chain:
+            connections.extend(build_flight_connections(id_flight, departure_day, chain, times))
 
-def get_aircraft_by_seat_id(session: Session, id_seat: int) -> int | None:
+    connections.sort(key=lambda c: (c.departure, c.arrival))
+    return connections
+
+def lock_flights(session: Session, flight_ids: list[int]):
+    # Row lock on each flight until the end of the transaction. Locks are taken in id order
+    # so two orders on the same flights cannot deadlock.
     stmt = (
-        select(Cabin.id_aircraft)
-        .join(Cell, Cell.id_cabin == Cabin.id_cabin)
-        .where(Cell.id_cell == id_seat)
+        select(Flight.id_flight)
+        .where(Flight.id_flight.in_(flight_ids))
+        .order_by(Flight.id_flight)
+        .with_for_update()
     )
-    return session.scalar(stmt)
+    return session.scalars(stmt).all()
 
-def get_class_from_seat(session: Session, id_seat: int) -> int | None:
+def get_sold_seat_counts(session: Session, flight_ids: list[int]) -> dict[int, int]:
+    # Answered from the uq_tickets_flight_seat index, without reading the tickets
     stmt = (
-        select(Cabin.id_class)
-        .join(Cell, Cell.id_cabin == Cabin.id_cabin)
-        .where(Cell.id_cell == id_seat)
+        select(Ticket.id_flight, func.count(Ticket.id_seat))
+        .where(Ticket.id_flight.in_(flight_ids))
+        .group_by(Ticket.id_flight)
+    )
+    return dict(session.execute(stmt).all())
+
+def get_occupied_seat_ids(session: Session, flight_ids: list[int]) -> dict[int, set[int]]:
+    stmt = (
+        select(Ticket.id_flight, Ticket.id_seat)
+        .where(Ticket.id_flight.in_(flight_ids))
+    )
+    occupied = defaultdict(set)
+    for id_flight, id_seat in session.execute(stmt).all():
+        occupied[id_flight].add(id_seat)
+    return occupied
+
+def get_flights_by_ids(session: Session, flight_ids: list[int]) -> dict[int, Flight]:
+    stmt = (
+        select(Flight)
+        .options(joinedload(Flight.route).joinedload(Route.airline))
+        .where(Flight.id_flight.in_(flight_ids))
+    )
+    return {flight.id_flight: flight for flight in session.scalars(stmt).all()}
+
+def get_flight_aircraft_ids(session: Session, flight_ids: list[int]) -> dict[int, int]:
+    stmt = select(Flight.id_flight, Flight.id_aircraft).where(Flight.id_flight.in_(flight_ids))
+    return dict(session.execute(stmt).all())
+
+def get_aircraft_layouts(session: Session, aircraft_ids: list[int]):
+    stmt = (
+        select(
+            Cabin.id_aircraft,
+            Cabin.id_cabin,
+            Cabin.id_class,
+            Cabin.rows,
+            Cabin.cols,
+            Cell.id_cell,
+            Cell.x,
+            Cell.y,
+            Cell.is_seat
+        )
+        .outerjoin(Cell, Cell.id_cabin == Cabin.id_cabin)
+        .where(Cabin.id_aircraft.in_(aircraft_ids))
+        .order_by(Cabin.id_cabin)
     )
-    return session.scalar(stmt)
+    return session.execute(stmt).all()
+
+def get_flight_seat_inventory(session: Session, flight_ids: list[int]) -> list[Flight_seat_inventory]:
+    stmt = select(Flight_seat_inventory).where(Flight_seat_inventory.id_flight.in_(flight_ids))
+    return session.scalars(stmt).all()
 
 def get_flights_by_user_id(session: Session, id_user: int):
     stmt = (
@@ -201,56 +389,107 @@ def get_flights_by_user_id(session: Session, id_user: int):
 def get_route_totals(session, route_code, start_date=None, end_date=None):
     stmt = (
         select(
-            func.count(Ticket.id_ticket).label("passengers"),
-            func.sum(Ticket.price).label("revenue")
+            func.sum(Route_revenue_daily.tickets).label("passengers"),
+            func.sum(Route_revenue_daily.revenue).label("revenue")
+        )
+        .where(
+            Route_revenue_daily.route_code == route_code,
+            Route_revenue_daily.basis == DEPARTURE,
+            *departure_day_filters(start_date, end_date, Route_revenue_daily.day)
         )
-        .join(Flight, Ticket.id_flight == Flight.id_flight)
-        .where(Flight.route_code == route_code)
     )
 
-    if start_date and end_date:
-        stmt = stmt.where(Flight.scheduled_departure_day.between(start_date, end_date))
-    elif start_date:
-        stmt = stmt.where(Flight.scheduled_departure_day >= start_date)
-    elif end_date:
-        stmt = stmt.where(Flight.scheduled_departure_day <= end_date)
-
     result = session.execute(stmt).first()
     return {"passengers": result.passengers or 0, "revenue": result.revenue or 0}
 
-def get_route_class_distribution(session, route_code, start_date=None, end_date=None):
-    stmt = (
-        select(Ticket.id_seat)
-        .join(Flight, Ticket.id_flight == Flight.id_flight)
-        .where(Flight.route_code == route_code)
-    )
-
+def departure_day_filters(start_date=None, end_date=None, column=Flight.scheduled_departure_day) -> list:
     if start_date and end_date:
-        stmt = stmt.where(Flight.scheduled_departure_day.between(start_date, end_date))
+        return [column.between(start_date, end_date)]
     elif start_date:
-        stmt = stmt.where(Flight.scheduled_departure_day >= start_date)
+        return [column >= start_date]
     elif end_date:
-        stmt = stmt.where(Flight.scheduled_departure_day <= end_date)
-
-    seat_ids = [row.id_seat for row in session.execute(stmt).all()]
-
-    class_ids = [get_class_from_seat(session,seat_id) for seat_id in seat_ids]
+        return [column <= end_date]
+    return []
 
-    class_names = []
-    for class_id in class_ids:
-        cls = session.get(Class_seat, class_id)
-        if cls:
-            class_names.append(cls.name)
-
-    total = len(class_names)
-    counter = Counter(class_names)
+def class_distribution(session, *filters):
+    # Tickets per class name, counted in one grouped query over Ticket -> Cell -> Cabin -> Class_seat
+    stmt = (
+        select(Class_seat.name, func.count(Ticket.id_ticket).label("passengers"))
+        .select_from(Ticket)
+        .join(Cell, Cell.id_cell == Ticket.id_seat)
+        .join(Cabin, Cabin.id_cabin == Cell.id_cabin)
+        .join(Class_seat, Class_seat.id_class == Cabin.id_class)
+        .where(*filters)
+        .group_by(Class_seat.name)
+        .order_by(Class_seat.name)
+    )
+    return _distribution(dict(session.execute(stmt).all()))
 
+def _distribution(passengers: dict) -> dict:
+    total = sum(passengers.values())
     distribution = {
         cls: round((count / total) * 100, 2)
-        for cls, count in counter.items()
+        for cls, count in passengers.items()
     } if total > 0 else {}
 
-    return distribution
+    return {"distribution": distribution, "passengers": passengers}
+
+def get_route_class_distribution(session, route_code, start_date=None, end_date=None):
+    stmt = (
+        select(Class_seat.name, func.sum(Route_revenue_daily.tickets).label("passengers"))
+        .join(Class_seat, Class_seat.id_class == Route_revenue_daily.id_class)
+        .where(
+            Route_revenue_daily.route_code == route_code,
+            Route_revenue_daily.basis == DEPARTURE,
+            *departure_day_filters(start_date, end_date, Route_revenue_daily.day)
+        )
+        .group_by(Class_seat.name)
+        .order_by(Class_seat.name)
+    )
+    return _distribution(dict(session.execute(stmt).all()))
+
+def get_revenue_by_departure_day(session, airline_code: str, route_code: str | None = None, start_date=None, end_date=None) -> dict:
+    # departure day -> (tickets, revenue), read from the rollup
+    stmt = (
+        select(
+            Route_revenue_daily.day,
+            func.sum(Route_revenue_daily.tickets),
+            func.sum(Route_revenue_daily.revenue)
+        )
+        .join(Route, Route.code == Route_revenue_daily.route_code)
+        .where(
+            Route.airline_iata_code == airline_code,
+            Route_revenue_daily.basis == DEPARTURE,
+            *departure_day_filters(start_date, end_date, Route_revenue_daily.day)
+        )
+        .group_by(Route_revenue_daily.day)
+    )
+    if route_code is not None:
+        stmt = stmt.where(Route_revenue_daily.route_code == route_code)
+    return {day: (tickets, revenue) for day, tickets, revenue in session.execute(stmt).all()}
+
+def get_capacity_by_departure_day(session, airline_code: str, route_code: str | None = None, start_date=None, end_date=None) -> dict:
+    # departure day -> (flights, seats). Seats are counted once per aircraft in a subquery
+    # and then summed over the flights flown by each aircraft.
+    seats = (
+        select(Cabin.id_aircraft, func.count(Cell.id_cell).label("seats"))
+        .join(Cell, Cell.id_cabin == Cabin.id_cabin)
+        .join(Aircraft_airline, Aircraft_airline.id_aircraft_airline == Cabin.id_aircraft)
+        .where(Aircraft_airline.airline_code == airline_code, Cell.is_seat == True)
+        .group_by(Cabin.id_aircraft)
+        .subquery()
+    )
+    day = func.date(Flight.scheduled_departure_day, type_=Date)
+    stmt = (
+        select(day, func.count(Flight.id_flight), func.coalesce(func.sum(seats.c.seats), 0))
+        .join(Route, Route.code == Flight.route_code)
+        .outerjoin(seats, seats.c.id_aircraft == Flight.id_aircraft)
+        .where(Route.airline_iata_code == airline_code, *departure_day_filters(start_date, end_date, day))
+        .group_by(day)
+    )
+    if route_code is not None:
+        stmt = stmt.where(Flight.route_code == route_code)
+    return {day: (flights, seats) for day, flights, seats in session.execute(stmt).all()}
 
 def get_flight_totals(session, id_flight: int):
     stmt = (
@@ -267,24 +506,7 @@ def get_flight_totals(session, id_flight: int):
     }
 
 def get_flight_class_distribution(session, id_flight: int):
-    stmt = select(Ticket.id_seat).where(Ticket.id_flight == id_flight)
-    seat_ids = [row.id_seat for row in session.execute(stmt).all()]
-
-    class_names = []
-    for seat_id in seat_ids:
-        class_id = get_class_from_seat(session,seat_id)
-        cls = session.get(Class_seat, class_id)
-        if cls:
-            class_names.append(cls.name)
-
-    total = len(class_names)
-    counter = Counter(class_names)
-    distribution = {
-        cls: round((count / total) * 100, 2)
-        for cls, count in counter.items()
-    } if total > 0 else {}
-
-    return distribution
+    return class_distribution(session, Ticket.id_flight == id_flight)
 
 
 def get_flights_by_airline(session, airline_code: str):
@@ -2,7 +2,11 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 from ..models.passenger import Passenger
 
-def get_passenger_id_by_email(session: Session, email: str) -> int | None:
-    stmt = select(Passenger.id_passengers).where(Passenger.email == email)
-    result = session.scalar(stmt)
-    return result
\ No newline at end of file
+def get_passenger_ids_by_emails(session: Session, emails: list[str]) -> dict[str, int]:
+    stmt = (
+        select(Passenger.email, Passenger.id_passengers)
+        .where(Passenger.email.in_(emails))
+        .order_by(Passenger.id_passengers.desc())
+    )
+    # later rows overwrite earlier ones, so a repeated email resolves to its oldest passenger
+    return {email: id_passenger for email, id_passenger in session.execute(stmt).all()}
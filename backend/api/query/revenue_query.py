@@ -0,0 +1,69 @@
+from sqlalchemy import select, delete, insert, func, Date, literal, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from ..models.route_revenue_daily import Route_revenue_daily
+from ..models.ticket import Ticket
+from ..models.flight import Flight
+from ..models.cell import Cell
+from ..models.cabin import Cabin
+
+SALE = "sale"
+DEPARTURE = "departure"
+
+def add_revenue(session: Session, rows: list[dict]):
+    # rows: basis, route_code, day, id_class, tickets, revenue. Added to the rollup in one upsert.
+    if not rows:
+        return
+    dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(Route_revenue_daily)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            Route_revenue_daily.basis,
+            Route_revenue_daily.route_code,
+            Route_revenue_daily.day,
+            Route_revenue_daily.id_class,
+        ],
+        set_={
+            "tickets": Route_revenue_daily.tickets + stmt.excluded.tickets,
+            "revenue": Route_revenue_daily.revenue + stmt.excluded.revenue,
+        }
+    )
+    session.execute(stmt, rows)
+
+def rebuild_revenue_rollups(session: Session) -> int:
+    # Recomputes the whole rollup from the tickets. On PostgreSQL the table lock waits for
+    # bookings already counted in the rollup to commit and holds back new ones until the rebuild
+    # commits, so every ticket is counted exactly once.
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(text("LOCK TABLE route_revenue_daily IN EXCLUSIVE MODE"))
+    session.execute(delete(Route_revenue_daily))
+
+    id_class = func.coalesce(Cabin.id_class, 0)
+    days = {
+        SALE: func.date(Ticket.created_at, type_=Date),
+        DEPARTURE: func.date(Flight.scheduled_departure_day, type_=Date),
+    }
+    inserted = 0
+    for basis, day in days.items():
+        stmt = (
+            select(
+                literal(basis),
+                Flight.route_code,
+                day,
+                id_class,
+                func.count(Ticket.id_ticket),
+                func.coalesce(func.sum(Ticket.price), 0)
+            )
+            .select_from(Ticket)
+            .join(Flight, Flight.id_flight == Ticket.id_flight)
+            .outerjoin(Cell, Cell.id_cell == Ticket.id_seat)
+            .outerjoin(Cabin, Cabin.id_cabin == Cell.id_cabin)
+            .group_by(Flight.route_code, day, id_class)
+        )
+        result = session.execute(
+            insert(Route_revenue_daily).from_select(
+                ["basis", "route_code", "day", "id_class", "tickets", "revenue"], stmt
+            )
+        )
+        inserted += result.rowcount
+    return inserted
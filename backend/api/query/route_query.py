@@ -1,13 +1,16 @@
 from collections import defaultdict
 from datetime import datetime, timedelta, time
 from sqlalchemy import select, and_, func
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import aliased, joinedload
 from flask_sqlalchemy.session import Session
 from ..models.route_section import Route_section
+from ..models.airport import Airport
 from ..models.route import Route
 from ..models.route_detail import Route_detail
 from ..models.ticket import Ticket
 from ..models.flight import Flight
+from ..models.route_revenue_daily import Route_revenue_daily
+from .revenue_query import SALE
 
 def get_all_routes(session: Session):
     stmt = select(Route_section)
@@ -104,6 +107,33 @@ def find_reverse_route(session: Session, code: str)-> str | None:
 
     return reverse_route
 
+def get_route_chain_segments(session: Session):
+    departure = aliased(Airport)
+    arrival = aliased(Airport)
+    stmt = (
+        select(
+            Route_detail.code_route,
+            Route_detail.id_airline_routes,
+            Route_detail.id_next,
+            Route_section.code_departure_airport,
+            Route_section.code_arrival_airport,
+            Route_detail.departure_time,
+            Route_detail.arrival_time,
+            departure.latitude,
+            departure.longitude,
+            arrival.latitude,
+            arrival.longitude
+        )
+        .join(Route_section, Route_detail.id_route_section == Route_section.id_routes_section)
+        .outerjoin(departure, departure.iata_code == Route_section.code_departure_airport)
+        .outerjoin(arrival, arrival.iata_code == Route_section.code_arrival_airport)
+    )
+    return session.execute(stmt).all()
+
+def get_route_detail_signature(session: Session) -> tuple:
+    # Changes whenever a Route_detail row is added or removed: ids are never reused
+    return tuple(session.execute(select(func.count(Route_detail.id_airline_routes), func.max(Route_detail.id_airline_routes))).one())
+
 def get_all_route_airline(session: Session, airline_code: str):
     stmt = (
         select(
@@ -231,18 +261,20 @@ def get_routes_analytics(session, airline_code: str, start_date):
     stmt = (
         select(
             Route.code.label("route_code"),
-            func.count(Ticket.id_ticket).label("total_tickets"),
-            func.coalesce(func.sum(Ticket.price), 0).label("total_revenue"),
+            func.coalesce(func.sum(Route_revenue_daily.tickets), 0).label("total_tickets"),
+            func.coalesce(func.sum(Route_revenue_daily.revenue), 0).label("total_revenue"),
+        )
+        .outerjoin(
+            Route_revenue_daily,
+            and_(Route_revenue_daily.route_code == Route.code, Route_revenue_daily.basis == SALE)
         )
-        .outerjoin(Flight, Flight.route_code == Route.code)
-        .outerjoin(Ticket, Ticket.id_flight == Flight.id_flight)
         .where(Route.airline_iata_code == airline_code)
         .group_by(Route.code)
         .order_by(Route.code)
     )
 
     if start_date is not None:
-        stmt = stmt.where(Ticket.created_at >= start_date)
+        stmt = stmt.where(Route_revenue_daily.day >= start_date)
 
     results = session.execute(stmt).all()
 
@@ -257,16 +289,15 @@ def get_routes_analytics(session, airline_code: str, start_date):
 
 def get_total_revenue_by_airline_and_date(session: Session, airline_iata_code: str, start_date: datetime) -> int:
     stmt = (
-        select(func.coalesce(func.sum(Ticket.price), 0).label("total_revenue"))
-        .join(Ticket.flight)
-        .join(Flight.route)
-        .where(Route.airline_iata_code == airline_iata_code)
+        select(func.coalesce(func.sum(Route_revenue_daily.revenue), 0).label("total_revenue"))
+        .join(Route, Route.code == Route_revenue_daily.route_code)
+        .where(Route.airline_iata_code == airline_iata_code, Route_revenue_daily.basis == SALE)
     )
 
     if start_date is not None:
-        stmt = stmt.where(Ticket.created_at >= start_date)
+        stmt = stmt.where(Route_revenue_daily.day >= start_date)
 
-    stmt = stmt.where(Ticket.created_at <= func.now())
+    stmt = stmt.where(Route_revenue_daily.day <= datetime.utcnow().date())
 
     result = session.execute(stmt).scalar_one()
     return result
@@ -0,0 +1,35 @@
+from datetime import datetime
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from ..models.seat_hold import Seat_hold
+
+def delete_expired_seat_holds(session: Session, now: datetime, id_flight: int | None = None, seat_ids: list[int] | None = None) -> int:
+    stmt = delete(Seat_hold).where(Seat_hold.expires_at <= now)
+    if id_flight is not None:
+        stmt = stmt.where(Seat_hold.id_flight == id_flight, Seat_hold.id_seat.in_(seat_ids))
+    return session.execute(stmt).rowcount
+
+def delete_seat_hold(session: Session, id_hold: str) -> int:
+    stmt = delete(Seat_hold).where(Seat_hold.id_hold == id_hold)
+    return session.execute(stmt).rowcount
+
+def insert_seat_holds(session: Session, rows: list[dict]):
+    session.execute(insert(Seat_hold), rows)
+
+def get_seat_hold_rows(session: Session, id_hold: str, now: datetime) -> list[Seat_hold]:
+    stmt = (
+        select(Seat_hold)
+        .where(Seat_hold.id_hold == id_hold, Seat_hold.expires_at > now)
+        .order_by(Seat_hold.id_seat)
+    )
+    return session.scalars(stmt).all()
+
+def get_held_seat_ids(session: Session, flight_ids: list[int], now: datetime, seat_ids: list[int] | None = None):
+    # (id_flight, id_seat, id_user) of the unexpired holds on the given flights
+    stmt = (
+        select(Seat_hold.id_flight, Seat_hold.id_seat, Seat_hold.id_user)
+        .where(Seat_hold.id_flight.in_(flight_ids), Seat_hold.expires_at > now)
+    )
+    if seat_ids is not None:
+        stmt = stmt.where(Seat_hold.id_seat.in_(seat_ids))
+    return session.execute(stmt).all()
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, current_app, stream_with_context
 from pydantic import ValidationError
 from db import SessionLocal
 
@@ -6,9 +6,12 @@ from ..models import Route
 from ..models.aircraft_airlines import Aircraft_airline
 from ..models.airline import Airline
 from ..query.flight_query import get_flights_by_airline
-from ..query.airline_query import all_airline, get_aircraft_seat_map_JSON, number_seat_aircraft,get_max_economy_seats, get_airline_class_price_policy, get_airline_price_policy
+from ..query.airline_query import all_airline, get_aircraft_seat_map_JSON, get_aircraft_seat_map_compact, number_seat_aircraft,get_max_economy_seats, get_airline_class_price_policy, get_airline_price_policy
 from ..query.route_query import get_all_route_airline, get_route, get_routes_analytics, get_total_revenue_by_airline_and_date
 from ..utils.role_checking import role_required, airline_check_param, airline_check_body
+from ..utils.seat_map_cache import seat_map_cache
+from ..utils.csv_export import gzip_csv
+from ..query.flight_query import TICKET_EXPORT_COLUMNS
 from ..validations.airline_validation import *
 from ..controllers.airline_controller import Airline_controller
 
@@ -553,6 +556,15 @@ def get_seat_map(airline_code: str, id_aircraft_airline: int):
               - `x`: Column index
               - `y`: Row index
 
+          **Compact format** (`format=compact`): each block has no `cells`; instead
+          - `seats`: one string per row, `1` for a seat and `0` for an aisle, indexed by `x`
+          - `base_cell`, `stride`: the cell at (`x`, `y`) has `id_cell = base_cell + y * stride + x`
+          - `cell_ids`: sent instead of `base_cell`/`stride` when the block's ids are not consecutive,
+            the ids row by row (`null` where there is no cell)
+
+          The seat map is cached until the aircraft's blocks change and is sent with a strong
+          `ETag`. Send it back in `If-None-Match` to get `304 Not Modified` when it is unchanged.
+
 
         parameters:
           - name: airline_code
@@ -569,12 +581,30 @@ def get_seat_map(airline_code: str, id_aircraft_airline: int):
             description: ID of the aircraft in the airline's fleet
             example: 3
 
+          - name: format
+            in: query
+            type: string
+            enum: ["full", "compact"]
+            default: "full"
+            required: false
+            description: "`compact` returns row strings instead of one object per cell"
+
+          - name: If-None-Match
+            in: header
+            type: string
+            required: false
+            description: ETag of a seat map already held by the client
+
         security:
           - Bearer: []
 
         responses:
           200:
             description: Seat map successfully retrieved
+            headers:
+              ETag:
+                type: string
+                description: Strong validator of the seat map
             schema:
               type: object
               properties:
@@ -622,6 +652,9 @@ def get_seat_map(airline_code: str, id_aircraft_airline: int):
                               type: integer
                               example: 0
 
+          304:
+            description: Seat map unchanged since the ETag sent in If-None-Match
+
           401:
             description: Missing or invalid JWT token
 
@@ -632,16 +665,34 @@ def get_seat_map(airline_code: str, id_aircraft_airline: int):
             description: Aircraft or airline not found
 
         """
-    session = SessionLocal()
-    if (session.get(Aircraft_airline, id_aircraft_airline) is None):
-            return jsonify({"message": "id_aircraft_airline not found"}), 404
-    else:
-            seat_map = get_aircraft_seat_map_JSON(session, id_aircraft_airline)
+    seat_map_format = request.args.get("format", "full")
+    if seat_map_format not in ("full", "compact"):
+        return jsonify({"message": "format must be full or compact"}), 400
+
+    cached = seat_map_cache.get(id_aircraft_airline, seat_map_format)
+    if cached is None:
+        session = SessionLocal()
+        try:
+            if (session.get(Aircraft_airline, id_aircraft_airline) is None):
+                return jsonify({"message": "id_aircraft_airline not found"}), 404
+            generation = seat_map_cache.generation
+            if seat_map_format == "compact":
+                seat_map = get_aircraft_seat_map_compact(session, id_aircraft_airline)
+            else:
+                seat_map = get_aircraft_seat_map_JSON(session, id_aircraft_airline)
             seats_number = number_seat_aircraft(session, id_aircraft_airline)
             seats_remaining = get_max_economy_seats(session, id_aircraft_airline) - seats_number
+            body = current_app.json.dumps(
+                {"additional_seats_remaining": seats_remaining, "seats_number": seats_number, "seat_map": seat_map}).encode()
+            cached = seat_map_cache.put(id_aircraft_airline, seat_map_format, body, generation)
+        finally:
             session.close()
-            return jsonify(
-                    {"additional_seats_remaining": seats_remaining, "seats_number": seats_number, "seat_map": seat_map}), 200
+
+    body, etag = cached
+    response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
 
 
 @airline_bp.route("/aircraft/clone-seatmap", methods=["POST"])
@@ -652,19 +703,19 @@ def clone_seatmap():
     ---
     tags:
       - Airline
-    summary: Copy seat blocks and positions from a source aircraft to a target aircraft
+    summary: Copy seat blocks and positions from a source aircraft to one or more target aircraft
     description: |
       Copies the seat map configuration from a source aircraft (A) to a target aircraft (B) 
-      for the same airline.
+      for the same airline. Pass `target_ids` to copy it to many aircraft at once, in a single transaction.
 
       **Authorization required:** Bearer JWT Token  
       **Allowed roles:** Airline-Admin
 
       **Important notes:**
       1. If the target aircraft already has a seat map configuration, it will be deleted and replaced with the source's seat map.
-      2. This operation may take some time because the database does not have indices yet.  
-         Example: deleting 150 records took 12.24 sec.
-      3. Ensure `source_id` and `target_id` are valid aircraft IDs in the same airline.
+      2. The copy runs inside the database, its time does not grow with round trips per cell or per target.
+      3. Ensure `source_id` and `target_id`/`target_ids` are valid aircraft IDs in the same airline.
+      4. If any target is invalid nothing is copied.
 
     parameters:
       - name: body
@@ -676,7 +727,6 @@ def clone_seatmap():
           required:
             - airline_code
             - source_id
-            - target_id
           properties:
             airline_code:
               type: string
@@ -689,6 +739,12 @@ def clone_seatmap():
               type: integer
               description: ID of the target aircraft (to copy to)
               example: 3
+            target_ids:
+              type: array
+              description: IDs of several target aircraft (to copy to)
+              items:
+                type: integer
+              example: [3, 5, 6]
 
     security:
       - Bearer: []
@@ -725,7 +781,7 @@ def clone_seatmap():
     try:
         with session.begin():
             controller = Airline_controller(session)
-            response, status = controller.clone_aircraft_seat_map(data.source_id, data.target_id)
+            response, status = controller.clone_aircraft_seat_map(data.source_id, data.target_ids)
     except Exception as e:
         response, status = {"message": str(e)}, 500
     finally:
@@ -1925,6 +1981,14 @@ def route_analytics(airline_code: str ,code: str):
                   example:
                     Economy: 50.0
                     First: 50.0
+                class_passengers:
+                  type: object
+                  description: Number of tickets sold per class
+                  additionalProperties:
+                    type: integer
+                  example:
+                    Economy: 12
+                    First: 12
 
       401:
         description: Missing or invalid token
@@ -2016,6 +2080,14 @@ def flight_analytics(airline_code: str,id_flight: int):
                   example:
                     Economy: 50.0
                     First: 50.0
+                class_passengers:
+                  type: object
+                  description: Number of tickets sold per class
+                  additionalProperties:
+                    type: integer
+                  example:
+                    Economy: 12
+                    First: 12
 
       401:
         description: Missing or invalid token
@@ -2031,6 +2103,413 @@ def flight_analytics(airline_code: str,id_flight: int):
     session.close()
     return jsonify(response), status
 
+@airline_bp.route("/<airline_code>/analytics/series", methods=["GET"])
+#@airline_check_param("airline_code")
+def analytics_series(airline_code: str):
+    """
+    Airline analytics time series
+    ---
+    tags:
+      - Airline
+    summary: Retrieve revenue, tickets and load factor per day, week or month
+    description: >
+      Returns, for each period, the tickets sold, the revenue, the flights flown, the seats offered and the
+      load factor of the flights of an airline, or of one of its routes, departing in that period.
+
+      Periods are days, ISO weeks starting on Monday, or months. Periods without flights or tickets are omitted.
+
+      **Authorization required:** Bearer JWT Token
+      **Allowed roles:** Airline-Admin
+
+    security:
+      - Bearer: []
+
+    parameters:
+      - name: airline_code
+        in: path
+        required: true
+        schema:
+          type: string
+        description: IATA code of the airline (e.g., "AZ")
+      - name: granularity
+        in: query
+        required: false
+        schema:
+          type: string
+          enum: [day, week, month]
+          default: day
+        description: Length of each period
+      - name: route_code
+        in: query
+        required: false
+        schema:
+          type: string
+        description: Only the flights of this route (e.g., "AZ5")
+      - name: start_date
+        in: query
+        required: false
+        schema:
+          type: string
+          format: date
+        description: First departure day included (YYYY-MM-DD)
+      - name: end_date
+        in: query
+        required: false
+        schema:
+          type: string
+          format: date
+        description: Last departure day included (YYYY-MM-DD)
+
+    responses:
+      200:
+        description: Series retrieved successfully
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                airline_code:
+                  type: string
+                  example: "AZ"
+                route_code:
+                  type: string
+                  nullable: true
+                  example: "AZ5"
+                granularity:
+                  type: string
+                  example: "week"
+                series:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      period:
+                        type: string
+                        format: date
+                        description: First day of the period
+                        example: "2025-08-11"
+                      tickets:
+                        type: integer
+                        example: 120
+                      revenue:
+                        type: number
+                        format: float
+                        example: 18000.0
+                      flights:
+                        type: integer
+                        example: 2
+                      seats:
+                        type: integer
+                        description: Seats offered by the flights of the period
+                        example: 360
+                      load_factor:
+                        type: number
+                        format: float
+                        nullable: true
+                        description: Percentage of the seats offered that were sold
+                        example: 33.33
+      400:
+        description: Invalid query parameters
+      401:
+        description: Missing or invalid token
+      403:
+        description: Airline-Admin role required
+      404:
+        description: Route not found
+
+    """
+    try:
+        query_params = request.args.to_dict()
+        data = Analytics_series_schema(**query_params)
+    except ValidationError as e:
+        return jsonify({"message": str(e)}), 400
+    session = SessionLocal()
+    controller = Airline_controller(session)
+    response, status = controller.get_analytics_series(airline_code, data.model_dump())
+    session.close()
+    return jsonify(response), status
+
+@airline_bp.route("/<airline_code>/analytics/reports", methods=["POST"])
+#@airline_check_param("airline_code")
+def submit_analytics_report(airline_code: str):
+    """
+    Submit an analytics report job
+    ---
+    tags:
+      - Airline
+    summary: Generate an analytics report in the background
+    description: >
+      Queues an analytics report and returns its job immediately. Poll `GET /<airline_code>/analytics/reports/<id_job>`
+      until its status is `done` (or `failed`) to read the result.
+
+      `report` selects the analytics endpoint whose response is produced: `series` (/analytics/series),
+      `route` (/analytics/route/<route_code>), `routes` (/analytics/routes) or `total_revenue` (/analytics/routes/total_revenue).
+
+      Submitting the same report while it is running, or while its result is still cached, returns the existing job.
+
+      **Authorization required:** Bearer JWT Token
+      **Allowed roles:** Airline-Admin
+
+    security:
+      - Bearer: []
+
+    parameters:
+      - name: airline_code
+        in: path
+        required: true
+        schema:
+          type: string
+        description: IATA code of the airline (e.g., "AZ")
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - report
+          properties:
+            report:
+              type: string
+              enum: [series, route, routes, total_revenue]
+              example: "series"
+            granularity:
+              type: string
+              enum: [day, week, month]
+              default: day
+              description: Only used by `series` reports
+            route_code:
+              type: string
+              description: Required by `route` reports, optional for `series` reports
+              example: "AZ5"
+            start_date:
+              type: string
+              format: date
+              example: "2025-01-01"
+            end_date:
+              type: string
+              format: date
+              description: Only used by `series` and `route` reports
+              example: "2025-12-31"
+
+    responses:
+      202:
+        description: Report job queued, running or already finished
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                id_job:
+                  type: string
+                  example: "3f2b9c0e8a7d4e5f9b1c2d3e4f5a6b7c"
+                status:
+                  type: string
+                  enum: [queued, running, done, failed]
+                  example: "queued"
+                report:
+                  type: object
+                  description: The submitted report spec
+                created_at:
+                  type: string
+                  format: date-time
+                finished_at:
+                  type: string
+                  format: date-time
+                  nullable: true
+      400:
+        description: Invalid report spec
+      401:
+        description: Missing or invalid token
+      403:
+        description: Airline-Admin role required
+      404:
+        description: Route not found
+      503:
+        description: Too many reports are queued
+
+    """
+    try:
+        data = Report_job_schema(**request.get_json())
+    except ValidationError as e:
+        return jsonify({"message": str(e)}), 400
+    session = SessionLocal()
+    controller = Airline_controller(session)
+    response, status = controller.submit_report(airline_code, data.model_dump(), SessionLocal)
+    session.close()
+    return jsonify(response), status
+
+@airline_bp.route("/<airline_code>/analytics/reports/<id_job>", methods=["GET"])
+#@airline_check_param("airline_code")
+def get_analytics_report(airline_code: str, id_job: str):
+    """
+    Get an analytics report job
+    ---
+    tags:
+      - Airline
+    summary: Retrieve the status and result of an analytics report job
+    description: >
+      Returns the job with its status. Once the status is `done` or `failed`, `status_code` and `result` hold the
+      status and body the matching analytics endpoint would have returned.
+
+      Finished reports are kept for a limited time (REPORT_RESULT_TTL seconds) and then return 404.
+
+      **Authorization required:** Bearer JWT Token
+      **Allowed roles:** Airline-Admin
+
+    security:
+      - Bearer: []
+
+    parameters:
+      - name: airline_code
+        in: path
+        required: true
+        schema:
+          type: string
+        description: IATA code of the airline (e.g., "AZ")
+      - name: id_job
+        in: path
+        required: true
+        schema:
+          type: string
+        description: Report job ID
+
+    responses:
+      200:
+        description: Report job retrieved successfully
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                id_job:
+                  type: string
+                status:
+                  type: string
+                  enum: [queued, running, done, failed]
+                report:
+                  type: object
+                created_at:
+                  type: string
+                  format: date-time
+                finished_at:
+                  type: string
+                  format: date-time
+                  nullable: true
+                status_code:
+                  type: integer
+                  example: 200
+                result:
+                  type: object
+      401:
+        description: Missing or invalid token
+      403:
+        description: Airline-Admin role required
+      404:
+        description: Report not found or expired
+
+    """
+    session = SessionLocal()
+    controller = Airline_controller(session)
+    response, status = controller.get_report(airline_code, id_job)
+    session.close()
+    return jsonify(response), status
+
+@airline_bp.route("/<airline_code>/tickets/export", methods=["GET"])
+#@airline_check_param("airline_code")
+def export_airline_tickets(airline_code: str):
+    """
+    Export airline tickets
+    ---
+    tags:
+      - Airline
+    summary: Stream all tickets of an airline as a gzip-compressed CSV
+    description: >
+      Streams every ticket sold for the airline's flights, one CSV row per ticket with its flight, route,
+      seat class and number of additional baggage items, compressed with gzip (`tickets-<airline_code>.csv.gz`).
+
+      Tickets are read in batches with a server-side cursor and compressed as they are written, so memory use does not
+      grow with the number of tickets. Rows are ordered by `id_ticket`.
+
+      Columns: id_ticket, sold_at, price, id_flight, route_code, scheduled_departure_day, scheduled_arrival_day,
+      id_aircraft, id_seat, class, baggage_items.
+
+      **Authorization required:** Bearer JWT Token
+      **Allowed roles:** Airline-Admin
+
+    security:
+      - Bearer: []
+
+    produces:
+      - application/gzip
+
+    parameters:
+      - name: airline_code
+        in: path
+        required: true
+        schema:
+          type: string
+        description: IATA code of the airline (e.g., "AZ")
+      - name: start_date
+        in: query
+        required: false
+        schema:
+          type: string
+          format: date
+        description: Only tickets sold on or after this day (YYYY-MM-DD)
+      - name: end_date
+        in: query
+        required: false
+        schema:
+          type: string
+          format: date
+        description: Only tickets sold on or before this day (YYYY-MM-DD)
+
+    responses:
+      200:
+        description: Gzip-compressed CSV of the tickets
+      400:
+        description: Invalid query parameters
+      401:
+        description: Missing or invalid token
+      403:
+        description: Airline-Admin role required
+      404:
+        description: Airline not found
+
+    """
+    try:
+        query_params = request.args.to_dict()
+        data = Ticket_export_schema(**query_params)
+    except ValidationError as e:
+        return jsonify({"message": str(e)}), 400
+
+    session = SessionLocal()
+    if session.get(Airline, airline_code) is None:
+        session.close()
+        return jsonify({"message": "airline not found"}), 404
+
+    controller = Airline_controller(session)
+    logger = current_app.logger
+
+    def generate():
+        stats = {}
+        try:
+            yield from gzip_csv(
+                TICKET_EXPORT_COLUMNS,
+                controller.stream_tickets_export(airline_code, data.start_date, data.end_date),
+                stats,
+            )
+        finally:
+            session.close()
+            logger.info(
+                "ticket export %s: %d rows in %.2fs (%.0f rows/s)",
+                airline_code, stats.get("rows", 0), stats.get("seconds", 0), stats.get("rows_per_second", 0)
+            )
+
+    response = current_app.response_class(stream_with_context(generate()), mimetype="application/gzip")
+    response.headers["Content-Disposition"] = f'attachment; filename="tickets-{airline_code}.csv.gz"'
+    return response
+
 @airline_bp.route("/<airline_code>/analytics/routes", methods=["GET"])
 #@airline_check_param("airline_code")
 def get_all_routes_analytics(airline_code: str):
@@ -1,9 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
 from pydantic import ValidationError
-from ..validations.flight_validation import Flight_search_schema, Ticket_reservation_schema
+from ..validations.flight_validation import Flight_search_schema, Flexible_search_schema, Ticket_reservation_schema, Seat_hold_schema, Seat_hold_release_schema
 from ..controllers.flight_controller import Flight_controller
 from ..models.flight import Flight
-from ..query.flight_query import get_flight_seat_blocks
+from ..utils.seat_inventory import Seat_inventory, Seat_conflict_error
+from ..utils.search_cache import search_cache
+from ..utils.seat_holds import seat_hold_store
+from ..utils.idempotency import request_hash
 from db import SessionLocal
 
 
@@ -20,16 +23,36 @@ tags:
 summary: Search for available flights
 description: |
   Performs a search for available flights based on origin, destination, travel dates, and other filters.
-  Works similarly to Skyscanner but without interline (multi-airline graph-based) search.
+  Works similarly to Skyscanner; set `connections = true` for interline (multi-airline graph-based) search.
 
   ### Important Notes
   - If `round_trip_flight = false`, then `departure_date_return` **must be null**.
-  - If `direct_flights = true`, only routes with **one section** will be returned.
-  - Multi-section routes (e.g., `FCO → JFK → MIA`) are treated as a **single block**:
-      - Searching for `FCO → JFK` or `JFK → MIA` **will NOT** return that flight.
+  - If `direct_flights = true`, only non-stop sections will be returned.
+  - Multi-section routes (e.g., `FCO → JFK → MIA`) match on any contiguous part of the route:
+      - Searching for `FCO → JFK` or `JFK → MIA` **will** return that flight.
+      - `sections` only contains the sections travelled between the two airports.
+      - `departure_date` is the day the first travelled section departs, which is later than
+        `scheduled_departure_day` when the flight crosses midnight before reaching it.
+      - `flight_price` charges the travelled sections' share of the route's distance; pass
+        their ids as `sections` when booking to be charged the same.
+      - With `direct_flights = true`, only a single section of a route is matched.
   - If the aircraft does not have a seat configuration for the class `id_class`,  
     the flight will not appear in results. 
-  - Interline search is **not implemented**.
+  - If `connections = true`, itineraries may combine flights of different routes and airlines:
+      - Each itinerary is Pareto-optimal on arrival time and number of legs (at most `max_legs`).
+      - Between two legs there are at least `MIN_CONNECTION_MINUTES` (default 60).
+      - `connections` and `direct_flights` cannot both be true.
+  - Every flight reports `seats_available`, the free seats per `id_class`.
+    If `exclude_sold_out = true`, flights with no free seat in `id_class` are not returned.
+    Results can be cached for a few minutes, so seat counts are indicative and a flight sold out
+    in the meantime may still be listed; bookings always check the seats again.
+  - Flights are sorted by departure time, then price.
+  - Pagination: with `limit`, at most `limit` flights per leg are returned together with
+    `outbound_next_cursor` (and `return_next_cursor` for round trips).
+    Pass them back as `outbound_cursor` / `return_cursor` to get the next page; `null` means last page.
+  - If `stream = true`, the response is JSON lines (`application/x-ndjson`), one result per line:
+    `{"leg": "outbound" | "return", "flight": {...}}` (or `"itinerary"` with `connections = true`).
+    `limit` and cursors are ignored when streaming.
 
 parameters:
   - in: query
@@ -68,6 +91,39 @@ parameters:
     required: true
     type: integer
     example: 4
+  - in: query
+    name: connections
+    required: false
+    type: boolean
+    example: false
+  - in: query
+    name: max_legs
+    required: false
+    type: integer
+    example: 3
+  - in: query
+    name: exclude_sold_out
+    required: false
+    type: boolean
+    example: false
+  - in: query
+    name: limit
+    required: false
+    type: integer
+    example: 50
+  - in: query
+    name: outbound_cursor
+    required: false
+    type: string
+  - in: query
+    name: return_cursor
+    required: false
+    type: string
+  - in: query
+    name: stream
+    required: false
+    type: boolean
+    example: false
 
 responses:
   200:
@@ -90,12 +146,19 @@ responses:
               price:
                 type: number
                 nullable: true
+              seats_available:
+                type: object
+                description: Free seats per id_class
+                example: {"1": 120, "4": 12}
               route_code:
                 type: string
               scheduled_arrival_day:
                 type: string
               scheduled_departure_day:
                 type: string
+              departure_date:
+                type: string
+                description: Day the first travelled section departs
               sections:
                 type: array
                 description: Ordered segments of the route
@@ -175,10 +238,48 @@ responses:
         args = request.args.to_dict()
         args["round_trip_flight"] = args.get("round_trip_flight", "false").lower() == "true"
         args["direct_flights"] = args.get("direct_flights", "false").lower() == "true"
-        args["id_class"] = int(args.get("id_class", 4))
+        args.setdefault("id_class", 4)
+        args["connections"] = args.get("connections", "false").lower() == "true"
+        args["exclude_sold_out"] = args.get("exclude_sold_out", "false").lower() == "true"
+        args["stream"] = args.get("stream", "false").lower() == "true"
         data = Flight_search_schema(**args)
     except ValidationError as e:
         return jsonify({"message": str(e)}), 400
+
+    if data.stream:
+        controller = Flight_controller(session)
+        error = controller.check_airports(data.departure_airport, data.arrival_airport)
+        if error:
+            session.close()
+            return jsonify(error[0]), error[1]
+
+        def generate():
+            try:
+                for line in controller.stream_flights(
+                    data.departure_airport,
+                    data.arrival_airport,
+                    data.round_trip_flight,
+                    data.direct_flights,
+                    data.departure_date_outbound,
+                    data.departure_date_return,
+                    data.id_class,
+                    data.connections,
+                    data.max_legs,
+                    data.exclude_sold_out,
+                ):
+                    yield current_app.json.dumps(line) + "\n"
+            finally:
+                session.close()
+
+        return current_app.response_class(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    cached = search_cache.get(data)
+    if cached is not None:
+        session.close()
+        body, status = cached
+        return current_app.response_class(body, status=status, mimetype="application/json")
+
+    generation = search_cache.generation
     controller = Flight_controller(session)
     response, status = controller.get_flights(
         data.departure_airport,
@@ -188,11 +289,194 @@ responses:
         data.departure_date_outbound,
         data.departure_date_return,
         data.id_class,
+        data.connections,
+        data.max_legs,
+        data.exclude_sold_out,
+        data.limit,
+        data.outbound_cursor,
+        data.return_cursor,
+    )
+    body = current_app.json.dumps(response).encode()
+    if status == 200:
+        routes, airlines = controller.search_cache_tags(
+            response,
+            data.departure_airport,
+            data.arrival_airport,
+            data.round_trip_flight,
+            data.direct_flights,
+            data.connections,
+        )
+        search_cache.put(data, body, status, routes, airlines, generation)
+    session.close()
+    return current_app.response_class(body, status=status, mimetype="application/json")
+
+
+@flight_bp.route("/search/flexible", methods=["GET"])
+def flight_search_flexible():
+    """
+Flexible-date Flight Search
+---
+tags:
+  - Flights
+summary: Cheapest fare per day over a date window
+description: |
+  Returns, for every day between `date_from` and `date_to` (at most 31 days),
+  the cheapest fare of each route serving the two airports, with the class price policy applied.
+  The whole window is computed with a single grouped query.
+
+  ### Important Notes
+  - Routes are matched like in `/flight/search`, on any contiguous part of the route.
+  - Days without flights are not returned.
+  - If the aircraft does not have a seat configuration for the class `id_class`,
+    its flights are not counted.
+
+parameters:
+  - in: query
+    name: departure_airport
+    required: true
+    type: string
+    example: "FCO"
+  - in: query
+    name: arrival_airport
+    required: true
+    type: string
+    example: "MIA"
+  - in: query
+    name: direct_flights
+    required: true
+    type: boolean
+    example: false
+  - in: query
+    name: date_from
+    required: true
+    type: string
+    example: "2025-08-10"
+  - in: query
+    name: date_to
+    required: true
+    type: string
+    example: "2025-08-17"
+  - in: query
+    name: id_class
+    required: true
+    type: integer
+    example: 4
+
+responses:
+  200:
+    description: Cheapest fares per day
+    schema:
+      type: object
+      properties:
+        days:
+          type: array
+          items:
+            type: object
+            properties:
+              date:
+                type: string
+                example: "2025-08-10"
+              cheapest_price:
+                type: number
+                example: 320.5
+              itineraries:
+                type: array
+                items:
+                  type: object
+                  properties:
+                    route_code:
+                      type: string
+                      example: "AZ1930"
+                    airline_iata_code:
+                      type: string
+                      example: "AZ"
+                    flight_price:
+                      type: number
+                      example: 320.5
+                    flights:
+                      type: integer
+                      example: 1
+                    sections:
+                      type: array
+                      items:
+                        type: integer
+  400:
+    description: Invalid search parameters
+  404:
+    description: Departure or arrival airport not found
+"""
+    session = SessionLocal()
+    try:
+        args = request.args.to_dict()
+        args["direct_flights"] = args.get("direct_flights", "false").lower() == "true"
+        args.setdefault("id_class", 4)
+        data = Flexible_search_schema(**args)
+    except ValidationError as e:
+        session.close()
+        return jsonify({"message": str(e)}), 400
+
+    controller = Flight_controller(session)
+    response, status = controller.get_flexible_fares(
+        data.departure_airport,
+        data.arrival_airport,
+        data.direct_flights,
+        data.date_from,
+        data.date_to,
+        data.id_class,
     )
     session.close()
     return jsonify(response), status
 
 
+@flight_bp.route("/search/cache-stats", methods=["GET"])
+def flight_search_cache_stats():
+    """
+    Flight search cache statistics
+    ---
+    tags:
+      - Flights
+    summary: Hit and miss counters of the flight search cache
+    description: >
+      Returns the counters of the in-process cache used by `/flight/search`.
+      Counters are per worker process and reset when the process restarts.
+
+    responses:
+      200:
+        description: Cache statistics
+        schema:
+          type: object
+          properties:
+            entries:
+              type: integer
+              example: 120
+            size_bytes:
+              type: integer
+              example: 524288
+            max_entries:
+              type: integer
+              example: 1024
+            max_bytes:
+              type: integer
+              example: 67108864
+            ttl_seconds:
+              type: integer
+              example: 300
+            hits:
+              type: integer
+              example: 950
+            misses:
+              type: integer
+              example: 130
+            evictions:
+              type: integer
+              example: 0
+            invalidations:
+              type: integer
+              example: 10
+    """
+    return jsonify(search_cache.stats()), 200
+
+
 @flight_bp.route("/<int:id_flight>/seats-occupied", methods=["GET"])
 def flight_seats_occupied(id_flight: int):
     """
@@ -202,7 +486,8 @@ def flight_seats_occupied(id_flight: int):
       - Flights
     summary: Retrieve occupied seats for a specific flight
     description: >
-      Returns the list of already occupied seats for the flight's seat map.  
+      Returns the list of already occupied seats for the flight's seat map.
+      Seats temporarily held by a customer during checkout are included with `held: true`.  
 
       **Roles required:** Airline-Admin  
       **Authorization:** Bearer JWT Token  
@@ -251,6 +536,9 @@ def flight_seats_occupied(id_flight: int):
                     y:
                       type: integer
                       example: 0
+                    held:
+                      type: boolean
+                      example: false
       401:
         description: Missing or invalid token
       403:
@@ -264,10 +552,157 @@ def flight_seats_occupied(id_flight: int):
     if flight is None:
         return jsonify({"message": f"Flight {id_flight} not found"}), 404
 
-    data = get_flight_seat_blocks(session, id_flight)
+    held_seat_ids = seat_hold_store.held_seats(session, [id_flight])[id_flight]
+    inventory = Seat_inventory.load(session, {id_flight: flight.id_aircraft})
+    data = inventory.seat_blocks(id_flight, held_seat_ids)
+    session.close()
     return jsonify(data), 200
 
 
+@flight_bp.route("/<int:id_flight>/hold", methods=["POST"])
+def hold_seats(id_flight: int):
+    """
+    Hold seats during checkout
+    ---
+    tags:
+      - Flights
+    summary: Temporarily reserve seats of a flight
+    description: >
+      Reserves the selected seats for the user while passenger details are filled in.  
+
+      **Roles allowed:** Any authenticated user  
+      **Authorization:** Bearer JWT Token  
+
+      The hold expires after `SEAT_HOLD_TTL` seconds. Until then the seats are shown as
+      occupied and cannot be booked by anyone else; the holder can book them with or
+      without `id_hold`. Pass `id_hold` to `/flight/book` to also release the hold once
+      the booking is committed.
+
+    security:
+      - Bearer: []
+
+    parameters:
+      - name: id_flight
+        in: path
+        required: true
+        type: integer
+        example: 21
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            id_user:
+              type: integer
+              example: 9
+            seats:
+              type: array
+              items:
+                type: integer
+              example: [21, 22]
+
+    responses:
+      201:
+        description: Seats held
+        schema:
+          type: object
+          properties:
+            id_hold:
+              type: string
+              example: "4f1c2b9e8d7a4e0f9b6c3a2d1e0f9a8b"
+            id_flight:
+              type: integer
+              example: 21
+            id_user:
+              type: integer
+              example: 9
+            seats:
+              type: array
+              items:
+                type: integer
+              example: [21, 22]
+            expires_at:
+              type: string
+              format: date-time
+              example: "2025-08-10T10:15:00+00:00"
+      400:
+        description: Invalid request
+      404:
+        description: Flight or seat not found
+      409:
+        description: Seat already occupied or held
+    """
+    try:
+        data = Seat_hold_schema(**request.get_json())
+    except ValidationError as e:
+        return jsonify({"message": str(e)}), 400
+    session = SessionLocal()
+    try:
+        with session.begin():
+            controller = Flight_controller(session)
+            response, status = controller.hold_seats(data.id_user, id_flight, data.seats)
+    except Seat_conflict_error as e:
+        response, status = {"message": str(e)}, 409
+    except ValueError as e:
+        response, status = {"message": str(e)}, 404
+    finally:
+        session.close()
+
+    return jsonify(response), status
+
+
+@flight_bp.route("/hold/<string:id_hold>", methods=["DELETE"])
+def release_seat_hold(id_hold: str):
+    """
+    Release a seat hold
+    ---
+    tags:
+      - Flights
+    summary: Give back the seats of a hold before it expires
+    security:
+      - Bearer: []
+
+    parameters:
+      - name: id_hold
+        in: path
+        required: true
+        type: string
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            id_user:
+              type: integer
+              example: 9
+
+    responses:
+      200:
+        description: Seat hold released
+      400:
+        description: Invalid request
+      404:
+        description: Seat hold not found or expired
+    """
+    try:
+        data = Seat_hold_release_schema(**request.get_json())
+    except ValidationError as e:
+        return jsonify({"message": str(e)}), 400
+    session = SessionLocal()
+    try:
+        with session.begin():
+            controller = Flight_controller(session)
+            response, status = controller.release_hold(id_hold, data.id_user)
+    except ValueError as e:
+        response, status = {"message": str(e)}, 404
+    finally:
+        session.close()
+
+    return jsonify(response), status
+
+
 @flight_bp.route("/book", methods=["POST"])
 def book_flight():
     """
@@ -284,6 +719,10 @@ def book_flight():
 
       Each ticket includes the seat, optional additional baggage, and passenger details.
 
+      Send an `Idempotency-Key` header to make retries safe: a repeated request with the
+      same key and body returns the stored response of the first successful booking
+      instead of buying again. Keys are kept for `IDEMPOTENCY_KEY_TTL` seconds per buyer.
+
        **Legend for key values:**
         - `id_buyer`: ID of the user purchasing the tickets
         - `id_flight`: ID of the flight the user selected
@@ -293,6 +732,12 @@ def book_flight():
       - Bearer: []
 
     parameters:
+      - name: Idempotency-Key
+        in: header
+        required: false
+        type: string
+        description: Client generated key (e.g. a UUID), unique per purchase attempt
+        example: "b6f3a0c2-7d1e-4f5a-9c3b-2e8d1f0a6b4c"
       - name: body
         in: body
         required: true
@@ -303,6 +748,10 @@ def book_flight():
               type: integer
               description: ID of the user purchasing the tickets
               example: 9
+            id_hold:
+              type: string
+              description: Optional seat hold of the buyer (from `/flight/{id_flight}/hold`), released once the booking is committed. The buyer's own holds never block the booking.
+              example: "4f1c2b9e8d7a4e0f9b6c3a2d1e0f9a8b"
             tickets:
               type: array
               description: List of tickets to purchase
@@ -334,6 +783,11 @@ def book_flight():
                               type: integer
                               description: Number of items of this baggage type
                               example: 2
+                      sections:
+                        type: array
+                        description: Optional ids of the contiguous sections travelled (from search); the whole route when omitted
+                        items:
+                          type: integer
                   passenger_info:
                     type: object
                     properties:
@@ -381,17 +835,31 @@ def book_flight():
         description: Missing or invalid token
       403:
         description: Unauthorized action
+      409:
+        description: A seat is already occupied or held by another customer
+      422:
+        description: Idempotency key already used for a different request
 
     """
     try:
         data = Ticket_reservation_schema(**request.get_json())
     except ValidationError as e:
         return jsonify({"message": str(e)}), 400
+    idempotency_key = request.headers.get("Idempotency-Key")
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= 255:
+        return jsonify({"message": "Idempotency-Key must be between 1 and 255 characters"}), 400
     session = SessionLocal()
     try:
         with session.begin():
             controller = Flight_controller(session)
-            response, status = controller.book(data.id_buyer, data.tickets)
+            if idempotency_key is None:
+                response, status = controller.book(data.id_buyer, data.tickets, data.id_hold)
+            else:
+                response, status = controller.book_idempotent(
+                    idempotency_key, request_hash(data), data.id_buyer, data.tickets, data.id_hold
+                )
+    except Seat_conflict_error as e:
+        response, status = {"message": str(e)}, 409
     except ValueError as e:
         response, status = {"message": str(e)}, 404
     except Exception as e:
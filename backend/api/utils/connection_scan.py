@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta, date
+from typing import NamedTuple
+
+
+class Connection(NamedTuple):
+    departure: datetime
+    arrival: datetime
+    from_airport: str
+    to_airport: str
+    id_flight: int
+    id_airline_routes: int
+
+
+def build_flight_connections(id_flight: int, departure_day: datetime, chain: list[dict], times: dict) -> list[Connection]:
+    # Turns the ordered segments of a flight into timed connections,
+    # moving to the next day every time the clock goes backwards
+    day = departure_day.date() if isinstance(departure_day, datetime) else departure_day
+    connections = []
+    prev_time = None
+
+    for seg in chain:
+        dep_time, arr_time = times[seg["id"]]
+
+        if prev_time is not None and dep_time < prev_time:
+            day += timedelta(days=1)
+        departure = datetime.combine(day, dep_time)
+
+        if arr_time < dep_time:
+            day += timedelta(days=1)
+        arrival = datetime.combine(day, arr_time)
+
+        connections.append(Connection(departure, arrival, seg["from"], seg["to"], id_flight, seg["id"]))
+        prev_time = arr_time
+
+    return connections
+
+
+def connection_scan(connections: list[Connection], origin: str, destination: str, departure_date: date, min_connection: timedelta, max_legs: int) -> list[list[list[Connection]]]:
+    """
+    Round based Connection Scan.
+
+    `connections` must be sorted by departure time. Round k computes the earliest
+    arrival at every airport using at most k flights, so the itineraries found at
+    the destination are Pareto-optimal on arrival time and number of legs.
+    """
+    best = {}               # airport -> (arrival, round)
+    journeys = [None]       # journeys[k][airport] -> (id_flight, board index, alight index)
+    snapshots = [None]      # snapshots[k] -> best arrivals with at most k-1 flights
+    itineraries = []
+
+    for k in range(1, max_legs + 1):
+        previous = dict(best)
+        snapshots.append(previous)
+        journey = {}
+        journeys.append(journey)
+        boarded = {}
+
+        target = previous.get(destination)
+        target_arrival = target[0] if target else None
+
+        for i, c in enumerate(connections):
+            # Nothing departing after the best arrival can improve it
+            if target_arrival is not None and c.departure >= target_arrival:
+                break
+
+            if c.id_flight not in boarded:
+                if k == 1:
+                    can_board = c.from_airport == origin and c.departure.date() == departure_date
+                else:
+                    label = previous.get(c.from_airport)
+                    can_board = (
+                        label is not None
+                        and c.from_airport != origin
+                        and label[0] + min_connection <= c.departure
+                    )
+                if not can_board:
+                    continue
+                boarded[c.id_flight] = i
+
+            current = best.get(c.to_airport)
+            if current is None or c.arrival < current[0]:
+                best[c.to_airport] = (c.arrival, k)
+                journey[c.to_airport] = (c.id_flight, boarded[c.id_flight], i)
+                if c.to_airport == destination:
+                    target_arrival = c.arrival
+
+        if destination in journey:
+            itineraries.append(_rebuild_itinerary(connections, journeys, snapshots, destination, k))
+
+        if not journey:
+            break
+
+    return itineraries
+
+
+def _rebuild_itinerary(connections, journeys, snapshots, destination, k) -> list[list[Connection]]:
+    legs = []
+    airport = destination
+
+    while k > 0:
+        _, board, alight = journeys[k][airport]
+        legs.append(connections[board:alight + 1])
+        airport = connections[board].from_airport
+        label = snapshots[k].get(airport)
+        k = label[1] if label else 0
+
+    legs.reverse()
+    return [
+        [c for c in leg if c.id_flight == leg[0].id_flight]
+        for leg in legs
+    ]
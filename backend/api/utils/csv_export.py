@@ -0,0 +1,30 @@
+import csv
+import io
+import time
+import zlib
+
+
+def gzip_csv(columns: list[str], batches, stats: dict | None = None):
+    # Encodes batches of rows as a gzip-compressed CSV, yielding compressed chunks as they
+    # fill up. Only one batch is held in memory at a time. `stats` receives the rows written,
+    # the elapsed seconds and the rows per second once the stream ends.
+    started = time.perf_counter()
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)    # wbits 16 + 15: gzip container
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    rows = 0
+    try:
+        writer.writerow(columns)
+        for batch in batches:
+            writer.writerows(batch)
+            rows += len(batch)
+            chunk = compressor.compress(buffer.getvalue().encode())
+            buffer.seek(0)
+            buffer.truncate()
+            if chunk:
+                yield chunk
+        yield compressor.compress(buffer.getvalue().encode()) + compressor.flush()
+    finally:
+        if stats is not None:
+            elapsed = time.perf_counter() - started
+            stats.update(rows=rows, seconds=elapsed, rows_per_second=rows / elapsed if elapsed > 0 else 0)
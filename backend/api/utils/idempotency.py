@@ -0,0 +1,41 @@
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy.exc import SQLAlchemyError
+from ..query.booking_request_query import delete_expired_booking_requests
+
+logger = logging.getLogger(__name__)
+
+_purger = None
+_purger_lock = threading.Lock()
+
+
+def request_hash(data) -> str:
+    return hashlib.sha256(data.model_dump_json().encode()).hexdigest()
+
+
+def start_booking_request_purger(session_factory, interval: float, ttl: int):
+    # Stored booking responses older than `ttl` are deleted in bulk every `interval` seconds
+    global _purger
+    with _purger_lock:
+        if _purger is not None:
+            return
+        _purger = threading.Thread(
+            target=_purge, args=(session_factory, interval, ttl), name="booking-request-purger", daemon=True
+        )
+        _purger.start()
+
+
+def _purge(session_factory, interval: float, ttl: int):
+    while True:
+        time.sleep(interval)
+        session = session_factory()
+        try:
+            with session.begin():
+                delete_expired_booking_requests(session, datetime.utcnow() - timedelta(seconds=ttl))
+        except SQLAlchemyError:
+            logger.exception("Purging expired booking requests failed, retrying in %s seconds", interval)
+        finally:
+            session.close()
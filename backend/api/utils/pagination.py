@@ -0,0 +1,17 @@
+import base64
+import json
+from datetime import time
+
+
+def encode_cursor(sort_key: tuple) -> str:
+    departure_time, price, id_flight, id_start = sort_key
+    raw = json.dumps([departure_time.isoformat(), price, id_flight, id_start])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        departure_time, price, id_flight, id_start = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return time.fromisoformat(departure_time), float(price), int(id_flight), int(id_start)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,10 @@
+from datetime import date, timedelta
+
+
+def period_start(day: date, granularity: str) -> date:
+    # First day of the day, ISO week (Monday) or month containing `day`, as date_trunc does
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
@@ -0,0 +1,57 @@
+import threading
+from sqlalchemy import event
+from ..query.airline_query import get_class_multipliers
+
+
+def load_class_price_policies(session, pairs) -> dict:
+    # (price_multiplier, fixed_markup) per (airline_code, id_class), None where no policy exists
+    policies = dict.fromkeys(pairs)
+    if policies:
+        for airline_code, id_class, price_multiplier, fixed_markup in get_class_multipliers(session, list(policies)):
+            if policies[(airline_code, id_class)] is None:
+                policies[(airline_code, id_class)] = (price_multiplier, fixed_markup)
+    return policies
+
+
+class Class_price_policy_cache:
+    # Process-wide cache of (price_multiplier, fixed_markup) per (airline_code, id_class).
+    # Pairs without a policy are cached as None, so they are not looked up again either.
+    # Invalidation only reaches this process, so the cache serves search display only;
+    # bookings read the policies with load_class_price_policies in their own transaction.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._policies = {}
+        self._generation = 0
+
+    def get_many(self, session, pairs) -> dict:
+        pairs = set(pairs)
+        with self._lock:
+            found = {pair: self._policies[pair] for pair in pairs if pair in self._policies}
+            generation = self._generation
+        missing = pairs - found.keys()
+
+        if missing:
+            loaded = load_class_price_policies(session, missing)
+            with self._lock:
+                # a policy changed while loading: serve the rows but do not cache them
+                if generation == self._generation:
+                    self._policies.update(loaded)
+            found.update(loaded)
+
+        return found
+
+    def get(self, session, airline_code: str, id_class: int):
+        return self.get_many(session, [(airline_code, id_class)])[(airline_code, id_class)]
+
+    def invalidate(self):
+        with self._lock:
+            self._policies = {}
+            self._generation += 1
+
+
+class_price_policy_cache = Class_price_policy_cache()
+
+
+def invalidate_class_price_policy_on_commit(session):
+    event.listen(session, "after_commit", lambda s: class_price_policy_cache.invalidate(), once=True)
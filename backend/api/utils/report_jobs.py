@@ -0,0 +1,109 @@
+import heapq
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from config import Config
+
+
+class Report_job_store:
+    # Runs analytics reports on a bounded pool of worker threads. Submissions with the same key
+    # (airline and report spec) share one job while it is queued or running, and its result is
+    # returned to new submissions until it expires. Failed jobs are not reused.
+
+    def __init__(self, workers: int, max_pending: int, ttl: int):
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-worker")
+        self._jobs = {}         # id_job -> job
+        self._keys = {}         # key -> id_job
+        self._expiry = []       # heap of (expires_at, id_job) of finished jobs
+        self._pending = 0
+
+    @staticmethod
+    def key(airline_code: str, spec: dict) -> str:
+        return json.dumps([airline_code, spec], sort_keys=True, default=str)
+
+    def submit(self, airline_code: str, spec: dict, task) -> dict | None:
+        # `task` returns (body, status). None when too many jobs are already waiting.
+        key = self.key(airline_code, spec)
+        with self._lock:
+            self._expire(time.time())
+            id_job = self._keys.get(key)
+            if id_job is not None:
+                return dict(self._jobs[id_job])
+            if self._pending >= self.max_pending:
+                return None
+
+            job = {
+                "id_job": uuid.uuid4().hex,
+                "airline_code": airline_code,
+                "spec": spec,
+                "status": "queued",
+                "created_at": time.time(),
+                "finished_at": None,
+                "result": None,
+                "status_code": None,
+            }
+            self._jobs[job["id_job"]] = job
+            self._keys[key] = job["id_job"]
+            self._pending += 1
+        self._executor.submit(self._run, job["id_job"], key, task)
+        return dict(job)
+
+    def get(self, id_job: str) -> dict | None:
+        with self._lock:
+            self._expire(time.time())
+            job = self._jobs.get(id_job)
+            return dict(job) if job is not None else None
+
+    def _run(self, id_job: str, key: str, task):
+        with self._lock:
+            self._jobs[id_job]["status"] = "running"
+        try:
+            result, status_code = task()
+            status = "done"
+        except Exception:
+            result, status_code = {"message": "The report could not be generated"}, 500
+            status = "failed"
+
+        now = time.time()
+        with self._lock:
+            job = self._jobs[id_job]
+            job.update(status=status, result=result, status_code=status_code, finished_at=now)
+            self._pending -= 1
+            if status == "failed":
+                self._keys.pop(key, None)
+            heapq.heappush(self._expiry, (now + self.ttl, id_job))
+
+    def _expire(self, now: float):
+        while self._expiry and self._expiry[0][0] <= now:
+            _, id_job = heapq.heappop(self._expiry)
+            job = self._jobs.pop(id_job)
+            key = self.key(job["airline_code"], job["spec"])
+            if self._keys.get(key) == id_job:
+                del self._keys[key]
+
+
+def job_to_dict(job: dict) -> dict:
+    finished_at = job["finished_at"]
+    output = {
+        "id_job": job["id_job"],
+        "status": job["status"],
+        "report": {
+            name: value.isoformat() if isinstance(value, date) else value
+            for name, value in job["spec"].items()
+        },
+        "created_at": datetime.fromtimestamp(job["created_at"], timezone.utc).isoformat(),
+        "finished_at": datetime.fromtimestamp(finished_at, timezone.utc).isoformat() if finished_at else None,
+    }
+    if job["status"] in ("done", "failed"):
+        output["status_code"] = job["status_code"]
+        output["result"] = job["result"]
+    return output
+
+
+report_job_store = Report_job_store(Config.REPORT_WORKERS, Config.REPORT_MAX_PENDING, Config.REPORT_RESULT_TTL)
@@ -0,0 +1,195 @@
+import threading
+from collections import defaultdict
+from sqlalchemy import event
+from ..query.route_query import get_route_chain_segments, get_route_detail_signature
+from .geo import haversine
+
+
+class Route_index:
+    # Process-wide cache of the ordered Route_detail chains. Every contiguous sub-chain
+    # is indexed by (origin, destination), so FCO -> JFK -> MIA also answers FCO -> JFK
+    # and JFK -> MIA. It is rebuilt lazily on the first lookup after an invalidation.
+    # Each segment also records the days between the route's first departure and its own
+    # ("day_offset") and its share of the route's distance ("share"), which prices it.
+    # Other workers only learn of new routes from the database: the first lookup of every
+    # session compares the row count and highest id of route_detail with those of the index.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._chains = None
+        self._by_endpoints = None
+        self._signature = None
+
+    def _build(self, session):
+        route_segments = defaultdict(list)
+        id_to_segment = {}
+
+        for code_route, id_segment, id_next, dep, arr, dep_time, arr_time, dep_lat, dep_lon, arr_lat, arr_lon in get_route_chain_segments(session):
+            seg = {
+                "id": id_segment,
+                "next": id_next,
+                "from": dep,
+                "to": arr,
+                "departure_time": dep_time,
+                "arrival_time": arr_time,
+                "km": (
+                    haversine(dep_lat, dep_lon, arr_lat, arr_lon)
+                    if None not in (dep_lat, dep_lon, arr_lat, arr_lon) else None
+                )
+            }
+            route_segments[code_route].append(seg)
+            id_to_segment[id_segment] = seg
+
+        chains = {}
+        by_endpoints = defaultdict(list)
+
+        for code, segments in route_segments.items():
+            all_ids = {s["id"] for s in segments}
+            next_ids = {s["next"] for s in segments if s["next"] is not None}
+            start_ids = list(all_ids - next_ids)
+            if not start_ids:
+                continue  # skip
+
+            current_id = start_ids[0]
+            chain = []
+            visited = set()
+
+            while current_id and current_id not in visited:
+                visited.add(current_id)
+                seg = id_to_segment.get(current_id)
+                if not seg:
+                    break
+                chain.append(seg)
+                current_id = seg["next"]
+
+            if not chain:
+                continue
+
+            set_day_offsets(chain)
+            set_shares(chain)
+            chains[code] = chain
+            for start in range(len(chain)):
+                for end in range(start, len(chain)):
+                    by_endpoints[(chain[start]["from"], chain[end]["to"])].append((code, start, end))
+
+        return chains, dict(by_endpoints)
+
+    def _load(self, session):
+        signature = None
+        if not session.info.get("route_index_checked"):
+            signature = get_route_detail_signature(session)
+            session.info["route_index_checked"] = True
+
+        with self._lock:
+            if self._chains is None or (signature is not None and signature != self._signature):
+                self._signature = signature if signature is not None else get_route_detail_signature(session)
+                self._chains, self._by_endpoints = self._build(session)
+            return self._chains, self._by_endpoints
+
+    def get_chain(self, session, code_route: str) -> list[dict] | None:
+        chains, _ = self._load(session)
+        return chains.get(code_route)
+
+    def max_day_offset(self, session) -> int:
+        # Most days any route takes to reach the departure of its last segment
+        chains, _ = self._load(session)
+        return max((chain[-1]["day_offset"] for chain in chains.values()), default=0)
+
+    def routes_between(self, session, origin: str, destination: str, max_legs: int) -> set[str]:
+        # Routes that can be one of the at most `max_legs` flights of a journey from origin to
+        # destination: they call at an airport reachable from origin before one that can reach
+        # destination, with few enough legs on both sides
+        chains, _ = self._load(session)
+        stops = {code: [chain[0]["from"]] + [seg["to"] for seg in chain] for code, chain in chains.items()}
+        from_origin = _legs_to_reach(stops, origin, max_legs)
+        to_destination = _legs_to_reach({code: airports[::-1] for code, airports in stops.items()}, destination, max_legs)
+
+        routes = set()
+        for code, airports in stops.items():
+            boarding = None     # fewest legs to reach any earlier stop of the route
+            for airport in airports:
+                if boarding is not None and airport in to_destination and boarding + 1 + to_destination[airport] <= max_legs:
+                    routes.add(code)
+                    break
+                if airport in from_origin and (boarding is None or from_origin[airport] < boarding):
+                    boarding = from_origin[airport]
+        return routes
+
+    def sub_chain(self, session, code_route: str, segment_ids: list[int]) -> list[dict] | None:
+        # The segments of the route travelled by `segment_ids`, None unless they are contiguous and in order
+        chain = self.get_chain(session, code_route) or []
+        ids = [seg["id"] for seg in chain]
+        for start in range(len(ids)):
+            if ids[start:start + len(segment_ids)] == segment_ids:
+                return chain[start:start + len(segment_ids)]
+        return None
+
+    def find_sub_chains(self, session, departure_airport: str, arrival_airport: str, direct_flights: bool) -> list[tuple[str, list[dict]]]:
+        chains, by_endpoints = self._load(session)
+        matches = by_endpoints.get((departure_airport, arrival_airport), [])
+
+        return [
+            (code, chains[code][start:end + 1])
+            for code, start, end in matches
+            # direct flights: a single segment, no stopover
+            if not direct_flights or start == end
+        ]
+
+    def invalidate(self):
+        with self._lock:
+            self._chains = None
+            self._by_endpoints = None
+            self._signature = None
+
+
+def _legs_to_reach(stops: dict[str, list[str]], start: str, max_legs: int) -> dict[str, int]:
+    # airport -> fewest routes taken from `start` to reach it, following each route's stops in order
+    legs = {start: 0}
+    for k in range(max_legs - 1):
+        reached = {}
+        for airports in stops.values():
+            for index, airport in enumerate(airports):
+                if legs.get(airport, max_legs) <= k:
+                    for later in airports[index + 1:]:
+                        if later not in legs:
+                            reached[later] = k + 1
+                    break
+        if not reached:
+            break
+        legs.update(reached)
+    return legs
+
+
+def set_day_offsets(chain: list[dict]):
+    # Moves to the next day every time the clock goes backwards, as build_flight_connections does
+    day = 0
+    prev_time = None
+    for seg in chain:
+        if prev_time is not None and seg["departure_time"] < prev_time:
+            day += 1
+        seg["day_offset"] = day
+        if seg["arrival_time"] < seg["departure_time"]:
+            day += 1
+        prev_time = seg["arrival_time"]
+
+
+def set_shares(chain: list[dict]):
+    # Route prices are set per km (Airline_controller.insert_new_route), so segments share them by
+    # distance; evenly when an airport has no coordinates
+    total = sum(seg["km"] or 0 for seg in chain)
+    known = all(seg["km"] is not None for seg in chain) and total > 0
+    for seg in chain:
+        seg["share"] = seg["km"] / total if known else 1 / len(chain)
+
+
+def chain_share(chain: list[dict]) -> float:
+    # Fraction of the route's base price charged for travelling `chain`
+    return round(sum(seg["share"] for seg in chain), 6)
+
+
+route_index = Route_index()
+
+
+def invalidate_route_index_on_commit(session):
+    # The index is dropped only once the transaction that changed the routes is committed
+    event.listen(session, "after_commit", lambda s: route_index.invalidate(), once=True)
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from config import Config
+
+
+class Search_cache:
+    # Process-wide LRU cache of serialized /flight/search responses with a TTL.
+    # Memory is bounded both by number of entries and by the total size of the bodies.
+    # Each entry remembers the routes that could have matched the search (None means any
+    # route, e.g. connection searches) and the airlines priced in it, so schedule and
+    # price changes only drop the searches they can affect.
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(search) -> str:
+        return search.model_dump_json()
+
+    def get(self, search):
+        key = self.key(search)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["expires_at"] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["body"], entry["status"]
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def put(self, search, body: bytes, status: int, routes: set[str] | None, airlines: set[str], generation: int):
+        if len(body) > self.max_bytes:
+            return
+        key = self.key(search)
+        with self._lock:
+            # something was invalidated while this search was running
+            if generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {
+                "body": body,
+                "status": status,
+                "routes": routes,
+                "airlines": airlines,
+                "expires_at": time.monotonic() + self.ttl,
+            }
+            self._size += len(body)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, routes: set[str] | None = None, airlines: set[str] | None = None):
+        with self._lock:
+            if routes is None and airlines is None:
+                stale = list(self._entries)
+            else:
+                stale = [
+                    key for key, entry in self._entries.items()
+                    if entry["routes"] is None
+                    or (routes and entry["routes"] & routes)
+                    or (airlines and entry["airlines"] & airlines)
+                ]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+            self._generation += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._size -= len(entry["body"])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+search_cache = Search_cache(Config.SEARCH_CACHE_MAX_ENTRIES, Config.SEARCH_CACHE_MAX_BYTES, Config.SEARCH_CACHE_TTL)
+
+
+def invalidate_search_cache_on_commit(session, routes: set[str] | None = None, airlines: set[str] | None = None):
+    # routes and airlines both None drops every cached search
+    event.listen(session, "after_commit", lambda s: search_cache.invalidate(routes, airlines), once=True)
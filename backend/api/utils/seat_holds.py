@@ -0,0 +1,216 @@
+import heapq
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from config import Config
+from .seat_inventory import Seat_conflict_error
+from ..query.seat_hold_query import (
+    delete_expired_seat_holds, delete_seat_hold, get_held_seat_ids, get_seat_hold_rows, insert_seat_holds
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Seat_hold_store:
+    # In-process store of temporary seat holds taken during checkout. A hold reserves
+    # some seats of one flight for a user until it expires, it is released or the seats
+    # are booked. Expired holds are ignored on read and removed in bulk by the sweeper.
+    # Holds are only visible to this process: it is the fallback for single-process
+    # deployments (SEAT_HOLD_STORE=memory), Database_seat_hold_store is the default.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._holds = {}        # id_hold -> hold
+        self._seats = {}        # id_flight -> {id_seat: id_hold}
+        self._expiry = []       # heap of (expires_at, id_hold)
+        self._sweeper = None
+
+    def hold(self, session, id_flight: int, seat_ids: list[int], id_user: int, ttl: int) -> dict:
+        now = time.time()
+        with self._lock:
+            flight_seats = self._seats.get(id_flight, {})
+            for id_seat in seat_ids:
+                id_hold = flight_seats.get(id_seat)
+                if id_hold is not None and self._holds[id_hold]["expires_at"] > now:
+                    raise Seat_conflict_error(f"Seat {id_seat} is already held")
+
+            hold = {
+                "id_hold": uuid.uuid4().hex,
+                "id_flight": id_flight,
+                "id_user": id_user,
+                "seats": sorted(set(seat_ids)),
+                "expires_at": now + ttl,
+            }
+            # whatever still points at these seats has expired
+            for previous in {flight_seats[id_seat] for id_seat in hold["seats"] if id_seat in flight_seats}:
+                self._drop(previous)
+            flight_seats = self._seats.setdefault(id_flight, {})
+            for id_seat in hold["seats"]:
+                flight_seats[id_seat] = hold["id_hold"]
+            self._holds[hold["id_hold"]] = hold
+            heapq.heappush(self._expiry, (hold["expires_at"], hold["id_hold"]))
+            return dict(hold)
+
+    def get(self, session, id_hold: str) -> dict | None:
+        with self._lock:
+            hold = self._holds.get(id_hold)
+            if hold is None or hold["expires_at"] <= time.time():
+                return None
+            return dict(hold)
+
+    def release(self, session, id_hold: str):
+        # like the database store, the hold is released when the session commits
+        event.listen(session, "after_commit", lambda s: self._release(id_hold), once=True)
+
+    def held_seats(self, session, flight_ids, exclude_user: int | None = None) -> dict[int, set[int]]:
+        # id_flight -> seats held by anyone but `exclude_user`
+        now = time.time()
+        held = {}
+        with self._lock:
+            for id_flight in flight_ids:
+                held[id_flight] = {
+                    id_seat for id_seat, id_hold in self._seats.get(id_flight, {}).items()
+                    if self._holds[id_hold]["id_user"] != exclude_user and self._holds[id_hold]["expires_at"] > now
+                }
+        return held
+
+    def reap(self) -> int:
+        now = time.time()
+        reaped = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                expires_at, id_hold = heapq.heappop(self._expiry)
+                hold = self._holds.get(id_hold)
+                # released holds are left in the heap and skipped here
+                if hold is not None and hold["expires_at"] == expires_at:
+                    self._drop(id_hold)
+                    reaped += 1
+        return reaped
+
+    def start_sweeper(self, session_factory, interval: float):
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep, args=(interval,), name="seat-hold-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def _sweep(self, interval: float):
+        while True:
+            time.sleep(interval)
+            self.reap()
+
+    def _release(self, id_hold: str):
+        with self._lock:
+            if id_hold in self._holds:
+                self._drop(id_hold)
+
+    def _drop(self, id_hold: str):
+        hold = self._holds.pop(id_hold)
+        flight_seats = self._seats[hold["id_flight"]]
+        for id_seat in hold["seats"]:
+            if flight_seats.get(id_seat) == id_hold:
+                del flight_seats[id_seat]
+        if not flight_seats:
+            del self._seats[hold["id_flight"]]
+
+
+class Database_seat_hold_store:
+    # Seat holds stored in seat_holds, shared by every process. Holds are taken, released
+    # and checked in the caller's session, so they take effect when it commits; the primary
+    # key on (id_flight, id_seat) keeps two concurrent holds off the same seat.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sweeper = None
+
+    def hold(self, session, id_flight: int, seat_ids: list[int], id_user: int, ttl: int) -> dict:
+        now = datetime.utcnow()
+        seat_ids = sorted(set(seat_ids))
+        held = sorted(id_seat for _, id_seat, _ in get_held_seat_ids(session, [id_flight], now, seat_ids))
+        if held:
+            raise Seat_conflict_error(f"Seat {held[0]} is already held")
+
+        # whatever still points at these seats has expired
+        delete_expired_seat_holds(session, now, id_flight, seat_ids)
+        id_hold = uuid.uuid4().hex
+        expires_at = now + timedelta(seconds=ttl)
+        try:
+            insert_seat_holds(session, [
+                {"id_flight": id_flight, "id_seat": id_seat, "id_hold": id_hold, "id_user": id_user, "expires_at": expires_at}
+                for id_seat in seat_ids
+            ])
+        except IntegrityError:
+            raise Seat_conflict_error("The selected seats are already held")
+
+        return {
+            "id_hold": id_hold,
+            "id_flight": id_flight,
+            "id_user": id_user,
+            "seats": seat_ids,
+            "expires_at": expires_at.replace(tzinfo=timezone.utc).timestamp(),
+        }
+
+    def get(self, session, id_hold: str) -> dict | None:
+        rows = get_seat_hold_rows(session, id_hold, datetime.utcnow())
+        if not rows:
+            return None
+        return {
+            "id_hold": id_hold,
+            "id_flight": rows[0].id_flight,
+            "id_user": rows[0].id_user,
+            "seats": [row.id_seat for row in rows],
+            "expires_at": rows[0].expires_at.replace(tzinfo=timezone.utc).timestamp(),
+        }
+
+    def release(self, session, id_hold: str):
+        delete_seat_hold(session, id_hold)
+
+    def held_seats(self, session, flight_ids, exclude_user: int | None = None) -> dict[int, set[int]]:
+        # id_flight -> seats held by anyone but `exclude_user`
+        held = {id_flight: set() for id_flight in flight_ids}
+        if held:
+            for id_flight, id_seat, id_user in get_held_seat_ids(session, list(held), datetime.utcnow()):
+                if id_user != exclude_user:
+                    held[id_flight].add(id_seat)
+        return held
+
+    def reap(self, session) -> int:
+        return delete_expired_seat_holds(session, datetime.utcnow())
+
+    def start_sweeper(self, session_factory, interval: float):
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(
+                target=self._sweep, args=(session_factory, interval), name="seat-hold-sweeper", daemon=True
+            )
+            self._sweeper.start()
+
+    def _sweep(self, session_factory, interval: float):
+        while True:
+            time.sleep(interval)
+            session = session_factory()
+            try:
+                with session.begin():
+                    self.reap(session)
+            except SQLAlchemyError:
+                logger.exception("Removing expired seat holds failed, retrying in %s seconds", interval)
+            finally:
+                session.close()
+
+
+def hold_to_dict(hold: dict) -> dict:
+    return {
+        "id_hold": hold["id_hold"],
+        "id_flight": hold["id_flight"],
+        "id_user": hold["id_user"],
+        "seats": hold["seats"],
+        "expires_at": datetime.fromtimestamp(hold["expires_at"], timezone.utc).isoformat(),
+    }
+
+
+seat_hold_store = Seat_hold_store() if Config.SEAT_HOLD_STORE == "memory" else Database_seat_hold_store()
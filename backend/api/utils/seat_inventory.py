@@ -0,0 +1,206 @@
+import threading
+from sqlalchemy import event
+from ..models.flight_seat_inventory import Flight_seat_inventory
+from ..query.flight_query import get_aircraft_layouts, get_flight_seat_inventory, get_occupied_seat_ids, get_sold_seat_counts
+
+
+class Seat_conflict_error(ValueError):
+    # A seat of the request is already sold or held by someone else (409, not 404)
+    pass
+
+
+def load_seat_layouts(session, aircraft_ids) -> dict:
+    # The cabins of each aircraft. Every cell is mapped to its bit (y * cols + x) in the
+    # cabin's seat bitmap, and `seat_mask` has a bit set for each seat.
+    layouts = {id_aircraft: {"cabins": {}, "cells": {}} for id_aircraft in aircraft_ids}
+    if layouts:
+        for row in get_aircraft_layouts(session, list(layouts)):
+            layout = layouts[row.id_aircraft]
+            cabin = layout["cabins"].setdefault(row.id_cabin, {
+                "id_class": row.id_class,
+                "rows": row.rows,
+                "cols": row.cols,
+                "seats": {},
+                "seat_mask": 0,
+            })
+            if row.id_cell is None:
+                continue
+            bit = row.y * row.cols + row.x
+            layout["cells"][row.id_cell] = (row.id_cabin, bit)
+            if row.is_seat:
+                cabin["seats"][bit] = row.id_cell
+                cabin["seat_mask"] |= 1 << bit
+    return layouts
+
+
+class Seat_layout_cache:
+    # Process-wide cache of load_seat_layouts. Invalidation only reaches this process, so
+    # the cache serves seat maps and availability; bookings and holds load the layouts
+    # in their own transaction.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._layouts = {}
+        self._generation = 0
+
+    def get_many(self, session, aircraft_ids) -> dict:
+        aircraft_ids = set(aircraft_ids)
+        with self._lock:
+            found = {id_aircraft: self._layouts[id_aircraft] for id_aircraft in aircraft_ids if id_aircraft in self._layouts}
+            generation = self._generation
+        missing = aircraft_ids - found.keys()
+
+        if missing:
+            loaded = load_seat_layouts(session, missing)
+            with self._lock:
+                if generation == self._generation:
+                    self._layouts.update(loaded)
+            found.update(loaded)
+
+        return found
+
+    def get(self, session, id_aircraft: int) -> dict:
+        return self.get_many(session, [id_aircraft])[id_aircraft]
+
+    def invalidate(self):
+        with self._lock:
+            self._layouts = {}
+            self._generation += 1
+
+
+seat_layout_cache = Seat_layout_cache()
+
+
+def invalidate_seat_layout_on_commit(session):
+    event.listen(session, "after_commit", lambda s: seat_layout_cache.invalidate(), once=True)
+
+
+class Seat_inventory:
+    """
+    Sold seats of a set of flights, one bitmap per cabin.
+
+    Bitmaps are read from `flight_seat_inventory` with a single primary key lookup, so
+    availability does not depend on how many tickets a flight has. Each load checks the
+    bitmaps against the number of tickets sold, counted on the tickets index. A flight
+    whose bitmaps are missing (sold before the inventory existed, or whose cabins changed)
+    or disagree with that count (tickets written or deleted outside `book`) is rebuilt
+    from its tickets; `save` stores the rebuilt and changed bitmaps.
+    Writers must hold the flight locks (`lock_flights`) from `load` until commit, and
+    load with `cached=False` so seat ids are checked against the committed cabins.
+    """
+
+    def __init__(self, aircraft_by_flight: dict[int, int], layouts: dict, rows: dict, bitmaps: dict, dirty: set):
+        self.aircraft_by_flight = aircraft_by_flight
+        self.layouts = layouts
+        self._rows = rows
+        self._bitmaps = bitmaps
+        self._dirty = dirty
+
+    @classmethod
+    def load(cls, session, aircraft_by_flight: dict[int, int], cached: bool = True):
+        aircraft_ids = set(aircraft_by_flight.values())
+        layouts = seat_layout_cache.get_many(session, aircraft_ids) if cached else load_seat_layouts(session, aircraft_ids)
+
+        rows = {}
+        for row in get_flight_seat_inventory(session, list(aircraft_by_flight)):
+            rows[(row.id_flight, row.id_cabin)] = row
+        sold = get_sold_seat_counts(session, list(aircraft_by_flight))
+
+        bitmaps = {}
+        dirty = set()
+        stale = []
+        for id_flight, id_aircraft in aircraft_by_flight.items():
+            cabins = layouts[id_aircraft]["cabins"]
+            if (
+                all((id_flight, id_cabin) in rows for id_cabin in cabins)
+                and sum(rows[(id_flight, id_cabin)].occupied_seats for id_cabin in cabins) == sold.get(id_flight, 0)
+            ):
+                for id_cabin in cabins:
+                    bitmaps[(id_flight, id_cabin)] = bytearray(rows[(id_flight, id_cabin)].occupied)
+            else:
+                stale.append(id_flight)
+
+        if stale:
+            occupied = get_occupied_seat_ids(session, stale)
+            for id_flight in stale:
+                layout = layouts[aircraft_by_flight[id_flight]]
+                for id_cabin, cabin in layout["cabins"].items():
+                    bitmaps[(id_flight, id_cabin)] = bytearray((cabin["rows"] * cabin["cols"] + 7) // 8)
+                    dirty.add((id_flight, id_cabin))
+                for id_seat in occupied.get(id_flight, ()):
+                    cell = layout["cells"].get(id_seat)
+                    if cell is not None:
+                        id_cabin, bit = cell
+                        bitmaps[(id_flight, id_cabin)][bit >> 3] |= 1 << (bit & 7)
+
+        return cls(aircraft_by_flight, layouts, rows, bitmaps, dirty)
+
+    def seat(self, id_flight: int, id_seat: int) -> tuple[int, int] | None:
+        # (id_cabin, id_class) of a seat of the flight's aircraft; None for aisles and other cells
+        layout = self.layouts[self.aircraft_by_flight[id_flight]]
+        cell = layout["cells"].get(id_seat)
+        if cell is None:
+            return None
+        id_cabin, bit = cell
+        cabin = layout["cabins"][id_cabin]
+        if not cabin["seat_mask"] >> bit & 1:
+            return None
+        return id_cabin, cabin["id_class"]
+
+    def is_occupied(self, id_flight: int, id_seat: int) -> bool:
+        id_cabin, bit = self.layouts[self.aircraft_by_flight[id_flight]]["cells"][id_seat]
+        return bool(self._bitmaps[(id_flight, id_cabin)][bit >> 3] >> (bit & 7) & 1)
+
+    def occupy(self, id_flight: int, id_seat: int):
+        id_cabin, bit = self.layouts[self.aircraft_by_flight[id_flight]]["cells"][id_seat]
+        self._bitmaps[(id_flight, id_cabin)][bit >> 3] |= 1 << (bit & 7)
+        self._dirty.add((id_flight, id_cabin))
+
+    def _occupied_seats(self, id_flight: int, id_cabin: int, cabin: dict) -> int:
+        return int.from_bytes(self._bitmaps[(id_flight, id_cabin)], "little") & cabin["seat_mask"]
+
+    def seats_available(self, id_flight: int) -> dict[int, int]:
+        available = {}
+        for id_cabin, cabin in self.layouts[self.aircraft_by_flight[id_flight]]["cabins"].items():
+            free = len(cabin["seats"]) - self._occupied_seats(id_flight, id_cabin, cabin).bit_count()
+            available[cabin["id_class"]] = available.get(cabin["id_class"], 0) + free
+        return available
+
+    def seat_blocks(self, id_flight: int, held_seat_ids=()) -> list[dict]:
+        # Sold and held seats of each cabin, in the format of the seats-occupied endpoint
+        held_seat_ids = set(held_seat_ids)
+        blocks = []
+        for id_cabin, cabin in self.layouts[self.aircraft_by_flight[id_flight]]["cabins"].items():
+            sold = self._occupied_seats(id_flight, id_cabin, cabin)
+            seats = []
+            for bit, id_cell in cabin["seats"].items():
+                is_sold = sold >> bit & 1
+                if is_sold or id_cell in held_seat_ids:
+                    seats.append({
+                        "x": bit % cabin["cols"],
+                        "y": bit // cabin["cols"],
+                        "id_cell": id_cell,
+                        "held": not is_sold,
+                    })
+            if seats:
+                blocks.append({
+                    "id_cabin": id_cabin,
+                    "id_class": cabin["id_class"],
+                    "occupied_seats": len(seats),
+                    "seats": seats,
+                })
+        return blocks
+
+    def save(self, session):
+        for id_flight, id_cabin in self._dirty:
+            bitmap = bytes(self._bitmaps[(id_flight, id_cabin)])
+            cabin = self.layouts[self.aircraft_by_flight[id_flight]]["cabins"][id_cabin]
+            occupied_seats = self._occupied_seats(id_flight, id_cabin, cabin).bit_count()
+            row = self._rows.get((id_flight, id_cabin))
+            if row is None:
+                row = Flight_seat_inventory(id_flight = id_flight, id_cabin = id_cabin)
+                session.add(row)
+                self._rows[(id_flight, id_cabin)] = row
+            row.occupied = bitmap
+            row.occupied_seats = occupied_seats
+        self._dirty = set()
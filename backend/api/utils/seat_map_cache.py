@@ -0,0 +1,44 @@
+import hashlib
+import threading
+from sqlalchemy import event
+
+
+class Seat_map_cache:
+    # Process-wide cache of the serialized seat map of each aircraft in each format, with a
+    # strong ETag computed from the body. Entries are dropped when the aircraft's cabins change.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, id_aircraft_airline: int, seat_map_format: str) -> tuple[bytes, str] | None:
+        with self._lock:
+            return self._entries.get(id_aircraft_airline, {}).get(seat_map_format)
+
+    def put(self, id_aircraft_airline: int, seat_map_format: str, body: bytes, generation: int) -> tuple[bytes, str]:
+        entry = (body, hashlib.sha256(body).hexdigest())
+        with self._lock:
+            # the seat map changed while it was being built
+            if generation == self._generation:
+                self._entries.setdefault(id_aircraft_airline, {})[seat_map_format] = entry
+        return entry
+
+    def invalidate(self, id_aircraft_airline: int | None = None):
+        with self._lock:
+            if id_aircraft_airline is None:
+                self._entries = {}
+            else:
+                self._entries.pop(id_aircraft_airline, None)
+            self._generation += 1
+
+
+seat_map_cache = Seat_map_cache()
+
+
+def invalidate_seat_map_on_commit(session, id_aircraft_airline: int | None = None):
+    event.listen(session, "after_commit", lambda s: seat_map_cache.invalidate(id_aircraft_airline), once=True)
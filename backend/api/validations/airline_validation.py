@@ -1,5 +1,5 @@
-from pydantic import BaseModel, StringConstraints, PositiveFloat, Field, field_validator, PositiveInt
-from typing import Annotated, List, Optional
+from pydantic import BaseModel, StringConstraints, PositiveFloat, Field, field_validator, model_validator, PositiveInt
+from typing import Annotated, List, Optional, Literal
 from datetime import date, timedelta, time
 from ..validations.XSS_protection import SafeStr
 
@@ -23,22 +23,14 @@ class Airline_aircraft_block_schema(BaseModel):
         if not matrix or not matrix[0]:
             raise ValueError("The matrix cannot be empty.")
 
-        rows = len(matrix)
         cols = len(matrix[0])
 
         # Controllo uniformità righe
-        for row in matrix:
-            if len(row) != cols:
-                raise ValueError("All rows must have the same number of columns.")
-
-        # Controllo corridoio continuo
-        corridor_found = False
-        for col in range(cols):
-            if all(matrix[riga][col] is False for riga in range(rows)):
-                corridor_found = True
-                break
-
-        if not corridor_found:
+        if any(len(row) != cols for row in matrix):
+            raise ValueError("All rows must have the same number of columns.")
+
+        # Controllo corridoio continuo: zip(*matrix) scorre le colonne
+        if all(any(column) for column in zip(*matrix)):
             raise ValueError("There must be at least one continuous corridor (a column of only 'False')")
 
         return matrix
@@ -46,15 +38,18 @@ class Airline_aircraft_block_schema(BaseModel):
 class Clone_aircraft_seat_map_schema(BaseModel):
     airline_code: Annotated[str, StringConstraints(min_length=2, max_length=2, pattern=r'^[A-Z0-9]{2}$')]
     source_id: PositiveInt
-    target_id: PositiveInt
-
-    @field_validator("target_id")
-    @classmethod
-    def same_id(cls, v: str, values: dict) -> str:
-        source_id = values.data.get("source_id")
-        if source_id and v == source_id:
+    target_id: Optional[PositiveInt] = None
+    target_ids: List[PositiveInt] = []
+
+    @model_validator(mode="after")
+    def collect_targets(self):
+        targets = list(dict.fromkeys([*self.target_ids, *([self.target_id] if self.target_id else [])]))
+        if not targets:
+            raise ValueError("target_id or target_ids is required")
+        if self.source_id in targets:
             raise ValueError("The IDs must be different.")
-        return v
+        self.target_ids = targets
+        return self
 
 
 FourDigitInt = Annotated[int, Field(ge=0, le=9999)]
@@ -165,6 +160,43 @@ class Route_analytics_schema(BaseModel):
 class Routes_analytics_schema(BaseModel):
     start_date: Optional[date] = None
 
+class Analytics_series_schema(BaseModel):
+    granularity: Literal["day", "week", "month"] = "day"
+    route_code: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+    @model_validator(mode="after")
+    def check_date_range(self):
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
+
+class Ticket_export_schema(BaseModel):
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+    @model_validator(mode="after")
+    def check_date_range(self):
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
+
+class Report_job_schema(BaseModel):
+    report: Literal["series", "route", "routes", "total_revenue"]
+    granularity: Literal["day", "week", "month"] = "day"
+    route_code: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+    @model_validator(mode="after")
+    def check_report(self):
+        if self.report == "route" and self.route_code is None:
+            raise ValueError("route_code is required for route reports")
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
+
 
 
 
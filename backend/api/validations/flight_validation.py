@@ -1,9 +1,10 @@
 import bleach
-from pydantic import BaseModel, StringConstraints, field_validator, model_validator, PositiveInt, EmailStr
+from pydantic import BaseModel, StringConstraints, field_validator, model_validator, PositiveInt, EmailStr, Field
 from datetime import date
 from enum import Enum
 from typing import Annotated, Optional, List
 from ..validations.XSS_protection import SafeStr
+from ..utils.pagination import decode_cursor
 
 
 
@@ -16,6 +17,20 @@ class Flight_search_schema(BaseModel):
     departure_date_outbound: date
     departure_date_return: Optional[date]
     id_class: PositiveInt
+    connections: bool = False
+    max_legs: Annotated[int, Field(ge=1, le=4)] = 3
+    exclude_sold_out: bool = False
+    limit: Optional[Annotated[int, Field(ge=1, le=500)]] = None
+    outbound_cursor: Optional[str] = None
+    return_cursor: Optional[str] = None
+    stream: bool = False
+
+    @field_validator('outbound_cursor', 'return_cursor')
+    @classmethod
+    def cursor_must_be_valid(cls, v):
+        if v is not None:
+            decode_cursor(v)
+        return v
 
     @field_validator('arrival_airport')
     @classmethod
@@ -34,6 +49,35 @@ class Flight_search_schema(BaseModel):
         if not self.round_trip_flight and self.departure_date_return is not None:
             raise ValueError("departure_date_return must be None for one-way flights")
 
+        if self.connections and self.direct_flights:
+            raise ValueError("connections and direct_flights cannot both be true")
+
+        return self
+
+class Flexible_search_schema(BaseModel):
+    departure_airport: Annotated[str, StringConstraints(min_length=3, max_length=3, pattern=r'^[A-Z]{3}$')]
+    arrival_airport: Annotated[str, StringConstraints(min_length=3, max_length=3, pattern=r'^[A-Z]{3}$')]
+    direct_flights: bool
+    date_from: date
+    date_to: date
+    id_class: PositiveInt
+
+    @field_validator('arrival_airport')
+    @classmethod
+    def airports_must_be_different(cls, v, info):
+        departure_airport = info.data.get('departure_airport')
+        if departure_airport and v == departure_airport:
+            raise ValueError("departure_airport and arrival_airport must be different")
+        return v
+
+    @model_validator(mode="after")
+    def validate_date_window(self) -> 'Flexible_search_schema':
+        if self.date_from > self.date_to:
+            raise ValueError("date_from must be earlier than or equal to date_to")
+
+        if (self.date_to - self.date_from).days >= 31:
+            raise ValueError("the date window cannot be longer than 31 days")
+
         return self
 
 class Additional_baggage(BaseModel):
@@ -44,6 +88,7 @@ class Ticket_info(BaseModel):
     id_flight: PositiveInt
     id_seat: PositiveInt
     additional_baggage: List[Additional_baggage] = []
+    sections: Optional[Annotated[List[PositiveInt], Field(min_length=1)]] = None
 
 
 class SexEnum(str, Enum):
@@ -71,6 +116,21 @@ class Ticket(BaseModel):
 
 class Ticket_reservation_schema(BaseModel):
     id_buyer: PositiveInt
-    tickets: List[Ticket]
+    tickets: Annotated[List[Ticket], Field(min_length=1)]
+    id_hold: Optional[Annotated[str, StringConstraints(pattern=r"^[0-9a-f]{32}$")]] = None
+
+class Seat_hold_schema(BaseModel):
+    id_user: PositiveInt
+    seats: Annotated[List[PositiveInt], Field(min_length=1)]
+
+    @field_validator("seats")
+    @classmethod
+    def unique_seats(cls, v: List[PositiveInt]) -> List[PositiveInt]:
+        if len(set(v)) != len(v):
+            raise ValueError("Duplicate seats")
+        return v
+
+class Seat_hold_release_schema(BaseModel):
+    id_user: PositiveInt
 
 
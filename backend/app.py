@@ -1,3 +1,4 @@
+import click
 from flask import Flask
 from flask_cors import CORS
 from config import Config
@@ -6,6 +7,10 @@ from sqlalchemy.orm import sessionmaker
 from api.models import *
 from flask_jwt_extended import JWTManager
 from api.utils.blacklist import blacklisted_tokens
+from api.utils.seat_holds import seat_hold_store
+from api.utils.idempotency import start_booking_request_purger
+from db import SessionLocal
+from api.query.revenue_query import rebuild_revenue_rollups
 from flasgger import Swagger
 
 
@@ -32,6 +37,19 @@ def create_app():
     CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:3000"])
     register_routes(app)
     jwt = JWTManager(app)
+    seat_hold_store.start_sweeper(SessionLocal, Config.SEAT_HOLD_SWEEP_SECONDS)
+    start_booking_request_purger(SessionLocal, Config.IDEMPOTENCY_PURGE_SECONDS, Config.IDEMPOTENCY_KEY_TTL)
+
+    @app.cli.command("rebuild-revenue-rollups")
+    def rebuild_revenue_rollups_command():
+        """Backfill the daily revenue rollups from the tickets."""
+        session = SessionLocal()
+        try:
+            with session.begin():
+                rows = rebuild_revenue_rollups(session)
+        finally:
+            session.close()
+        click.echo(f"{rows} rollup rows rebuilt")
 
     def check_if_token_revoked(jwt_header, jwt_payload):
         jti = jwt_payload["jti"]
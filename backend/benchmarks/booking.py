@@ -0,0 +1,42 @@
+"""
+Time and SQL statements of one booking of 1, 10 and 100 passengers (user-013).
+
+    python -m benchmarks.booking
+"""
+import time
+
+from api.controllers.flight_controller import Flight_controller
+from benchmarks.common import make_session_factory, add_cabin, add_flights, count_statements, print_table
+from tests.data import ticket
+
+RUNS = 5
+
+
+def main():
+    engine, session_factory = make_session_factory()
+    with session_factory() as session:
+        seat_ids = add_cabin(session, id_aircraft=1, id_class=1, rows=20, cols=6)
+        flight_ids = iter(add_flights(session, 3 * RUNS))
+        session.commit()
+
+    rows = []
+    for passengers in (1, 10, 100):
+        times = []
+        statements = []
+        for _ in range(RUNS):
+            id_flight = next(flight_ids)
+            tickets = [ticket(id_flight, id_seat, f"passenger{n}@example.com") for n, id_seat in enumerate(seat_ids[:passengers])]
+            with session_factory() as session:
+                started = time.perf_counter()
+                with count_statements(engine, statements), session.begin():
+                    response, status = Flight_controller(session).book(1, tickets)
+                times.append((time.perf_counter() - started) * 1000)
+                assert status == 200, response
+        times.sort()
+        rows.append([passengers, f"{times[len(times) // 2]:.1f}", f"{times[len(times) // 2] / passengers:.2f}", statements[-1]])
+
+    print_table(["passengers", "median ms", "ms/passenger", "statements"], rows)
+
+
+if __name__ == "__main__":
+    main()
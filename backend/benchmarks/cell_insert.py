@@ -0,0 +1,45 @@
+"""
+Time to insert the 10,000 cells of a 100 x 100 seat block (user-020): bulk_insert_cells
+(COPY on PostgreSQL, one executemany elsewhere) against adding one ORM object per cell.
+
+    python -m benchmarks.cell_insert
+"""
+from api.models.cabin import Cabin
+from api.models.cell import Cell
+from api.query.airline_query import bulk_insert_cells
+from benchmarks.common import make_session_factory, timed, print_table
+
+ROWS = 100
+COLS = 100
+
+
+def main():
+    engine, session_factory = make_session_factory()
+    matrix = [[(x + y) % 7 != 0 for x in range(COLS)] for y in range(ROWS)]
+
+    def insert_cells(method):
+        with session_factory() as session, session.begin():
+            cabin = Cabin(id_aircraft=1, id_class=1, rows=ROWS, cols=COLS)
+            session.add(cabin)
+            session.flush()
+            method(session, cabin.id_cabin)
+
+    def bulk(session, id_cabin):
+        bulk_insert_cells(session, id_cabin, matrix)
+
+    def one_object_per_cell(session, id_cabin):
+        for y, row in enumerate(matrix):
+            for x, is_seat in enumerate(row):
+                session.add(Cell(id_cabin=id_cabin, x=x, y=y, is_seat=is_seat))
+        session.flush()
+
+    rows = []
+    for name, method in (("bulk_insert_cells", bulk), ("ORM object per cell", one_object_per_cell)):
+        ms = timed(lambda: insert_cells(method), repeat=5)
+        rows.append([name, f"{ms:.0f}", f"{ROWS * COLS / ms * 1000:,.0f}"])
+
+    print_table(["method", "median ms", "cells/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Class distribution analytics on a generated dataset (user-021): flights of a two-class aircraft
+with 100 to 5000 tickets each. Times the per-flight grouped query and the per-route rollup read.
+
+    python -m benchmarks.class_distribution
+"""
+from sqlalchemy import insert
+
+from api.models.class_seat import Class_seat
+from api.models.ticket import Ticket
+from api.query.flight_query import get_flight_class_distribution, get_route_class_distribution
+from api.query.revenue_query import rebuild_revenue_rollups
+from benchmarks.common import make_session_factory, add_cabin, add_flights, count_statements, timed, print_table
+
+TICKETS = (100, 1000, 5000)
+
+
+def main():
+    engine, session_factory = make_session_factory()
+    with session_factory() as session:
+        session.add(Class_seat(id_class=2, name="Business", code="J"))
+        session.flush()
+        business = add_cabin(session, id_aircraft=1, id_class=2, rows=20, cols=50)
+        economy = add_cabin(session, id_aircraft=1, id_class=1, rows=80, cols=50)
+        flight_ids = add_flights(session, len(TICKETS))
+        for id_flight, tickets in zip(flight_ids, TICKETS):
+            # one ticket in five is Business
+            seats = business[:tickets // 5] + economy[:tickets - tickets // 5]
+            session.execute(insert(Ticket), [
+                {"id_flight": id_flight, "id_seat": id_seat, "price": 100} for id_seat in seats
+            ])
+        rebuild_revenue_rollups(session)
+        session.commit()
+
+    rows = []
+    with session_factory() as session:
+        for id_flight, tickets in zip(flight_ids, TICKETS):
+            statements = []
+            with count_statements(engine, statements):
+                distribution = get_flight_class_distribution(session, id_flight)
+            assert sum(distribution["passengers"].values()) == tickets
+            ms = timed(lambda: get_flight_class_distribution(session, id_flight), repeat=20)
+            rows.append([f"flight {id_flight}", tickets, f"{ms:.2f}", statements[0]])
+
+        statements = []
+        with count_statements(engine, statements):
+            distribution = get_route_class_distribution(session, "AZ1")
+        assert sum(distribution["passengers"].values()) == sum(TICKETS)
+        ms = timed(lambda: get_route_class_distribution(session, "AZ1"), repeat=20)
+        rows.append(["route AZ1", sum(TICKETS), f"{ms:.2f}", statements[0]])
+
+    print_table(["scope", "tickets", "median ms", "statements"], rows)
+
+
+if __name__ == "__main__":
+    main()
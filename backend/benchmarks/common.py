@@ -0,0 +1,88 @@
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# config.py and db.py read DB_URL at import time
+os.environ.setdefault("DB_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from api.models import Base
+from api.models.cabin import Cabin
+from api.models.cell import Cell
+from api.models.flight import Flight
+from api.query.airline_query import bulk_insert_cells
+from tests.data import seed
+
+
+def make_session_factory(flights: int = 1):
+    # BENCH_DB_URL points the benchmarks at an empty PostgreSQL database; otherwise a SQLite file is used
+    url = os.getenv("BENCH_DB_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    with session_factory() as session:
+        seed(session, flights)
+        session.commit()
+    print(f"database: {engine.dialect.name}")
+    return engine, session_factory
+
+
+def add_cabin(session, id_aircraft: int, id_class: int, rows: int, cols: int) -> list[int]:
+    # A cabin where every cell is a seat; returns the seat ids row by row
+    cabin = Cabin(id_aircraft=id_aircraft, id_class=id_class, rows=rows, cols=cols)
+    session.add(cabin)
+    session.flush()
+    bulk_insert_cells(session, cabin.id_cabin, [[True] * cols for _ in range(rows)])
+    return session.scalars(
+        select(Cell.id_cell).where(Cell.id_cabin == cabin.id_cabin).order_by(Cell.y, Cell.x)
+    ).all()
+
+
+def add_flights(session, count: int, id_aircraft: int = 1, route_code: str = "AZ1") -> list[int]:
+    first = (session.scalar(select(Flight.id_flight).order_by(Flight.id_flight.desc()).limit(1)) or 0) + 1
+    session.execute(insert(Flight), [
+        {
+            "id_flight": id_flight,
+            "id_aircraft": id_aircraft,
+            "route_code": route_code,
+            "scheduled_departure_day": datetime(2025, 8, 10),
+            "scheduled_arrival_day": datetime(2025, 8, 10, 13),
+        }
+        for id_flight in range(first, first + count)
+    ])
+    return list(range(first, first + count))
+
+
+@contextmanager
+def count_statements(engine, counter: list):
+    # Appends the number of SQL statements run inside the block to `counter`
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+        counter.append(len(statements))
+
+
+def timed(fn, repeat: int = 5) -> float:
+    # Median wall time of `fn` in milliseconds
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def print_table(header: list[str], rows: list[list]):
+    widths = [max(len(str(value)) for value in column) for column in zip(header, *rows)]
+    for row in (header, *rows):
+        print("  ".join(str(value).rjust(width) for value, width in zip(row, widths)))
@@ -0,0 +1,114 @@
+"""
+Throughput of parallel bookings competing for the same seats (user-011). Every buyer
+books on its own session and thread, all released at once; a seat conflict is what the
+booking endpoint answers with 409. Each seat must end up sold exactly once.
+bookings/s counts every booking request answered, won or lost.
+
+    python -m benchmarks.concurrent_booking [buyers]
+"""
+import sys
+import threading
+import time
+
+from sqlalchemy import event, func, select
+
+from api.controllers.flight_controller import Flight_controller
+from api.models.ticket import Ticket
+from api.models.user import User
+from api.utils.seat_inventory import Seat_conflict_error
+from benchmarks.common import make_session_factory, add_cabin, print_table
+from tests.data import ticket
+
+BUYERS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+
+def serialize_sqlite_writes(engine):
+    # SQLite has no row locks: BEGIN IMMEDIATE takes the database write lock, as the tests do
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def run(session_factory, orders: list[list]) -> tuple[dict, float]:
+    # Status of each booking, as the endpoint would answer it, and the wall time of the run
+    barrier = threading.Barrier(len(orders) + 1)
+    statuses = [None] * len(orders)
+
+    def book(index: int, tickets):
+        session = session_factory()
+        try:
+            barrier.wait()
+            with session.begin():
+                statuses[index] = Flight_controller(session).book(index + 1, tickets)[1]
+        except Seat_conflict_error:
+            statuses[index] = 409
+        except ValueError:
+            statuses[index] = 404
+        except Exception:
+            statuses[index] = 500
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=book, args=(index, tickets)) for index, tickets in enumerate(orders)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    counts = {}
+    for status in statuses:
+        counts[status] = counts.get(status, 0) + 1
+    return counts, elapsed
+
+
+def main():
+    engine, session_factory = make_session_factory(flights=2)
+    serialize_sqlite_writes(engine)
+    with session_factory() as session:
+        existing = session.scalar(select(func.max(User.id_user)))
+        session.add_all([
+            User(id_user=id_user, id_role=1, name="Bench", lastname="User", email=f"bench{id_user}@example.com", password="x")
+            for id_user in range(existing + 1, BUYERS + 1)
+        ])
+        seat_ids = add_cabin(session, id_aircraft=1, id_class=1, rows=10, cols=10)
+        session.commit()
+
+    scenarios = [
+        # every buyer wants the same seat
+        ("same seat", 1, [[ticket(1, seat_ids[0], f"buyer{n}@example.com")] for n in range(BUYERS)]),
+        # buyers spread over 100 seats, so each seat is wanted by a few of them
+        ("100 seats", 2, [[ticket(2, seat_ids[n % 100], f"buyer{n}@example.com")] for n in range(BUYERS)]),
+    ]
+
+    rows = []
+    for name, id_flight, orders in scenarios:
+        counts, elapsed = run(session_factory, orders)
+        with session_factory() as session:
+            sold = session.execute(
+                select(Ticket.id_seat, func.count()).where(Ticket.id_flight == id_flight).group_by(Ticket.id_seat)
+            ).all()
+        wanted = {order[0].ticket_info.id_seat for order in orders}
+        # exactly one winner per seat
+        assert all(count == 1 for _, count in sold) and {id_seat for id_seat, _ in sold} == wanted
+        assert counts.get(200, 0) == len(wanted) and counts.get(409, 0) == BUYERS - len(wanted), counts
+
+        rows.append([
+            name, BUYERS, counts.get(200, 0), counts.get(409, 0), BUYERS - counts.get(200, 0) - counts.get(409, 0),
+            f"{elapsed:.2f}", f"{BUYERS / elapsed:.0f}",
+        ])
+
+    print_table(["scenario", "buyers", "booked", "409s", "errors", "seconds", "bookings/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
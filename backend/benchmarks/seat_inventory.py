@@ -0,0 +1,66 @@
+"""
+Latency of reading a flight's seat availability as its number of sold tickets grows (user-016).
+Compares the seat bitmaps of flight_seat_inventory with counting the flight's tickets.
+
+    python -m benchmarks.seat_inventory
+"""
+from sqlalchemy import func, insert, select
+
+from api.models.cabin import Cabin
+from api.models.cell import Cell
+from api.models.ticket import Ticket
+from api.utils.seat_inventory import Seat_inventory
+from benchmarks.common import make_session_factory, add_cabin, add_flights, count_statements, timed, print_table
+
+TICKETS = (0, 100, 1000, 5000)
+
+
+def count_sold_by_class(session, id_flight: int):
+    stmt = (
+        select(Cabin.id_class, func.count(Ticket.id_ticket))
+        .join(Cell, Cell.id_cell == Ticket.id_seat)
+        .join(Cabin, Cabin.id_cabin == Cell.id_cabin)
+        .where(Ticket.id_flight == id_flight)
+        .group_by(Cabin.id_class)
+    )
+    return session.execute(stmt).all()
+
+
+def main():
+    engine, session_factory = make_session_factory()
+    with session_factory() as session:
+        seat_ids = add_cabin(session, id_aircraft=1, id_class=1, rows=100, cols=60)
+        flight_ids = add_flights(session, len(TICKETS))
+        for id_flight, tickets in zip(flight_ids, TICKETS):
+            if tickets:
+                session.execute(insert(Ticket), [
+                    {"id_flight": id_flight, "id_seat": id_seat, "price": 100} for id_seat in seat_ids[:tickets]
+                ])
+        session.commit()
+
+    rows = []
+    with session_factory() as session:
+        seats = sum(Seat_inventory.load(session, {flight_ids[0]: 1}).seats_available(flight_ids[0]).values())
+        session.rollback()
+        for id_flight, tickets in zip(flight_ids, TICKETS):
+            # the first load builds the flight's bitmaps from its tickets
+            inventory = Seat_inventory.load(session, {id_flight: 1})
+            inventory.save(session)
+            session.commit()
+
+            statements = []
+            with count_statements(engine, statements):
+                available = Seat_inventory.load(session, {id_flight: 1}).seats_available(id_flight)
+            # the seed cabin adds its own Economy seats
+            assert available[1] == seats - tickets
+
+            bitmap_ms = timed(lambda: Seat_inventory.load(session, {id_flight: 1}).seats_available(id_flight), repeat=20)
+            scan_ms = timed(lambda: count_sold_by_class(session, id_flight), repeat=20)
+            rows.append([tickets, f"{bitmap_ms:.2f}", statements[0], f"{scan_ms:.2f}"])
+            session.rollback()
+
+    print_table(["tickets", "bitmap ms", "statements", "ticket scan ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Throughput and peak memory of the gzip CSV ticket export (user-025) for 10,000 to 100,000 tickets.
+
+    python -m benchmarks.ticket_export
+"""
+import gzip
+import tracemalloc
+
+from sqlalchemy import insert
+
+from api.controllers.airline_controller import Airline_controller
+from api.models.ticket import Ticket
+from api.query.flight_query import TICKET_EXPORT_COLUMNS
+from api.utils.csv_export import gzip_csv
+from benchmarks.common import make_session_factory, add_cabin, add_flights, print_table
+
+TICKETS = (10_000, 50_000, 100_000)
+SEATS_PER_FLIGHT = 1000
+
+
+def main():
+    engine, session_factory = make_session_factory()
+    with session_factory() as session:
+        seat_ids = add_cabin(session, id_aircraft=1, id_class=1, rows=20, cols=50)
+        session.commit()
+
+    rows = []
+    sold = 0
+    for tickets in TICKETS:
+        with session_factory() as session:
+            for id_flight in add_flights(session, (tickets - sold) // SEATS_PER_FLIGHT):
+                session.execute(insert(Ticket), [
+                    {"id_flight": id_flight, "id_seat": id_seat, "price": 100} for id_seat in seat_ids
+                ])
+            session.commit()
+        sold = tickets
+
+        stats = {}
+        size = 0
+        keep_body = tickets == TICKETS[0]    # decompressed once to check the output
+        body = []
+        with session_factory() as session:
+            tracemalloc.start()
+            for chunk in gzip_csv(TICKET_EXPORT_COLUMNS, Airline_controller(session).stream_tickets_export("AZ"), stats):
+                size += len(chunk)
+                if keep_body:
+                    body.append(chunk)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if keep_body:
+            assert gzip.decompress(b"".join(body)).count(b"\n") == tickets + 1
+
+        # tracemalloc slows the export down, so the throughput is measured on a second run
+        with session_factory() as session:
+            throughput = {}
+            for _ in gzip_csv(TICKET_EXPORT_COLUMNS, Airline_controller(session).stream_tickets_export("AZ"), throughput):
+                pass
+
+        assert stats["rows"] == tickets
+        rows.append([
+            f"{tickets:,}", f"{throughput['rows_per_second']:,.0f}", f"{size / 1e6:.1f}", f"{peak / 1e6:.1f}"
+        ])
+
+    print_table(["tickets", "rows/s", "gzip MB", "peak MB"], rows)
+
+
+if __name__ == "__main__":
+    main()
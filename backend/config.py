@@ -10,3 +10,20 @@ class Config:
     JWT_BLACKLIST_ENABLED = True
     JWT_BLACKLIST_TOKEN_CHECKS = ["access", "refresh"]
     DB_URL = os.getenv("DB_URL")
+    MIN_CONNECTION_MINUTES = int(os.getenv("MIN_CONNECTION_MINUTES", "60"))
+    CONNECTION_SEARCH_DAYS = int(os.getenv("CONNECTION_SEARCH_DAYS", "2"))
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+    SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "300"))
+    SEARCH_DEADLINE_SECONDS = float(os.getenv("SEARCH_DEADLINE_SECONDS", "10"))
+    SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "8"))
+    SEARCH_STREAM_BATCH = int(os.getenv("SEARCH_STREAM_BATCH", "500"))
+    SEAT_HOLD_TTL = int(os.getenv("SEAT_HOLD_TTL", "600"))
+    SEAT_HOLD_STORE = os.getenv("SEAT_HOLD_STORE", "database")     # "memory" keeps holds in process
+    SEAT_HOLD_SWEEP_SECONDS = float(os.getenv("SEAT_HOLD_SWEEP_SECONDS", "30"))
+    IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", str(24 * 60 * 60)))
+    IDEMPOTENCY_PURGE_SECONDS = float(os.getenv("IDEMPOTENCY_PURGE_SECONDS", "600"))
+    REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+    REPORT_MAX_PENDING = int(os.getenv("REPORT_MAX_PENDING", "32"))
+    REPORT_RESULT_TTL = int(os.getenv("REPORT_RESULT_TTL", "300"))
+    TICKET_EXPORT_BATCH = int(os.getenv("TICKET_EXPORT_BATCH", "5000"))
@@ -0,0 +1,10 @@
+-- A seat can be sold only once per flight (Ticket.__table_args__, uq_tickets_flight_seat).
+-- Safe to run more than once. Seats already sold twice have to be resolved first, this
+-- lists them:
+--   SELECT id_flight, id_seat, count(*) FROM tickets GROUP BY id_flight, id_seat HAVING count(*) > 1;
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_tickets_flight_seat') THEN
+        ALTER TABLE tickets ADD CONSTRAINT uq_tickets_flight_seat UNIQUE (id_flight, id_seat);
+    END IF;
+END $$;
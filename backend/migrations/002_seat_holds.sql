@@ -0,0 +1,12 @@
+-- Seat holds taken during checkout (api/models/seat_hold.py), shared by every process.
+-- Safe to run more than once. Not needed with SEAT_HOLD_STORE=memory.
+CREATE TABLE IF NOT EXISTS seat_holds (
+    id_flight INTEGER NOT NULL REFERENCES flights (id_flight) ON DELETE CASCADE,
+    id_seat INTEGER NOT NULL REFERENCES cells (id_cell) ON DELETE CASCADE,
+    id_hold VARCHAR(32) NOT NULL,
+    id_user INTEGER NOT NULL REFERENCES users (id_user) ON DELETE CASCADE,
+    expires_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    PRIMARY KEY (id_flight, id_seat)
+);
+CREATE INDEX IF NOT EXISTS ix_seat_holds_id_hold ON seat_holds (id_hold);
+CREATE INDEX IF NOT EXISTS ix_seat_holds_expires_at ON seat_holds (expires_at);
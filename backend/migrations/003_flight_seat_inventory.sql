@@ -0,0 +1,11 @@
+-- Sold-seat bitmaps per flight and cabin (api/models/flight_seat_inventory.py), read and
+-- written by every booking and availability lookup. Safe to run more than once.
+-- Rows are filled lazily: a flight without them is rebuilt from its tickets on first use.
+CREATE TABLE IF NOT EXISTS flight_seat_inventory (
+    id_flight INTEGER NOT NULL REFERENCES flights (id_flight) ON DELETE CASCADE,
+    id_cabin INTEGER NOT NULL REFERENCES cabins (id_cabin) ON DELETE CASCADE,
+    occupied BYTEA NOT NULL,
+    occupied_seats INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+    PRIMARY KEY (id_flight, id_cabin)
+);
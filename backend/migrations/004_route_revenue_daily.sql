@@ -0,0 +1,13 @@
+-- Daily tickets and revenue per route and class (api/models/route_revenue_daily.py),
+-- written by every booking. Safe to run more than once. Past sales are not in it until
+-- the rollups are rebuilt once after deploying:
+--   flask --app app rebuild-revenue-rollups
+CREATE TABLE IF NOT EXISTS route_revenue_daily (
+    basis VARCHAR(10) NOT NULL,
+    route_code VARCHAR NOT NULL REFERENCES routes (code) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    id_class INTEGER NOT NULL,
+    tickets INTEGER NOT NULL DEFAULT 0,
+    revenue DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (basis, route_code, day, id_class)
+);
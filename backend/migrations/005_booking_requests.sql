@@ -0,0 +1,12 @@
+-- Stored responses of bookings sent with an Idempotency-Key (api/models/booking_request.py).
+-- Safe to run more than once. The created_at index serves the purger's bulk delete.
+CREATE TABLE IF NOT EXISTS booking_requests (
+    id_buyer INTEGER NOT NULL,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash VARCHAR(64) NOT NULL,
+    status_code INTEGER,
+    response JSON,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+    PRIMARY KEY (id_buyer, idempotency_key)
+);
+CREATE INDEX IF NOT EXISTS ix_booking_requests_created_at ON booking_requests (created_at);
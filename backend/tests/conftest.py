@@ -0,0 +1,61 @@
+import os
+
+# config.py and db.py read DB_URL at import time
+os.environ.setdefault("DB_URL", "sqlite://")
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from api.models import Base
+from api.utils.price_policy_cache import class_price_policy_cache
+from api.utils.route_index import route_index
+from api.utils.search_cache import search_cache
+from api.utils.seat_inventory import seat_layout_cache
+from tests.data import seed
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # TEST_DB_URL points the tests at an empty PostgreSQL database; otherwise a SQLite file is used
+    url = os.getenv("TEST_DB_URL")
+    if url:
+        engine = create_engine(url)
+    else:
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False, "timeout": 30}
+        )
+
+        # SQLite has no row locks: BEGIN IMMEDIATE takes the database write lock instead, so
+        # concurrent bookings are serialized the way SELECT ... FOR UPDATE serializes them
+        @event.listens_for(engine, "connect")
+        def _connect(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def _begin(connection):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # process-wide caches must not leak ids between test databases
+    for cache in (class_price_policy_cache, route_index, search_cache, seat_layout_cache):
+        cache.invalidate()
+    yield
+
+
+@pytest.fixture
+def session_factory(engine):
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    seed(session)
+    session.commit()
+    session.close()
+    return factory
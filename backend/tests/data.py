@@ -0,0 +1,73 @@
+from datetime import datetime, time
+
+from api.models import *
+from api.models.aircraft_airlines import Aircraft_airline
+from api.models.user import User
+from api.validations.flight_validation import Ticket as Ticket_schema
+
+
+def seed(session, flights: int = 1):
+    # One airline flying FCO -> JFK on 2025-08-10 with `flights` flights (ids from 1) of a single
+    # aircraft: one Economy cabin of 4 rows x 3 columns where the middle column is the aisle,
+    # so 8 seats (cells 1-12)
+    session.add(Role(id_role=1, name="User"))
+    session.add(Country(id_country=1, name="Italy"))
+    session.add(State(id_state=1, id_country=1, name="Lazio"))
+    session.add(City(id_city=1, id_state=1, name="Rome"))
+    session.add(Airline(iata_code="AZ", name="ITA Airways"))
+    session.add(Manufacturer(id_manufacturer=1, name="Airbus"))
+    session.add(Class_seat(id_class=1, name="Economy", code="Y"))
+    session.flush()
+
+    session.add_all([
+        User(id_user=id_user, id_role=1, name="Test", lastname="User", email=f"user{id_user}@example.com", password="x")
+        for id_user in range(1, 21)
+    ])
+    for code in ("FCO", "JFK"):
+        session.add(Airport(iata_code=code, id_city=1, name=code, latitude=0, longitude=0))
+    session.add(Aircraft(id_aircraft=1, id_manufacturer=1, max_seats=100, cruise_speed_kmh=850, name="A320", cabin_max_cols=3))
+    session.flush()
+
+    session.add(Aircraft_airline(id_aircraft_airline=1, airline_code="AZ", id_aircraft_model=1))
+    session.flush()
+    session.add(Cabin(id_cabin=1, id_aircraft=1, id_class=1, rows=4, cols=3))
+    session.flush()
+    session.add_all([
+        Cell(id_cell=y * 3 + x + 1, id_cabin=1, x=x, y=y, is_seat=(x != 1))
+        for y in range(4)
+        for x in range(3)
+    ])
+
+    session.add(Route_section(id_routes_section=1, code_departure_airport="FCO", code_arrival_airport="JFK"))
+    session.add(Route(
+        code="AZ1", airline_iata_code="AZ", base_price=100,
+        start_date=datetime(2025, 1, 1), end_date=datetime(2026, 1, 1), is_outbound=True
+    ))
+    session.flush()
+    session.add(Route_detail(
+        id_airline_routes=1, code_route="AZ1", id_route_section=1, id_next=None,
+        departure_time=time(9), arrival_time=time(13)
+    ))
+    session.flush()
+    session.add_all([
+        Flight(
+            id_flight=id_flight, id_aircraft=1, route_code="AZ1",
+            scheduled_departure_day=datetime(2025, 8, 10), scheduled_arrival_day=datetime(2025, 8, 10, 13)
+        )
+        for id_flight in range(1, flights + 1)
+    ])
+
+
+def ticket(id_flight: int, id_seat: int, email: str) -> Ticket_schema:
+    return Ticket_schema(
+        ticket_info={"id_flight": id_flight, "id_seat": id_seat},
+        passenger_info={
+            "name": "Mario",
+            "lastname": "Rossi",
+            "date_birth": "1990-01-01",
+            "phone_number": "3331234567",
+            "email": email,
+            "passport_number": "YA1234567",
+            "sex": "M",
+        },
+    )
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from api.controllers.flight_controller import Flight_controller
+from api.models.class_price_policy import Class_price_policy
+from api.models.ticket import Ticket
+from api.utils.price_policy_cache import class_price_policy_cache
+from tests.data import ticket
+
+
+def test_booking_charges_the_committed_policy(session_factory):
+    with session_factory() as session:
+        session.add(Class_price_policy(id_class=1, airline_code="AZ", price_multiplier=1.5, fixed_markup=10))
+        session.commit()
+        # search display caches the policy in this process
+        assert class_price_policy_cache.get(session, "AZ", 1) == (1.5, 10)
+
+    # another process changes the policy: this process's cache is never invalidated
+    with session_factory() as session:
+        session.execute(update(Class_price_policy).values(price_multiplier=2.0, fixed_markup=0))
+        session.commit()
+
+    with session_factory() as session:
+        with session.begin():
+            Flight_controller(session).book(1, [ticket(1, 1, "user1@example.com")])
+        assert session.scalar(select(Ticket.price)) == 200
+
+
+def test_flexible_fares_quote_the_search_policy(session_factory):
+    with session_factory() as session:
+        # search and booking price with the airline's first policy for the class
+        session.add(Class_price_policy(id_class=1, airline_code="AZ", price_multiplier=1.5, fixed_markup=10))
+        session.add(Class_price_policy(id_class=1, airline_code="AZ", price_multiplier=1.0, fixed_markup=0))
+        session.commit()
+
+    with session_factory() as session:
+        controller = Flight_controller(session)
+        search, _ = controller.get_flights("FCO", "JFK", False, True, datetime(2025, 8, 10), None, 1)
+        fares, status = controller.get_flexible_fares("FCO", "JFK", True, datetime(2025, 8, 10), datetime(2025, 8, 10), 1)
+    assert status == 200
+    [day] = fares["days"]
+    assert day["cheapest_price"] == search["outbound_flights"][0]["flight_price"] == 160
@@ -0,0 +1,19 @@
+import pytest
+
+from api.controllers.flight_controller import Flight_controller
+from tests.data import ticket
+
+
+# cell 2 is the aisle of the seeded cabin's first row, cell 13 is not on the aircraft
+@pytest.mark.parametrize("id_seat", [2, 13])
+def test_only_seats_of_the_aircraft_can_be_booked(session_factory, id_seat):
+    with session_factory() as session, pytest.raises(ValueError, match="does not belong"):
+        with session.begin():
+            Flight_controller(session).book(1, [ticket(1, id_seat, "user1@example.com")])
+
+
+@pytest.mark.parametrize("id_seat", [2, 13])
+def test_only_seats_of_the_aircraft_can_be_held(session_factory, id_seat):
+    with session_factory() as session, pytest.raises(ValueError, match="does not belong"):
+        with session.begin():
+            Flight_controller(session).hold_seats(1, 1, [id_seat])
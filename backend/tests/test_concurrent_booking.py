@@ -0,0 +1,70 @@
+import threading
+
+from sqlalchemy import func, select
+
+from api.controllers.flight_controller import Flight_controller
+from api.models.ticket import Ticket
+from api.utils.seat_inventory import Seat_conflict_error
+from tests.data import ticket
+
+BUYERS = 20
+
+
+def book_concurrently(session_factory, orders: list[list]) -> list:
+    # Every order is booked by its own buyer on its own session, all released at once
+    barrier = threading.Barrier(len(orders))
+    results = [None] * len(orders)
+
+    def book(index: int, tickets):
+        session = session_factory()
+        try:
+            barrier.wait()
+            with session.begin():
+                results[index] = Flight_controller(session).book(index + 1, tickets)
+        except ValueError as e:
+            results[index] = e
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=book, args=(index, tickets)) for index, tickets in enumerate(orders)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def sold(session_factory) -> list[tuple[int, int]]:
+    with session_factory() as session:
+        return session.execute(
+            select(Ticket.id_seat, func.count()).where(Ticket.id_flight == 1).group_by(Ticket.id_seat)
+        ).all()
+
+
+def test_one_winner_per_seat(session_factory):
+    results = book_concurrently(
+        session_factory, [[ticket(1, 1, f"buyer{n}@example.com")] for n in range(BUYERS)]
+    )
+
+    winners = [result for result in results if isinstance(result, tuple)]
+    losers = [result for result in results if isinstance(result, ValueError)]
+    assert len(winners) == 1
+    assert winners[0][1] == 200
+    assert len(losers) == BUYERS - 1
+    assert all(isinstance(error, Seat_conflict_error) and "already occupied" in str(error) for error in losers)
+    assert sold(session_factory) == [(1, 1)]
+
+
+def test_overlapping_orders_never_oversell(session_factory):
+    # Each order takes two adjacent seats, so every order overlaps with its neighbours
+    seats = [1, 3, 4, 6, 7, 9, 10, 12]
+    orders = [
+        [ticket(1, seats[n % len(seats)], f"buyer{n}@example.com"), ticket(1, seats[(n + 1) % len(seats)], f"buyer{n}@example.com")]
+        for n in range(BUYERS)
+    ]
+    results = book_concurrently(session_factory, orders)
+
+    booked = [seat for order, result in zip(orders, results) if isinstance(result, tuple) for seat in order]
+    assert all(isinstance(result, (tuple, ValueError)) for result in results)
+    assert len(booked) == len({t.ticket_info.id_seat for t in booked})
+    assert sorted(sold(session_factory)) == sorted((t.ticket_info.id_seat, 1) for t in booked)
@@ -0,0 +1,69 @@
+from datetime import date, datetime, time
+
+from sqlalchemy import event
+
+from api.controllers.flight_controller import Flight_controller
+from api.models import Airport, Flight, Route, Route_detail, Route_section
+from api.utils.route_index import route_index
+
+
+def add_route(session, code: str, id_section: int, departure_airport: str, arrival_airport: str, departure: int, arrival: int):
+    # A one-section route flown once, on 2025-08-10
+    session.add(Route_section(id_routes_section=id_section, code_departure_airport=departure_airport, code_arrival_airport=arrival_airport))
+    session.add(Route(
+        code=code, airline_iata_code="AZ", base_price=100,
+        start_date=datetime(2025, 1, 1), end_date=datetime(2026, 1, 1), is_outbound=True
+    ))
+    session.flush()
+    session.add(Route_detail(code_route=code, id_route_section=id_section, departure_time=time(departure), arrival_time=time(arrival)))
+    session.add(Flight(
+        id_aircraft=1, route_code=code,
+        scheduled_departure_day=datetime(2025, 8, 10), scheduled_arrival_day=datetime(2025, 8, 10, arrival)
+    ))
+
+
+def network(session_factory):
+    # AZ1 FCO -> JFK 09-13 (seed), then JFK -> MIA -> BOG, and an unrelated LHR -> CDG
+    with session_factory() as session:
+        for code in ("MIA", "BOG", "LHR", "CDG"):
+            session.add(Airport(iata_code=code, id_city=1, name=code, latitude=0, longitude=0))
+        add_route(session, "AZ30", 30, "JFK", "MIA", 15, 18)
+        add_route(session, "AZ31", 31, "MIA", "BOG", 20, 23)
+        add_route(session, "AZ32", 32, "LHR", "CDG", 10, 11)
+        session.commit()
+
+
+def test_routes_between_keeps_only_usable_routes(session_factory):
+    network(session_factory)
+    with session_factory() as session:
+        assert route_index.routes_between(session, "FCO", "BOG", 3) == {"AZ1", "AZ30", "AZ31"}
+        assert route_index.routes_between(session, "FCO", "BOG", 2) == set()
+        assert route_index.routes_between(session, "FCO", "MIA", 3) == {"AZ1", "AZ30"}
+        assert route_index.routes_between(session, "JFK", "FCO", 3) == set()
+
+
+def count_connection_search(engine, session_factory, arrival_airport: str) -> tuple[int, int]:
+    # (legs of the itinerary found, SQL statements) of a connection search from FCO
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    with session_factory() as session:
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            response, status = Flight_controller(session).get_flights(
+                "FCO", arrival_airport, False, False, date(2025, 8, 10), None, 1, connections=True
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+    assert status == 200
+    [itinerary] = response["outbound_flights"]
+    return itinerary["num_legs"], len(statements)
+
+
+def test_connection_legs_are_loaded_together(engine, session_factory):
+    network(session_factory)
+    # warms the route index and the seat layout cache
+    count_connection_search(engine, session_factory, "BOG")
+
+    assert count_connection_search(engine, session_factory, "MIA")[0] == 2
+    assert count_connection_search(engine, session_factory, "MIA")[1] == count_connection_search(engine, session_factory, "BOG")[1]
+    assert count_connection_search(engine, session_factory, "BOG")[0] == 3
@@ -0,0 +1,32 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.utils import idempotency
+
+
+class Stop(Exception):
+    pass
+
+
+def test_purge_failures_are_logged_and_retried(monkeypatch, caplog):
+    sleeps = []
+
+    def sleep(interval):
+        sleeps.append(interval)
+        if len(sleeps) > 2:
+            raise Stop
+
+    monkeypatch.setattr(idempotency, "time", SimpleNamespace(sleep=sleep))
+    # no booking_requests table: every run fails
+    session_factory = sessionmaker(bind=create_engine("sqlite://"))
+
+    with caplog.at_level(logging.ERROR, logger=idempotency.__name__), pytest.raises(Stop):
+        idempotency._purge(session_factory, 5, 60)
+
+    assert len(caplog.records) == 2
+    assert "booking requests" in caplog.records[0].getMessage()
+    assert caplog.records[0].exc_info is not None
@@ -0,0 +1,73 @@
+import threading
+from datetime import datetime, time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.controllers.flight_controller import Flight_controller
+from api.models import Base, Flight, Route, Route_detail, Route_section
+from config import Config
+from tests.data import seed
+
+
+@pytest.fixture
+def plain_session_factory(tmp_path):
+    # The legs of a round trip open their own sessions on the engine: no BEGIN IMMEDIATE here,
+    # so they read concurrently the way they do on PostgreSQL
+    engine = create_engine(f"sqlite:///{tmp_path / 'plain.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as session:
+        seed(session)
+        # AZ2 JFK -> FCO, a week after AZ1
+        session.add(Route_section(id_routes_section=2, code_departure_airport="JFK", code_arrival_airport="FCO"))
+        session.add(Route(
+            code="AZ2", airline_iata_code="AZ", base_price=120,
+            start_date=datetime(2025, 1, 1), end_date=datetime(2026, 1, 1), is_outbound=False
+        ))
+        session.flush()
+        session.add(Route_detail(
+            id_airline_routes=2, code_route="AZ2", id_route_section=2, id_next=None,
+            departure_time=time(15), arrival_time=time(23)
+        ))
+        session.add(Flight(
+            id_flight=2, id_aircraft=1, route_code="AZ2",
+            scheduled_departure_day=datetime(2025, 8, 17), scheduled_arrival_day=datetime(2025, 8, 17, 23)
+        ))
+        session.commit()
+    yield factory
+    engine.dispose()
+
+
+def round_trip(session_factory):
+    with session_factory() as session:
+        return Flight_controller(session).get_flights("FCO", "JFK", True, True, datetime(2025, 8, 10), datetime(2025, 8, 17), 1)
+
+
+def test_round_trip_searches_both_legs(plain_session_factory):
+    response, status = round_trip(plain_session_factory)
+    assert status == 200
+    [outbound] = response["outbound_flights"]
+    [return_] = response["return_flights"]
+    assert (outbound["id_flight"], outbound["flight_price"]) == (1, 100)
+    assert (return_["id_flight"], return_["flight_price"]) == (2, 120)
+    assert outbound["seats_available"] == return_["seats_available"] == {"1": 8}
+
+
+def test_round_trip_times_out(plain_session_factory, monkeypatch):
+    release = threading.Event()
+    search_leg = Flight_controller.search_leg
+
+    def slow_search_leg(self, *args):
+        release.wait(5)
+        return search_leg(self, *args)
+
+    monkeypatch.setattr(Config, "SEARCH_DEADLINE_SECONDS", 0.1)
+    monkeypatch.setattr(Flight_controller, "search_leg", slow_search_leg)
+    try:
+        response, status = round_trip(plain_session_factory)
+    finally:
+        release.set()
+    assert status == 504
+    assert response == {"message": "Flight search timed out"}
@@ -0,0 +1,23 @@
+import pytest
+
+from app import create_app
+
+
+@pytest.fixture(scope="module")
+def client():
+    return create_app().test_client()
+
+
+SEARCH = "/flight/search?departure_airport=FCO&arrival_airport=JFK&round_trip_flight=false&departure_date_outbound=2025-08-10"
+
+
+@pytest.mark.parametrize("query", ["limit=abc", "limit=0", "max_legs=x", "max_legs=9", "id_class=x"])
+def test_search_rejects_bad_numeric_params(client, query):
+    response = client.get(f"{SEARCH}&{query}")
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("query", ["id_class=x", "id_class=0"])
+def test_flexible_search_rejects_bad_class(client, query):
+    response = client.get(f"/flight/search/flexible?departure_airport=FCO&arrival_airport=JFK&date_from=2025-08-10&date_to=2025-08-12&{query}")
+    assert response.status_code == 400
@@ -0,0 +1,87 @@
+from datetime import datetime, time
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from api.controllers.flight_controller import Flight_controller
+from api.models.flight import Flight
+from api.models.route import Route
+from api.models.route_detail import Route_detail
+from api.utils.route_index import route_index
+from tests.data import seed
+
+
+def count_search_statements(engine, session_factory) -> tuple[int, int]:
+    # (results, SQL statements) of a one-way FCO -> JFK search
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    with session_factory() as session:
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            response, status = Flight_controller(session).get_flights("FCO", "JFK", False, True, datetime(2025, 8, 10), None, 1)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+    assert status == 200
+    return len(response["outbound_flights"]), len(statements)
+
+
+def test_search_statement_count_does_not_grow_with_results(engine):
+    session_factory = sessionmaker(bind=engine)
+    with session_factory() as session:
+        seed(session, flights=2)
+        session.commit()
+
+    # the first search fills the route index and seat layout caches
+    count_search_statements(engine, session_factory)
+    results, few = count_search_statements(engine, session_factory)
+    assert results == 2
+
+    # 20 more flights, each on its own route, so any per-flight or per-route lazy load shows up
+    with session_factory() as session:
+        for n in range(2, 22):
+            session.add(Route(
+                code=f"AZ{n}", airline_iata_code="AZ", base_price=100,
+                start_date=datetime(2025, 1, 1), end_date=datetime(2026, 1, 1), is_outbound=True
+            ))
+            session.flush()
+            session.add(Route_detail(
+                code_route=f"AZ{n}", id_route_section=1, id_next=None, departure_time=time(9, n), arrival_time=time(13, n)
+            ))
+            session.add(Flight(
+                id_aircraft=1, route_code=f"AZ{n}",
+                scheduled_departure_day=datetime(2025, 8, 10), scheduled_arrival_day=datetime(2025, 8, 10, 13)
+            ))
+        session.commit()
+    # the new routes reach the route index, and the next search warms it again
+    route_index.invalidate()
+    count_search_statements(engine, session_factory)
+
+    results, many = count_search_statements(engine, session_factory)
+    assert results == 22
+    assert many == few
+
+
+def test_search_finds_routes_added_by_another_worker(engine):
+    session_factory = sessionmaker(bind=engine)
+    with session_factory() as session:
+        seed(session, flights=1)
+        session.commit()
+    assert count_search_statements(engine, session_factory)[0] == 1
+
+    # inserted without invalidating this process's route index, as another worker would
+    with session_factory() as session:
+        session.add(Route(
+            code="AZ3", airline_iata_code="AZ", base_price=100,
+            start_date=datetime(2025, 1, 1), end_date=datetime(2026, 1, 1), is_outbound=True
+        ))
+        session.flush()
+        session.add(Route_detail(
+            code_route="AZ3", id_route_section=1, id_next=None, departure_time=time(15, 0), arrival_time=time(19, 0)
+        ))
+        session.add(Flight(
+            id_aircraft=1, route_code="AZ3",
+            scheduled_departure_day=datetime(2025, 8, 10), scheduled_arrival_day=datetime(2025, 8, 10, 19)
+        ))
+        session.commit()
+
+    assert count_search_statements(engine, session_factory)[0] == 2
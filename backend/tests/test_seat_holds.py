@@ -0,0 +1,55 @@
+import pytest
+
+from api.controllers import flight_controller
+from api.controllers.flight_controller import Flight_controller
+from api.utils.seat_holds import Database_seat_hold_store, Seat_hold_store
+from tests.data import ticket
+
+
+@pytest.fixture(params=[Database_seat_hold_store, Seat_hold_store], ids=["database", "memory"])
+def store(request, monkeypatch):
+    store = request.param()
+    monkeypatch.setattr(flight_controller, "seat_hold_store", store)
+    return store
+
+
+def hold(session_factory, id_user: int, seat_ids: list[int]) -> str:
+    with session_factory() as session:
+        with session.begin():
+            response, status = Flight_controller(session).hold_seats(id_user, 1, seat_ids)
+    assert status == 201
+    return response["id_hold"]
+
+
+def book(session_factory, id_buyer: int, id_seat: int, id_hold: str | None = None):
+    with session_factory() as session:
+        with session.begin():
+            return Flight_controller(session).book(id_buyer, [ticket(1, id_seat, f"user{id_buyer}@example.com")], id_hold)
+
+
+def test_held_seats_are_blocked_for_other_users(session_factory, store):
+    hold(session_factory, 1, [1, 3])
+    with pytest.raises(ValueError, match="already held"):
+        hold(session_factory, 2, [3, 4])
+    with pytest.raises(ValueError, match="held by another customer"):
+        book(session_factory, 2, 1)
+
+
+def test_holder_books_own_seats_without_id_hold(session_factory, store):
+    hold(session_factory, 1, [1, 3])
+    assert book(session_factory, 1, 1)[1] == 200
+
+
+def test_booking_with_id_hold_releases_it(session_factory, store):
+    id_hold = hold(session_factory, 1, [1, 3])
+    assert book(session_factory, 1, 1, id_hold)[1] == 200
+    with session_factory() as session:
+        assert store.get(session, id_hold) is None
+        assert store.held_seats(session, [1]) == {1: set()}
+
+
+def test_expired_holds_do_not_block(session_factory, store, monkeypatch):
+    monkeypatch.setattr(flight_controller.Config, "SEAT_HOLD_TTL", -1)
+    hold(session_factory, 1, [1])
+    hold(session_factory, 2, [1])
+    assert book(session_factory, 3, 1)[1] == 200
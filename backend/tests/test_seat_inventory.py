@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import delete, insert, update
+
+from api.controllers.flight_controller import Flight_controller
+from api.models.cabin import Cabin
+from api.models.cell import Cell
+from api.models.ticket import Ticket
+from api.utils.seat_inventory import Seat_inventory
+from tests.data import ticket
+
+
+def available(session_factory) -> int:
+    with session_factory() as session:
+        return Seat_inventory.load(session, {1: 1}).seats_available(1)[1]
+
+
+def test_bitmaps_follow_tickets_changed_outside_booking(session_factory):
+    with session_factory() as session:
+        with session.begin():
+            Flight_controller(session).book(1, [ticket(1, 1, "user1@example.com")])
+    assert available(session_factory) == 7
+
+    # a ticket deleted by hand frees its seat again
+    with session_factory() as session:
+        session.execute(delete(Ticket))
+        session.commit()
+    assert available(session_factory) == 8
+
+    # and one written by hand takes it
+    with session_factory() as session:
+        session.execute(insert(Ticket).values(id_flight=1, id_seat=3, price=100))
+        session.commit()
+    assert available(session_factory) == 7
+    with session_factory() as session, pytest.raises(ValueError, match="already occupied"):
+        with session.begin():
+            Flight_controller(session).book(2, [ticket(1, 3, "user2@example.com")])
+
+
+def test_bookings_check_seats_against_the_committed_cabins(session_factory):
+    # warms this process's layout cache
+    assert available(session_factory) == 8
+
+    # another worker adds a row of cells and removes cell 1: this process's cache is never invalidated
+    with session_factory() as session:
+        session.execute(insert(Cell), [
+            {"id_cell": 13 + x, "id_cabin": 1, "x": x, "y": 4, "is_seat": x != 1} for x in range(3)
+        ])
+        session.execute(update(Cabin).where(Cabin.id_cabin == 1).values(rows=5))
+        session.execute(delete(Cell).where(Cell.id_cell == 1))
+        session.commit()
+
+    with session_factory() as session:
+        with session.begin():
+            assert Flight_controller(session).book(1, [ticket(1, 13, "user1@example.com")])[1] == 200
+    with session_factory() as session, pytest.raises(ValueError, match="does not belong"):
+        with session.begin():
+            Flight_controller(session).book(2, [ticket(1, 1, "user2@example.com")])
@@ -0,0 +1,104 @@
+from datetime import date, datetime, time
+
+import pytest
+from sqlalchemy import select, update
+
+from api.controllers.flight_controller import Flight_controller
+from api.models import Airport, Flight, Route, Route_detail, Route_section, Ticket
+from api.utils.geo import haversine
+from tests.data import ticket
+
+FCO = (41.80, 12.25)
+JFK = (40.64, -73.78)
+MIA = (25.79, -80.29)
+
+
+@pytest.fixture
+def overnight_route(session_factory):
+    # AZ5 FCO -> JFK -> MIA leaves on 2025-08-10 at 20:00; the JFK -> MIA section leaves at 01:00 the next day
+    with session_factory() as session:
+        for code, (latitude, longitude) in (("FCO", FCO), ("JFK", JFK)):
+            session.execute(update(Airport).where(Airport.iata_code == code).values(latitude=latitude, longitude=longitude))
+        session.add(Airport(iata_code="MIA", id_city=1, name="MIA", latitude=MIA[0], longitude=MIA[1]))
+        session.add(Route_section(id_routes_section=2, code_departure_airport="JFK", code_arrival_airport="MIA"))
+        session.add(Route(
+            code="AZ5", airline_iata_code="AZ", base_price=300,
+            start_date=datetime(2025, 1, 1), end_date=datetime(2026, 1, 1), is_outbound=True
+        ))
+        session.flush()
+        session.add(Route_detail(id_airline_routes=3, code_route="AZ5", id_route_section=2, departure_time=time(1), arrival_time=time(4)))
+        session.add(Route_detail(id_airline_routes=2, code_route="AZ5", id_route_section=1, id_next=3, departure_time=time(20), arrival_time=time(23, 30)))
+        session.add(Flight(
+            id_flight=10, id_aircraft=1, route_code="AZ5",
+            scheduled_departure_day=datetime(2025, 8, 10), scheduled_arrival_day=datetime(2025, 8, 11, 4)
+        ))
+        session.commit()
+
+    fco_jfk = haversine(*FCO, *JFK)
+    jfk_mia = haversine(*JFK, *MIA)
+    return 300 * jfk_mia / (fco_jfk + jfk_mia)
+
+
+def search(session_factory, departure_airport: str, arrival_airport: str, day: int) -> list[dict]:
+    with session_factory() as session:
+        response, status = Flight_controller(session).get_flights(
+            departure_airport, arrival_airport, False, False, datetime(2025, 8, day), None, 1
+        )
+    assert status == 200
+    return response["outbound_flights"]
+
+
+def test_later_section_is_found_on_its_own_departure_day(session_factory, overnight_route):
+    assert search(session_factory, "JFK", "MIA", 10) == []
+
+    [result] = search(session_factory, "JFK", "MIA", 11)
+    assert result["id_flight"] == 10
+    assert result["departure_date"] == "2025-08-11"
+    assert result["scheduled_departure_day"].startswith("2025-08-10")
+    assert [section["id_airline_routes"] for section in result["sections"]] == [3]
+
+
+def test_sections_are_priced_by_their_share_of_the_route(session_factory, overnight_route):
+    [result] = search(session_factory, "JFK", "MIA", 11)
+    assert result["flight_price"] == pytest.approx(overnight_route, rel=1e-6)
+
+    whole = [r for r in search(session_factory, "FCO", "MIA", 10) if r["id_flight"] == 10]
+    assert whole[0]["flight_price"] == pytest.approx(300)
+
+
+def test_booking_sections_charges_the_search_price(session_factory, overnight_route):
+    order = ticket(10, 1, "user1@example.com")
+    order.ticket_info.sections = [3]
+    with session_factory() as session:
+        with session.begin():
+            Flight_controller(session).book(1, [order])
+        assert session.scalar(select(Ticket.price)) == pytest.approx(overnight_route, rel=1e-6)
+
+    order = ticket(10, 3, "user2@example.com")
+    order.ticket_info.sections = [3, 2]
+    with session_factory() as session, pytest.raises(ValueError, match="sections"):
+        with session.begin():
+            Flight_controller(session).book(2, [order])
+
+
+def test_flexible_fares_use_the_section_day_and_price(session_factory, overnight_route):
+    with session_factory() as session:
+        response, status = Flight_controller(session).get_flexible_fares(
+            "JFK", "MIA", False, datetime(2025, 8, 9), datetime(2025, 8, 12), 1
+        )
+    assert status == 200
+    [day] = response["days"]
+    assert day["date"] == "2025-08-11"
+    assert day["cheapest_price"] == pytest.approx(overnight_route, rel=1e-6)
+
+
+def test_connections_board_later_sections_of_earlier_flights(session_factory, overnight_route):
+    with session_factory() as session:
+        response, status = Flight_controller(session).get_flights(
+            "JFK", "MIA", False, False, date(2025, 8, 11), None, 1, connections=True
+        )
+    assert status == 200
+    [itinerary] = response["outbound_flights"]
+    [leg] = itinerary["legs"]
+    assert (leg["id_flight"], leg["departure"], leg["sections"]) == (10, "2025-08-11T01:00:00", [3])
+    assert leg["flight_price"] == pytest.approx(overnight_route, rel=1e-6)